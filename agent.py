@@ -1,12 +1,68 @@
 """Agent module with LLM Provider integration."""
 
 import os
-from typing import Optional, List
+import time
+from typing import Dict, Optional, List
 
-from agents import Agent, Runner
+from agents import Agent, Model, RunHooks, Runner
 
 from llm import ProviderRegistry, MiniMaxProvider
 from tools import get_registered_tools
+from scheduler import get_scheduler
+from usage_ledger import UsageLedger, current_ledger
+
+
+class ScheduledModel(Model):
+    """Model wrapper that holds an "llm:<provider>" scheduler slot per call."""
+
+    def __init__(self, model, resource: str):
+        self.wrapped = model
+        self.resource = resource
+
+    def __getattr__(self, name):
+        # Only called for attributes the wrapper lacks (e.g. .model)
+        return getattr(self.wrapped, name)
+
+    async def get_response(self, *args, **kwargs):
+        async with get_scheduler().slot(self.resource):
+            return await self.wrapped.get_response(*args, **kwargs)
+
+    async def stream_response(self, *args, **kwargs):
+        async with get_scheduler().slot(self.resource):
+            async for event in self.wrapped.stream_response(*args, **kwargs):
+                yield event
+
+    def get_retry_advice(self, request):
+        return self.wrapped.get_retry_advice(request)
+
+    async def close(self) -> None:
+        await self.wrapped.close()
+
+
+class LedgerHooks(RunHooks):
+    """Run hooks that time each model call and record it in a ledger."""
+
+    def __init__(self, ledger: UsageLedger):
+        self.ledger = ledger
+        self._started: Dict[int, float] = {}
+
+    async def on_llm_start(self, context, agent, system_prompt, input_items) -> None:
+        self._started[id(agent)] = time.perf_counter()
+
+    async def on_llm_end(self, context, agent, response) -> None:
+        started = self._started.pop(id(agent), None)
+        latency_ms = int((time.perf_counter() - started) * 1000) if started is not None else None
+        self.ledger.add_turn(agent.name, response.usage, latency_ms, response.response_id)
+
+
+def current_hooks() -> Optional[LedgerHooks]:
+    """Hooks recording into the current workflow's ledger (None outside one)."""
+    ledger = current_ledger()
+    return LedgerHooks(ledger) if ledger is not None else None
+
+
+def _scheduled_model(provider) -> ScheduledModel:
+    return ScheduledModel(provider.create_model(), f"llm:{provider.config.provider}")
 
 
 def _get_default_provider() -> MiniMaxProvider:
@@ -21,6 +77,30 @@ def _get_default_provider() -> MiniMaxProvider:
     return MiniMaxProvider.from_config(config)
 
 
+def create_stage_provider(stage: str, warm=None):
+    """Provider for a pipeline stage ("planner", "writer" or "compressor").
+
+    Uses LLM_{STAGE}_PROVIDER / LLM_{STAGE}_MODEL, falling back to the
+    default MiniMax provider. A ready-built `warm` provider is returned
+    as-is when it already serves the stage's provider and model; any other
+    result is a new provider the caller must close.
+
+    Raises:
+        ValueError: If the stage's provider is not configured or has no
+            provider class.
+    """
+    from llm.config import LLMConfig
+
+    config = LLMConfig.load_stage(stage)
+    if warm is not None and (config is None or (
+        warm.config.provider == config.provider_id and warm.config.model_id == config.model
+    )):
+        return warm
+    if config is None:
+        return _get_default_provider()
+    return ProviderRegistry.create(config)
+
+
 def create_agent(
     trace_id: Optional[str] = None,
     provider: Optional[MiniMaxProvider] = None,
@@ -46,7 +126,7 @@ def create_agent(
 Current trace_id: {trace_id}
 """
 
-    model = provider.create_model()
+    model = _scheduled_model(provider)
 
     return Agent(
         name=f"{provider.config.provider.title()}-Agent",
@@ -96,7 +176,7 @@ def create_agent_with_tools(
 Current trace_id: {trace_id}
 """
 
-    model = provider.create_model()
+    model = _scheduled_model(provider)
 
     return Agent(
         name=f"{provider.config.provider.title()}-Agent-With-Tools",
@@ -140,7 +220,7 @@ Current trace_id: {trace_id}
 Provider: {provider.display_name}
 """
 
-    model = provider.create_model()
+    model = _scheduled_model(provider)
 
     return Agent(
         name=f"{provider.config.provider.title()}-Agent",
@@ -150,7 +230,68 @@ Provider: {provider.display_name}
     )
 
 
-async def run_agent(agent: Agent, prompt: str) -> Runner:
-    """Run the agent with a given prompt."""
-    result = await Runner.run(agent, prompt)
+def create_planner_agent(
+    trace_id: Optional[str] = None,
+    provider=None,
+    tools: Optional[List] = None,
+    prompt_name: str = "planner_v1.txt",
+) -> Agent:
+    """Create the retrieval-planning agent of the model cascade.
+
+    It runs the retrieval rounds with the search tool and ends with a
+    【素材简报】 material brief instead of the article.
+
+    Args:
+        trace_id: Optional trace ID for request tracking.
+        provider: Optional provider. Defaults to the planner stage provider.
+        tools: Optional list of tools to register.
+        prompt_name: Name of the prompt file to use.
+
+    Returns:
+        Configured Agent instance with tools.
+    """
+    if provider is None:
+        provider = create_stage_provider("planner")
+    agent = create_agent_with_provider(provider, trace_id=trace_id, tools=tools, prompt_name=prompt_name)
+    agent.name = f"{provider.config.provider.title()}-Planner"
+    return agent
+
+
+def create_writer_agent(
+    trace_id: Optional[str] = None,
+    provider=None,
+    prompt_name: str = "writer_v1.txt",
+) -> Agent:
+    """Create the final-writing agent of the model cascade.
+
+    It uses the writer prompt (identity and style) without tools: the
+    retrieval rounds are done, and it writes 【标题】/【正文】 from the brief.
+
+    Args:
+        trace_id: Optional trace ID for request tracking.
+        provider: Optional provider. Defaults to the writer stage provider.
+        prompt_name: Name of the prompt file to use.
+
+    Returns:
+        Configured Agent instance without tools.
+    """
+    if provider is None:
+        provider = create_stage_provider("writer")
+    agent = create_agent_with_provider(provider, trace_id=trace_id, tools=[], prompt_name=prompt_name)
+    agent.name = f"{provider.config.provider.title()}-Writer"
+    agent.instructions += """
+## 本次任务
+检索已经由检索助手完成，素材简报在用户消息里。不要再检索，直接进入"最后一步：写作"，
+按简报的结构和素材写，只输出【标题】和【正文】。
+"""
+    return agent
+
+
+async def run_agent(agent: Agent, prompt: str, hooks: Optional[RunHooks] = None) -> Runner:
+    """Run the agent with a given prompt.
+
+    Without explicit hooks, model turns are recorded in the current
+    workflow's usage ledger (if one is set).
+    """
+    result = await Runner.run(agent, prompt, hooks=hooks or current_hooks())
     return result
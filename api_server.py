@@ -0,0 +1,452 @@
+"""Local HTTP API for article generation.
+
+A small asyncio HTTP/1.1 server (standard library only) in front of
+run_workflow. Topics are accepted as jobs and generated in the background;
+progress streams as server-sent events:
+
+    POST /jobs                 {"topic": "...", "lane"?, "tenant"?} -> 202 {"job_id": ..., ...}
+    GET  /jobs                 recent jobs
+    GET  /jobs/<id>            job status
+    GET  /jobs/<id>/events     text/event-stream of queued/started/stage/tokens/done/failed
+    GET  /jobs/<id>/article    the generated article (text/markdown)
+    GET  /health               running and pending counts
+    GET  /metrics              scheduler queue waits per resource and lane
+
+Admission control: at most API_MAX_CONCURRENT jobs generate at once, and at
+most API_MAX_PENDING more wait for a slot; past that POST /jobs answers 429
+with Retry-After. The LLM provider (and, in worker mode, the NotebookLM
+page) is warmed once at startup and shared by every request. Jobs run in
+the scheduler's interactive lane unless they ask for "batch"; the tenant
+(default: the topic) is what the scheduler shares slots fairly between.
+
+CLI:
+    python api_server.py [--host 127.0.0.1] [--port 8780]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from output_store import normalize_topic
+from scheduler import LANES, get_scheduler, reset_schedule_context, set_schedule_context
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8780
+MAX_BODY_BYTES = 64 * 1024
+SSE_PING_SECONDS = 15.0
+
+TERMINAL_EVENTS = ("done", "failed")
+
+# run(topic, on_event) -> run_workflow result
+RunFn = Callable[[str, Callable[[Dict[str, Any]], None]], Awaitable[Dict[str, Any]]]
+
+_REASONS = {
+    200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+    429: "Too Many Requests", 500: "Internal Server Error",
+}
+
+
+class Overloaded(Exception):
+    """Raised when a job is submitted past the admission limits."""
+
+
+class ApiJob:
+    """One submitted topic and the progress events it produced."""
+
+    def __init__(self, topic: str, lane: str = "interactive", tenant: Optional[str] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.topic = topic
+        self.lane = lane
+        self.tenant = tenant or normalize_topic(topic)
+        self.status = "queued"
+        self.created_at = datetime.now().isoformat(timespec="seconds")
+        self.events: List[Dict[str, Any]] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self._subscribers: List[asyncio.Queue] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.status in TERMINAL_EVENTS
+
+    def emit(self, event: Dict[str, Any]):
+        """Record an event and hand it to every open event stream."""
+        event = {"id": len(self.events) + 1, **event}
+        self.events.append(event)
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    def subscribe(self) -> Tuple[List[Dict[str, Any]], asyncio.Queue]:
+        """Events so far plus a queue of the ones still to come."""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        return list(self.events), queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    def summary(self) -> Dict[str, Any]:
+        summary = {
+            "job_id": self.id,
+            "topic": self.topic,
+            "lane": self.lane,
+            "tenant": self.tenant,
+            "status": self.status,
+            "created_at": self.created_at,
+            "error": self.error,
+        }
+        if self.result is not None:
+            summary.update(
+                trace_id=self.result.get("trace_id"),
+                output_path=self.result.get("output_path"),
+                usage=self.result.get("usage"),
+            )
+        return summary
+
+
+class ArticleService:
+    """Runs submitted topics with bounded concurrency and keeps resources warm.
+
+    Usage:
+        service = ArticleService()
+        await service.start()          # warms the provider (and NotebookLM worker)
+        job = service.submit("选题")    # raises Overloaded past the limits
+        ...
+        await service.close()
+    """
+
+    def __init__(
+        self,
+        run: Optional[RunFn] = None,
+        max_concurrent: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        history: Optional[int] = None,
+        warm: bool = True,
+    ):
+        """
+        Args:
+            run: Generates one article (default: main.run_workflow with the
+                warm provider).
+            max_concurrent: Jobs generating at once (default: API_MAX_CONCURRENT).
+            max_pending: Jobs waiting for a slot (default: API_MAX_PENDING).
+            history: Finished jobs kept for GET (default: API_JOB_HISTORY).
+            warm: Warm the provider and NotebookLM worker at start().
+        """
+        self.run = run or self._run_workflow
+        self.max_concurrent = max(1, max_concurrent or int(os.getenv("API_MAX_CONCURRENT", "2")))
+        self.max_pending = max_pending if max_pending is not None else int(os.getenv("API_MAX_PENDING", "8"))
+        self.history = history or int(os.getenv("API_JOB_HISTORY", "100"))
+        self.warm = warm
+        self.jobs: Dict[str, ApiJob] = {}
+        self.provider = None
+        self._prewarmer = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def start(self):
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        if self.warm:
+            from prewarm import Prewarmer
+
+            # Claimed right away, so the prewarm expiry never drops it
+            self._prewarmer = Prewarmer()
+            self._prewarmer.start()
+            self.provider = await self._prewarmer.claim()
+            for stage, error in self._prewarmer.errors.items():
+                print(f"⚠️ 预热 {stage} 失败: {error}")
+
+    async def close(self):
+        """Cancel unfinished jobs and release the warm resources."""
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        if self._prewarmer is not None:
+            await self._prewarmer.drop()
+            await self._prewarmer.wait()
+            self._prewarmer = None
+        self.provider = None
+
+    async def _run_workflow(self, topic: str, on_event) -> Dict[str, Any]:
+        from main import run_workflow
+        return await run_workflow(topic, provider=self.provider, on_event=on_event)
+
+    @property
+    def running(self) -> int:
+        return sum(1 for job in self.jobs.values() if job.status == "running")
+
+    @property
+    def pending(self) -> int:
+        return sum(1 for job in self.jobs.values() if job.status == "queued")
+
+    def submit(self, topic: str, lane: str = "interactive", tenant: Optional[str] = None) -> ApiJob:
+        """Accept a topic for generation.
+
+        Args:
+            topic: The article topic.
+            lane: Scheduler lane ("interactive" or "batch").
+            tenant: Who the job is for (default: the normalized topic).
+
+        Raises:
+            ValueError: If the topic is empty or the lane unknown.
+            Overloaded: If every slot is busy and the wait list is full.
+        """
+        topic = topic.strip()
+        if not topic:
+            raise ValueError("Topic must not be empty")
+        if lane not in LANES:
+            raise ValueError(f"lane must be one of {LANES}")
+        if self.running + self.pending >= self.max_concurrent + self.max_pending:
+            raise Overloaded(f"{self.running} jobs running and {self.pending} waiting")
+
+        job = ApiJob(topic, lane, tenant)
+        self.jobs[job.id] = job
+        job.emit({"event": "queued", "topic": topic})
+        token = set_schedule_context(job.lane, job.tenant)
+        try:
+            self._tasks[job.id] = asyncio.create_task(self._execute(job))
+        finally:
+            reset_schedule_context(token)
+        self._forget_finished()
+        return job
+
+    async def _execute(self, job: ApiJob):
+        try:
+            async with self._slots:
+                job.status = "running"
+                job.emit({"event": "started"})
+                job.result = await self.run(job.topic, job.emit)
+            job.status = "done"
+            job.emit({
+                "event": "done",
+                "trace_id": job.result.get("trace_id"),
+                "output_path": job.result.get("output_path"),
+                "usage": job.result.get("usage"),
+            })
+        except asyncio.CancelledError:
+            job.status, job.error = "failed", "Server shutting down"
+            job.emit({"event": "failed", "error": job.error})
+            raise
+        except Exception as e:
+            job.status, job.error = "failed", f"{type(e).__name__}: {e}"
+            job.emit({"event": "failed", "error": job.error})
+        finally:
+            self._tasks.pop(job.id, None)
+
+    def _forget_finished(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self.jobs[job_id]
+
+
+def _response(status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None) -> bytes:
+    lines = [
+        f"HTTP/1.1 {status} {_REASONS.get(status, 'Unknown')}",
+        f"Content-Type: {content_type}",
+        f"Content-Length: {len(body)}",
+        "Connection: close",
+    ]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+def _json_response(status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    return _response(status, body, "application/json; charset=utf-8", headers)
+
+
+def _error(status: int, message: str, headers: Optional[Dict[str, str]] = None) -> bytes:
+    return _json_response(status, {"error": message}, headers)
+
+
+def _sse(event: Dict[str, Any]) -> bytes:
+    data = json.dumps(event, ensure_ascii=False)
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {data}\n\n".encode("utf-8")
+
+
+class ApiServer:
+    """HTTP front end of an ArticleService."""
+
+    def __init__(self, service: ArticleService):
+        self.service = service
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> int:
+        """Warm the service and listen; returns the bound port (useful with port=0)."""
+        await self.service.start()
+        self._server = await asyncio.start_server(self.handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.service.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str], bytes]:
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, _ = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", "0"))
+        if length > MAX_BODY_BYTES:
+            raise OverflowError(length)
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], headers, body
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            try:
+                method, path, headers, body = await self._read_request(reader)
+            except OverflowError:
+                writer.write(_error(413, f"Body over {MAX_BODY_BYTES} bytes"))
+                return
+            except (ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                writer.write(_error(400, "Malformed request"))
+                return
+
+            parts = [part for part in path.split("/") if part]
+            if parts[:1] == ["jobs"] and len(parts) == 3 and parts[2] == "events" and method == "GET":
+                await self._stream_events(parts[1], writer)
+            else:
+                writer.write(self.route(method, parts, body))
+            await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    def route(self, method: str, parts: List[str], body: bytes) -> bytes:
+        """Response bytes for every non-streaming endpoint."""
+        service = self.service
+        if parts == ["health"]:
+            return _json_response(200, {
+                "status": "ok",
+                "running": service.running,
+                "pending": service.pending,
+                "max_concurrent": service.max_concurrent,
+                "max_pending": service.max_pending,
+                "warm": service.provider is not None,
+            })
+
+        if parts == ["metrics"]:
+            return _json_response(200, get_scheduler().metrics())
+
+        if parts == ["jobs"]:
+            if method == "GET":
+                jobs = sorted(service.jobs.values(), key=lambda job: job.created_at, reverse=True)
+                return _json_response(200, [job.summary() for job in jobs])
+            if method != "POST":
+                return _error(405, "Use GET or POST")
+            try:
+                request = json.loads(body.decode("utf-8") or "{}")
+                topic, lane, tenant = (request.get("topic", ""), request.get("lane", "interactive"),
+                                       request.get("tenant"))
+                if not all(isinstance(v, str) for v in (topic, lane)) or not isinstance(tenant, (str, type(None))):
+                    raise ValueError("topic, lane and tenant must be strings")
+                job = service.submit(topic, lane, tenant)
+            except Overloaded as e:
+                return _error(429, f"Too many jobs: {e}", {"Retry-After": "30"})
+            except (ValueError, AttributeError) as e:
+                return _error(400, f"Expected {{\"topic\": \"...\"}}: {e}")
+            return _json_response(202, {
+                **job.summary(),
+                "events": f"/jobs/{job.id}/events",
+                "article": f"/jobs/{job.id}/article",
+            }, {"Location": f"/jobs/{job.id}"})
+
+        if parts[:1] == ["jobs"] and len(parts) in (2, 3):
+            if method != "GET":
+                return _error(405, "Use GET")
+            job = service.jobs.get(parts[1])
+            if job is None:
+                return _error(404, f"No job {parts[1]}")
+            if len(parts) == 2:
+                return _json_response(200, job.summary())
+            if parts[2] == "article":
+                if job.status != "done":
+                    return _error(409, f"Job is {job.status}")
+                content = job.result.get("content") or ""
+                return _response(200, content.encode("utf-8"), "text/markdown; charset=utf-8")
+
+        return _error(404, "Not found")
+
+    async def _stream_events(self, job_id: str, writer: asyncio.StreamWriter):
+        job = self.service.jobs.get(job_id)
+        if job is None:
+            writer.write(_error(404, f"No job {job_id}"))
+            return
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream; charset=utf-8\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        past, queue = job.subscribe()
+        try:
+            for event in past:
+                writer.write(_sse(event))
+                if event["event"] in TERMINAL_EVENTS:
+                    return
+            await writer.drain()
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_PING_SECONDS)
+                except asyncio.TimeoutError:
+                    writer.write(b": ping\n\n")  # keeps proxies and clients from timing out
+                    await writer.drain()
+                    continue
+                writer.write(_sse(event))
+                await writer.drain()
+                if event["event"] in TERMINAL_EVENTS:
+                    return
+        finally:
+            job.unsubscribe(queue)
+
+
+async def serve(host: str, port: int) -> int:
+    server = ApiServer(ArticleService())
+    port = await server.start(host, port)
+    print(f"Article API on http://{host}:{port} "
+          f"({server.service.max_concurrent} concurrent, {server.service.max_pending} pending)")
+    try:
+        await server.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await server.close()
+    return 0
+
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Local HTTP API for article generation")
+    parser.add_argument("--host", default=os.getenv("API_HOST", DEFAULT_HOST))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", str(DEFAULT_PORT))))
+    args = parser.parse_args()
+
+    try:
+        return asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
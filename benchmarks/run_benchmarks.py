@@ -0,0 +1,278 @@
+"""End-to-end benchmarks for the article pipeline, with baseline comparison.
+
+Runs against local stand-ins only (fake_llm.FakeLLM for the model, a
+zero-latency stand-in for NotebookLM), so the numbers measure this code
+rather than remote services:
+
+    cli_startup_seconds            python main.py up to the topic prompt (import main)
+    create_agent_seconds           create_agent_with_tools()
+    run_search_overhead_seconds    run_search() with the notebook answer stubbed out
+                                   (routed over a scratch notebook library)
+    workflow_seconds               one run_workflow()
+    concurrent_p95_seconds         p95 latency of N concurrent run_workflow()
+    concurrent_throughput          workflows per second at concurrency N
+
+Each metric is the median of --repeat runs. Results go to JSON; --compare
+checks them against a stored baseline and exits non-zero on regressions.
+
+Usage:
+    python benchmarks/run_benchmarks.py --save-baseline
+    python benchmarks/run_benchmarks.py --compare --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_llm import FakeLLM
+from workflow_load import pointed_at, stub_search, run_level
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+DEFAULT_TOLERANCE = 0.25   # 25% slower than baseline is a regression
+DEFAULT_MIN_DELTA = 0.005  # ...but ignore differences under 5 ms (timer noise)
+
+# Metrics where a bigger number is better; all others are durations
+HIGHER_IS_BETTER = {"concurrent_throughput"}
+
+
+def _median_of(repeat: int, func: Callable[[], float]) -> float:
+    return statistics.median(func() for _ in range(repeat))
+
+
+async def _amedian_of(repeat: int, func) -> float:
+    values = [await func() for _ in range(repeat)]
+    return statistics.median(values)
+
+
+def bench_cli_startup(repeat: int) -> float:
+    """Seconds for a fresh interpreter to import main (what runs before the prompt)."""
+    def once() -> float:
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import main"], cwd=ROOT, check=True)
+        return time.perf_counter() - start
+    return _median_of(repeat, once)
+
+
+def bench_create_agent(repeat: int) -> float:
+    from agent import create_agent_with_tools
+
+    def once() -> float:
+        start = time.perf_counter()
+        create_agent_with_tools()
+        return time.perf_counter() - start
+    return _median_of(repeat, once)
+
+
+# Routed over by run_search in the overhead benchmark
+SAMPLE_NOTEBOOKS = [
+    ("Course", "AI 产品经理课程", ["AI产品", "产品经理"]),
+    ("Tech Talks", "技术分享合集", ["技术选型", "模型评测"]),
+    ("Camp QA", "训练营答疑记录", ["训练营答疑", "职业发展"]),
+]
+
+
+async def bench_run_search_overhead(repeat: int, data_dir: str) -> float:
+    """run_search minus the remote NotebookLM time (answer stubbed, worker mode).
+
+    Routes over a scratch notebook library in `data_dir`, never the real
+    notebooklm_skill/data/library.db.
+    """
+    import os
+    import notebooklm_tool
+    from notebook_manager import NotebookLibrary
+
+    async def instant_answer(query: str, notebook_url: str, timeout: float = 300) -> str:
+        return "stub answer"
+
+    library = NotebookLibrary(data_dir=Path(data_dir) / "notebooklm")
+    for name, description, topics in SAMPLE_NOTEBOOKS:
+        library.add_notebook(url=f"https://notebooklm.google.com/notebook/{name}", name=name,
+                             description=description, topics=topics)
+
+    original = notebooklm_tool._ask_notebook, notebooklm_tool._library
+    overrides = {"NOTEBOOKLM_WORKER": "true",  # skips the one-shot auth subprocess
+                 "NOTEBOOK_URL": None, "NOTEBOOK_ID": None}  # route instead of a pinned notebook
+    saved = {key: os.environ.get(key) for key in overrides}
+    notebooklm_tool._ask_notebook, notebooklm_tool._library = instant_answer, library
+    for key, value in overrides.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+    try:
+        async def once() -> float:
+            start = time.perf_counter()
+            await notebooklm_tool.run_search("技术选型 产品经理")
+            return time.perf_counter() - start
+        return await _amedian_of(repeat, once)
+    finally:
+        notebooklm_tool._ask_notebook, notebooklm_tool._library = original
+        library.store.close()
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+async def bench_workflow(repeat: int) -> float:
+    from main import run_workflow
+
+    async def once() -> float:
+        start = time.perf_counter()
+        await run_workflow("技术选型")
+        return time.perf_counter() - start
+    return await _amedian_of(repeat, once)
+
+
+async def run_all(
+    repeat: int = 3,
+    concurrency: int = 8,
+    first_token_seconds: float = 0.05,
+    tokens_per_second: float = 0.0,
+    skip: Optional[List[str]] = None,
+) -> Dict[str, float]:
+    """Run every benchmark and return {metric: value}."""
+    from agents import set_tracing_disabled
+    set_tracing_disabled(True)
+
+    skip = set(skip or [])
+    metrics: Dict[str, float] = {}
+
+    if "cli_startup" not in skip:
+        metrics["cli_startup_seconds"] = bench_cli_startup(repeat)
+
+    with FakeLLM(first_token_seconds=first_token_seconds, tokens_per_second=tokens_per_second) as server, \
+            tempfile.TemporaryDirectory() as output_dir, pointed_at(server, output_dir):
+        if "create_agent" not in skip:
+            metrics["create_agent_seconds"] = bench_create_agent(repeat)
+        if "run_search" not in skip:
+            metrics["run_search_overhead_seconds"] = await bench_run_search_overhead(repeat, output_dir)
+
+        with stub_search(0.0):
+            if "workflow" not in skip:
+                metrics["workflow_seconds"] = await bench_workflow(repeat)
+            if "concurrent" not in skip:
+                level = await run_level(concurrency, concurrency)
+                if level["errors"]:
+                    raise RuntimeError(f"Concurrent workflows failed: {level['error_samples']}")
+                metrics["concurrent_p95_seconds"] = level["latency_p95_seconds"]
+                metrics["concurrent_throughput"] = level["throughput_per_second"]
+
+    return metrics
+
+
+def compare(
+    metrics: Dict[str, float],
+    baseline: Dict[str, float],
+    tolerance: float = DEFAULT_TOLERANCE,
+    min_delta: float = DEFAULT_MIN_DELTA,
+) -> List[Dict[str, Any]]:
+    """Compare metrics with a baseline.
+
+    Returns:
+        One row per metric present in both, with `regressed` set when the
+        metric is worse than the baseline by more than `tolerance` (relative)
+        and `min_delta` (absolute, for durations).
+    """
+    rows = []
+    for name, value in metrics.items():
+        base = baseline.get(name)
+        if base is None or value is None:
+            continue
+        change = (value - base) / base if base else 0.0
+        if name in HIGHER_IS_BETTER:
+            regressed = value < base * (1 - tolerance)
+        else:
+            regressed = value > base * (1 + tolerance) and value - base > min_delta
+        rows.append({"metric": name, "baseline": base, "value": value,
+                     "change": change, "regressed": regressed})
+    return rows
+
+
+def _results(metrics: Dict[str, float], args: argparse.Namespace) -> Dict[str, Any]:
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                  capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        revision = None
+    return {
+        "created_at": datetime.now().isoformat(),
+        "revision": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {"repeat": args.repeat, "concurrency": args.concurrency,
+                     "first_token_seconds": args.first_token, "tokens_per_second": args.tps},
+        "metrics": metrics,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the article pipeline against local stand-ins")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per metric (median is kept)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Workflows for the concurrent benchmark")
+    parser.add_argument("--first-token", type=float, default=0.05, help="Mock LLM seconds to first token")
+    parser.add_argument("--tps", type=float, default=0.0, help="Mock LLM tokens per second (0 = instant)")
+    parser.add_argument("--skip", default="", help="Comma-separated: cli_startup,create_agent,run_search,workflow,concurrent")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline JSON path")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="Fail if results regress against the baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed relative slowdown")
+    args = parser.parse_args()
+
+    metrics = asyncio.run(run_all(
+        repeat=args.repeat, concurrency=args.concurrency,
+        first_token_seconds=args.first_token, tokens_per_second=args.tps,
+        skip=[s.strip() for s in args.skip.split(",") if s.strip()],
+    ))
+    results = _results(metrics, args)
+
+    for name, value in metrics.items():
+        print(f"  {name:<32} {value:>10.4f}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    if args.save_baseline:
+        Path(args.baseline).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline saved: {args.baseline}")
+
+    if not args.compare:
+        return 0
+
+    baseline_path = Path(args.baseline)
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --save-baseline first")
+        return 2
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))["metrics"]
+
+    rows = compare(metrics, baseline, tolerance=args.tolerance)
+    print(f"\n  {'metric':<32} {'baseline':>10} {'current':>10} {'change':>8}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regressed"] else ""
+        print(f"  {row['metric']:<32} {row['baseline']:>10.4f} {row['value']:>10.4f} "
+              f"{row['change']:>+7.0%}{flag}")
+
+    regressions = [row["metric"] for row in rows if row["regressed"]]
+    if regressions:
+        print(f"\n❌ Performance regressions: {', '.join(regressions)}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
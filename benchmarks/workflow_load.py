@@ -0,0 +1,169 @@
+"""run_workflow throughput and p95 latency against the mock LLM server.
+
+Starts fake_llm.FakeLLM, points MINIMAX_BASE_URL at it and runs batches of
+run_workflow at increasing concurrency. NotebookLM retrieval is replaced by
+a fixed-latency stand-in so the numbers isolate the agent/LLM path.
+
+Usage:
+    python benchmarks/workflow_load.py --concurrency 1,4,16 --per-level 32
+    python benchmarks/workflow_load.py --first-token 0.5 --tps 80 --error-rate 0.05 --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fake_llm import FakeLLM, writer_script
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile (None for no values)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), -(-len(ordered) * pct // 100)))
+    return ordered[int(rank) - 1]
+
+
+@contextmanager
+def stub_search(latency: float):
+    """Replace NotebookLM retrieval with a fixed-latency answer."""
+    import main
+    import tools
+
+    async def search(query: str) -> str:
+        await asyncio.sleep(latency)
+        return f"Search results for '{query}':\n（基准测试素材）我在小米做自动驾驶那会儿踩过一个大坑。"
+
+    originals = (main.run_search, tools.run_search)
+    main.run_search = tools.run_search = search
+    try:
+        yield
+    finally:
+        main.run_search, tools.run_search = originals
+
+
+@contextmanager
+def pointed_at(server: FakeLLM, output_dir: str):
+    """Environment for run_workflow against the mock server."""
+    overrides = {
+        "MINIMAX_BASE_URL": server.base_url,
+        "MINIMAX_API_KEY": "fake-key",
+        "MINIMAX_MODEL": "fake-model",
+        "OUTPUT_DIR": output_dir,
+    }
+    saved = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+async def run_level(concurrency: int, workflows: int, topic: str = "技术选型") -> Dict[str, Any]:
+    """Run `workflows` workflows with at most `concurrency` in flight."""
+    from main import run_workflow
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await run_workflow(f"{topic} {i}")
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(workflows)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "workflows": workflows,
+        "completed": len(latencies),
+        "errors": len(errors),
+        "elapsed_seconds": elapsed,
+        "throughput_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_p50_seconds": statistics.median(latencies) if latencies else None,
+        "latency_p95_seconds": percentile(latencies, 95),
+        "error_samples": errors[:3],
+    }
+
+
+async def run_load(
+    levels: List[int],
+    per_level: int,
+    search_latency: float = 0.05,
+    **llm_options: Any,
+) -> Dict[str, Any]:
+    """Measure every concurrency level against one mock server."""
+    from agents import set_tracing_disabled
+    set_tracing_disabled(True)  # no trace export to a real backend
+
+    results = []
+    with FakeLLM(**llm_options) as server, tempfile.TemporaryDirectory() as output_dir:
+        with pointed_at(server, output_dir), stub_search(search_latency):
+            for concurrency in levels:
+                results.append(await run_level(concurrency, max(per_level, concurrency)))
+        llm_stats = server.stats()
+
+    return {"levels": results, "llm": llm_stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="run_workflow load test against a mock LLM")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="Comma-separated concurrency levels")
+    parser.add_argument("--per-level", type=int, default=8, help="Workflows per level")
+    parser.add_argument("--first-token", type=float, default=0.2, help="Mock LLM seconds to first token")
+    parser.add_argument("--tps", type=float, default=500.0, help="Mock LLM output tokens per second")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock LLM error rate")
+    parser.add_argument("--error-status", type=int, default=503, help="Status for injected errors")
+    parser.add_argument("--rounds", type=int, default=2, help="Retrieval tool calls per workflow")
+    parser.add_argument("--search-latency", type=float, default=0.05, help="Seconds per stubbed search")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    report = asyncio.run(run_load(
+        levels, args.per_level, search_latency=args.search_latency,
+        first_token_seconds=args.first_token, tokens_per_second=args.tps,
+        error_rate=args.error_rate, error_status=args.error_status,
+        script=writer_script(args.rounds), seed=0,
+    ))
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return 0
+
+    def seconds(value: Optional[float]) -> str:
+        return "n/a" if value is None else f"{value:.2f}"
+
+    print(f"{'conc':>5} {'done':>5} {'err':>4} {'wf/s':>7} {'p50 (s)':>8} {'p95 (s)':>8}")
+    for level in report["levels"]:
+        print(f"{level['concurrency']:>5} {level['completed']:>5} {level['errors']:>4} "
+              f"{level['throughput_per_second']:>7.2f} "
+              f"{seconds(level['latency_p50_seconds']):>8} {seconds(level['latency_p95_seconds']):>8}")
+    print(f"LLM requests: {report['llm']['requests']} (max in flight {report['llm']['max_in_flight']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,377 @@
+"""Mock OpenAI-compatible chat-completions server with latency profiles.
+
+A local stand-in for MiniMax (or any OpenAI-compatible API) that the agent
+stack can be pointed at via MINIMAX_BASE_URL, for load and latency testing
+of llm/, agent.py and run_workflow without a real API key.
+
+Supports:
+- POST /v1/chat/completions, plain JSON or SSE streaming (stream=true),
+  including tool calls
+- GET /v1/models
+- Latency profile: time to first token plus a token rate for the rest
+- Error injection: queued statuses (fail_next) and a random error rate
+- Scripted turns: the n-th assistant turn of a conversation (counted from
+  the assistant messages in the request, so concurrent conversations do not
+  interfere) answers with the n-th script step, either tool calls or text
+
+Usage:
+    with FakeLLM(first_token_seconds=0.3, tokens_per_second=200) as server:
+        os.environ["MINIMAX_BASE_URL"] = server.base_url
+        ...
+    python fake_llm.py --port 8766 --first-token 0.5 --tps 100
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Optional, Union
+
+# A script step: {"content": "..."} or {"tool_calls": [{"name": ..., "arguments": {...}}]},
+# or a callable (messages) -> step
+Step = Union[Dict[str, Any], Callable[[List[Dict[str, Any]]], Dict[str, Any]]]
+
+DEFAULT_ARTICLE = (
+    "【标题】\n我在项目里踩过的坑\n\n"
+    "【正文】\n这事我想了很久。当时我们做一个新产品，最开始选了个复杂的方案，"
+    "结果上线两周就推倒重来。后来我摸出来一个办法：先用最小的方案跑通，"
+    "再看数据决定要不要加复杂度。还有一点要注意，别让技术选型变成团队的信仰之争。"
+)
+
+
+def _last_user_text(messages: List[Dict[str, Any]]) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            content = message.get("content")
+            if isinstance(content, list):  # content parts
+                return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+            return content or ""
+    return ""
+
+
+def writer_script(rounds: int = 2, tool_name: str = "search_materials") -> List[Step]:
+    """Default script: `rounds` retrieval tool calls, then the article."""
+    steps: List[Step] = []
+    for i in range(rounds):
+        def step(messages, i=i):
+            return {"tool_calls": [{
+                "name": tool_name,
+                "arguments": {"query": f"第{i + 1}轮检索: {_last_user_text(messages)[:200]}"},
+            }]}
+        steps.append(step)
+    steps.append({"content": DEFAULT_ARTICLE})
+    return steps
+
+
+def tokenize(text: str) -> List[str]:
+    """Rough tokens for pacing and usage: ~4 characters (or 1 CJK char) each."""
+    tokens: List[str] = []
+    buffer = ""
+    for char in text:
+        if ord(char) > 0x2E7F:  # CJK and beyond: one token per character
+            if buffer:
+                tokens.append(buffer)
+                buffer = ""
+            tokens.append(char)
+            continue
+        buffer += char
+        if len(buffer) >= 4:
+            tokens.append(buffer)
+            buffer = ""
+    if buffer:
+        tokens.append(buffer)
+    return tokens
+
+
+class FakeLLM:
+    """Scriptable OpenAI-compatible server (runs in a background thread)."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        first_token_seconds: float = 0.2,
+        tokens_per_second: float = 500.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        script: Optional[List[Step]] = None,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            host: Interface to bind.
+            port: Port to bind (0 = pick a free one).
+            first_token_seconds: Delay before the first token (or full response).
+            tokens_per_second: Output pacing after the first token (0 = instant).
+            error_rate: Probability that a request fails with error_status.
+            error_status: Status used for random errors (429 or 5xx).
+            script: Steps answered per assistant turn (default: writer_script()).
+            seed: Seed for the error-rate RNG.
+        """
+        self.host = host
+        self.port = port
+        self.first_token_seconds = first_token_seconds
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.script = script if script is not None else writer_script()
+
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._failures: Deque[int] = deque()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # Scripting ----------------------------------------------------------
+
+    def fail_next(self, status: int = 429, count: int = 1):
+        """Fail the next `count` completion requests with an HTTP status."""
+        with self._lock:
+            self._failures.extend([status] * count)
+
+    def _take_failure(self) -> Optional[int]:
+        with self._lock:
+            if self._failures:
+                return self._failures.popleft()
+            if self.error_rate and self._random.random() < self.error_rate:
+                return self.error_status
+        return None
+
+    def step_for(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Script step for the next assistant turn of a conversation."""
+        turn = sum(1 for m in messages if m.get("role") == "assistant")
+        if not self.script:
+            return {"content": DEFAULT_ARTICLE}
+        step = self.script[min(turn, len(self.script) - 1)]
+        return step(messages) if callable(step) else step
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+            }
+
+    # Lifecycle ----------------------------------------------------------
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def start(self) -> "FakeLLM":
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler_class())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeLLM":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    # Responses ----------------------------------------------------------
+
+    def _pace(self, tokens: int):
+        if self.tokens_per_second > 0 and tokens:
+            time.sleep(tokens / self.tokens_per_second)
+
+    @staticmethod
+    def _tool_calls(step: Dict[str, Any]) -> List[Dict[str, Any]]:
+        calls = []
+        for call in step.get("tool_calls") or []:
+            arguments = call.get("arguments", {})
+            calls.append({
+                "id": call.get("id") or f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": {
+                    "name": call["name"],
+                    "arguments": arguments if isinstance(arguments, str) else json.dumps(arguments, ensure_ascii=False),
+                },
+            })
+        return calls
+
+    @staticmethod
+    def _usage(messages: List[Dict[str, Any]], completion_tokens: int) -> Dict[str, int]:
+        prompt_tokens = len(tokenize(json.dumps(messages, ensure_ascii=False)))
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def _handler_class(self):
+        app = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: Dict[str, Any]):
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                if status == 429:
+                    self.send_header("Retry-After", "0")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _error(self, status: int, message: str):
+                self._send_json(status, {"error": {
+                    "message": message, "type": "fake_error", "code": status,
+                }})
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/models"):
+                    self._send_json(200, {"object": "list", "data": [
+                        {"id": "fake-model", "object": "model", "owned_by": "fake"}
+                    ]})
+                    return
+                self._error(404, "Not found")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length)
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._error(404, "Not found")
+                    return
+                try:
+                    request = json.loads(body or b"{}")
+                except json.JSONDecodeError:
+                    self._error(400, "Invalid JSON")
+                    return
+
+                with app._lock:
+                    app.requests += 1
+                    app.in_flight += 1
+                    app.max_in_flight = max(app.max_in_flight, app.in_flight)
+                try:
+                    self._complete(request)
+                finally:
+                    with app._lock:
+                        app.in_flight -= 1
+
+            def _complete(self, request: Dict[str, Any]):
+                status = app._take_failure()
+                if status is not None:
+                    with app._lock:
+                        app.errors += 1
+                    self._error(status, "Rate limited" if status == 429 else "Upstream error")
+                    return
+
+                messages = request.get("messages") or []
+                step = app.step_for(messages)
+                tool_calls = app._tool_calls(step)
+                content = step.get("content") if not tool_calls else None
+                finish_reason = "tool_calls" if tool_calls else "stop"
+                tokens = tokenize(content or "".join(c["function"]["arguments"] for c in tool_calls))
+
+                base = {
+                    "id": f"chatcmpl-{uuid.uuid4().hex[:16]}",
+                    "created": int(time.time()),
+                    "model": request.get("model", "fake-model"),
+                }
+                usage = app._usage(messages, len(tokens))
+
+                time.sleep(app.first_token_seconds)
+
+                if not request.get("stream"):
+                    app._pace(len(tokens))
+                    message: Dict[str, Any] = {"role": "assistant", "content": content}
+                    if tool_calls:
+                        message["tool_calls"] = tool_calls
+                    self._send_json(200, dict(base, object="chat.completion", choices=[{
+                        "index": 0, "message": message, "finish_reason": finish_reason,
+                    }], usage=usage))
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                def event(delta: Dict[str, Any], finish: Optional[str] = None):
+                    chunk = dict(base, object="chat.completion.chunk", choices=[{
+                        "index": 0, "delta": delta, "finish_reason": finish,
+                    }])
+                    self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                try:
+                    event({"role": "assistant", "content": ""})
+                    if tool_calls:
+                        for index, call in enumerate(tool_calls):
+                            event({"tool_calls": [{
+                                "index": index, "id": call["id"], "type": "function",
+                                "function": {"name": call["function"]["name"], "arguments": ""},
+                            }]})
+                            for token in tokenize(call["function"]["arguments"]):
+                                app._pace(1)
+                                event({"tool_calls": [{"index": index, "function": {"arguments": token}}]})
+                    else:
+                        for token in tokens:
+                            app._pace(1)
+                            event({"content": token})
+                    event({}, finish_reason)
+                    if (request.get("stream_options") or {}).get("include_usage"):
+                        chunk = dict(base, object="chat.completion.chunk", choices=[], usage=usage)
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--first-token", type=float, default=0.2, help="Seconds to first token")
+    parser.add_argument("--tps", type=float, default=500.0, help="Output tokens per second (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503, help="Status for random failures")
+    parser.add_argument("--rounds", type=int, default=2, help="Retrieval tool calls before the article")
+    args = parser.parse_args()
+
+    server = FakeLLM(
+        host=args.host, port=args.port, first_token_seconds=args.first_token,
+        tokens_per_second=args.tps, error_rate=args.error_rate,
+        error_status=args.error_status, script=writer_script(args.rounds),
+    ).start()
+    print(f"Fake LLM at {server.base_url}  (MINIMAX_BASE_URL={server.base_url}, Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
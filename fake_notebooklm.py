@@ -0,0 +1,338 @@
+"""Offline NotebookLM stand-in for deterministic load and latency testing.
+
+Serves a minimal notebook page with the same DOM contract the skill's
+browser automation relies on (QUERY_INPUT_SELECTORS, RESPONSE_SELECTORS and
+div.thinking-message), so ask_on_page, BrowserSession and the browser pool
+can run end-to-end against localhost with no Google account or network.
+
+Each question is POSTed by the page to /api/query; the server "thinks" for
+a scriptable time (the page shows div.thinking-message meanwhile), then
+streams the answer in chunks that the page appends to a bot message.
+Failures can be queued per request:
+
+    error    HTTP 500; the page shows an error banner and no answer
+    hang     never answers (client-side timeout path)
+    drop     closes the stream after the first chunk (partial answer)
+    signin   notebook page has no query input (signed-out page)
+
+Usage:
+    with FakeNotebookLM(thinking_seconds=0.5) as server:
+        page.goto(server.notebook_url("demo"))
+        ...
+    python fake_notebooklm.py --port 8765 --thinking 2
+"""
+
+import argparse
+import html
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Deque, Dict, List, Optional
+
+FAILURE_MODES = ("error", "hang", "drop", "signin")
+
+_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>{title} - NotebookLM</title></head>
+<body>
+<div class="chat-panel">
+  <div id="messages"></div>
+  <div class="thinking-message" id="thinking" style="display:none">Thinking...</div>
+  <div class="error-message" id="error" style="display:none"></div>
+  <textarea class="query-box-input" aria-label="Input for queries" rows="2"></textarea>
+</div>
+<script>
+const input = document.querySelector("textarea.query-box-input");
+const messages = document.getElementById("messages");
+const thinking = document.getElementById("thinking");
+const errorBox = document.getElementById("error");
+
+async function ask(question) {{
+  const user = document.createElement("div");
+  user.className = "from-user-container";
+  user.textContent = question;
+  messages.appendChild(user);
+  thinking.style.display = "block";
+  errorBox.style.display = "none";
+
+  let response;
+  try {{
+    response = await fetch("/api/query", {{
+      method: "POST",
+      headers: {{"Content-Type": "application/json"}},
+      body: JSON.stringify({{question: question, notebook: {notebook}}})
+    }});
+  }} catch (e) {{
+    thinking.style.display = "none";
+    errorBox.textContent = String(e);
+    errorBox.style.display = "block";
+    return;
+  }}
+  if (!response.ok) {{
+    thinking.style.display = "none";
+    errorBox.textContent = "Something went wrong (" + response.status + ")";
+    errorBox.style.display = "block";
+    return;
+  }}
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let bot = null;
+  while (true) {{
+    let chunk;
+    try {{
+      chunk = await reader.read();
+    }} catch (e) {{
+      break;
+    }}
+    if (chunk.done) break;
+    if (bot === null) {{
+      thinking.style.display = "none";
+      const container = document.createElement("div");
+      container.className = "to-user-container";
+      container.setAttribute("data-message-author", "bot");
+      bot = document.createElement("div");
+      bot.className = "message-text-content";
+      container.appendChild(bot);
+      messages.appendChild(container);
+    }}
+    bot.textContent += decoder.decode(chunk.value, {{stream: true}});
+  }}
+  thinking.style.display = "none";
+}}
+
+input.addEventListener("keydown", (event) => {{
+  if (event.key === "Enter" && !event.shiftKey) {{
+    event.preventDefault();
+    const question = input.value.trim();
+    input.value = "";
+    if (question) ask(question);
+  }}
+}});
+</script>
+</body>
+</html>
+"""
+
+_SIGNIN_PAGE = """<!DOCTYPE html>
+<html><head><title>Sign in</title></head>
+<body><h1>Sign in to continue to NotebookLM</h1></body></html>
+"""
+
+
+def _default_answer(question: str, notebook: str) -> str:
+    return (
+        f"Notebook {notebook} answer to: {question}\n"
+        "1. The sources discuss this topic in detail.\n"
+        "2. Here is a second point with supporting evidence.\n"
+        "3. And a closing observation."
+    )
+
+
+def split_chunks(text: str, count: int) -> List[str]:
+    """Split text into `count` roughly equal chunks (at least one)."""
+    if not text:
+        return [""]
+    count = max(1, min(count, len(text)))
+    size = -(-len(text) // count)  # ceiling division
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class FakeNotebookLM:
+    """Scriptable local NotebookLM web app (runs in a background thread)."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        thinking_seconds: float = 0.5,
+        chunks: int = 4,
+        chunk_interval: float = 0.1,
+        answer: Optional[Callable[[str, str], str]] = None,
+    ):
+        """
+        Args:
+            host: Interface to bind.
+            port: Port to bind (0 = pick a free one).
+            thinking_seconds: Delay before the first chunk of each answer.
+            chunks: Number of chunks each answer is streamed in.
+            chunk_interval: Delay between chunks.
+            answer: (question, notebook_id) -> answer text.
+        """
+        self.host = host
+        self.port = port
+        self.thinking_seconds = thinking_seconds
+        self.chunks = chunks
+        self.chunk_interval = chunk_interval
+        self.answer = answer or _default_answer
+
+        self.questions: List[Dict[str, str]] = []
+        self.page_loads = 0
+        self._failures: Deque[str] = deque()
+        self._lock = threading.Lock()
+        self._hang = threading.Event()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # Scripting ----------------------------------------------------------
+
+    def fail_next(self, mode: str, count: int = 1):
+        """Queue a failure for the next `count` requests it applies to."""
+        if mode not in FAILURE_MODES:
+            raise ValueError(f"Unknown failure mode: {mode} (expected one of {FAILURE_MODES})")
+        with self._lock:
+            self._failures.extend([mode] * count)
+
+    def _take_failure(self, applicable) -> Optional[str]:
+        with self._lock:
+            if self._failures and self._failures[0] in applicable:
+                return self._failures.popleft()
+        return None
+
+    # Lifecycle ----------------------------------------------------------
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def notebook_url(self, notebook_id: str = "fake-notebook") -> str:
+        return f"{self.base_url}/notebook/{notebook_id}"
+
+    def start(self) -> "FakeNotebookLM":
+        self._hang.clear()
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler_class())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._hang.set()  # release hanging requests
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeNotebookLM":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    # HTTP ---------------------------------------------------------------
+
+    def _handler_class(self):
+        app = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: str, content_type: str = "text/html; charset=utf-8"):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/api/stats":
+                    with app._lock:
+                        stats = {"page_loads": app.page_loads, "questions": len(app.questions)}
+                    self._send(200, json.dumps(stats), "application/json")
+                    return
+
+                if self.path == "/" or self.path.startswith("/notebook/"):
+                    with app._lock:
+                        app.page_loads += 1
+                    if app._take_failure(("signin",)):
+                        self._send(200, _SIGNIN_PAGE)
+                        return
+                    notebook = self.path.rsplit("/", 1)[-1] or "home"
+                    page = _PAGE.format(
+                        title=html.escape(notebook), notebook=json.dumps(notebook)
+                    )
+                    self._send(200, page)
+                    return
+
+                self._send(404, "Not found", "text/plain")
+
+            def do_POST(self):
+                if self.path != "/api/query":
+                    self._send(404, "Not found", "text/plain")
+                    return
+
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    self._send(400, "Invalid JSON", "text/plain")
+                    return
+
+                question = str(payload.get("question", ""))
+                notebook = str(payload.get("notebook", ""))
+                with app._lock:
+                    app.questions.append({"question": question, "notebook": notebook})
+
+                failure = app._take_failure(("error", "hang", "drop"))
+                if failure == "error":
+                    self._send(500, "Internal error", "text/plain")
+                    return
+                if failure == "hang":
+                    app._hang.wait()
+                    return
+
+                time.sleep(app.thinking_seconds)
+
+                # HTTP/1.0 response without Content-Length: the body ends when
+                # the connection closes, which lets chunks stream as written
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; charset=utf-8")
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+
+                chunks = split_chunks(app.answer(question, notebook), app.chunks)
+                if failure == "drop":
+                    chunks = chunks[:1]
+                for i, chunk in enumerate(chunks):
+                    if i:
+                        time.sleep(app.chunk_interval)
+                    try:
+                        self.wfile.write(chunk.encode("utf-8"))
+                        self.wfile.flush()
+                    except (BrokenPipeError, ConnectionResetError):
+                        return
+                self.close_connection = True
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline NotebookLM stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--thinking", type=float, default=0.5, help="Seconds before the first chunk")
+    parser.add_argument("--chunks", type=int, default=4, help="Chunks per answer")
+    parser.add_argument("--chunk-interval", type=float, default=0.1, help="Seconds between chunks")
+    args = parser.parse_args()
+
+    server = FakeNotebookLM(
+        host=args.host, port=args.port, thinking_seconds=args.thinking,
+        chunks=args.chunks, chunk_interval=args.chunk_interval,
+    ).start()
+    print(f"Fake NotebookLM at {server.notebook_url()}  (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,456 @@
+"""Persistent job queue and worker service for article generation.
+
+Topics are submitted to a SQLite queue (OUTPUT_DIR/jobs.db, or JOB_QUEUE_DB)
+and drained by worker processes that call run_workflow with bounded
+concurrency. A worker leases a job for JOB_LEASE_SECONDS and renews the
+lease with heartbeats while the article is generated; if the worker dies,
+the lease runs out and the next worker to poll takes the job over. Failed
+jobs are retried with exponential backoff (JOB_RETRY_DELAY) until
+JOB_MAX_ATTEMPTS attempts have been used. Workers run their jobs in the
+scheduler's batch lane, behind interactive runs.
+
+Leasing happens inside a `BEGIN IMMEDIATE` transaction, so any number of
+worker processes on one host can drain the same queue without handing a
+job out twice.
+
+CLI:
+    python job_queue.py submit "产品经理需要参与技术选型"
+    python job_queue.py status 12
+    python job_queue.py list [--status queued]
+    python job_queue.py work [--concurrency 2] [--drain]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from output_store import normalize_topic
+from scheduler import get_scheduler, reset_schedule_context, set_schedule_context
+
+QUEUE_FILE_NAME = "jobs.db"
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    topic TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    priority INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    not_before REAL NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    heartbeat_at REAL,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    trace_id TEXT,
+    output_path TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, priority, id);
+"""
+
+
+def queue_path() -> Path:
+    configured = os.getenv("JOB_QUEUE_DB")
+    if configured:
+        return Path(configured)
+    return Path(os.getenv("OUTPUT_DIR", "output")) / QUEUE_FILE_NAME
+
+
+def lease_seconds() -> float:
+    return float(os.getenv("JOB_LEASE_SECONDS", "120"))
+
+
+def max_attempts() -> int:
+    return int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+
+def retry_delay() -> float:
+    return float(os.getenv("JOB_RETRY_DELAY", "30"))
+
+
+def worker_concurrency() -> int:
+    return int(os.getenv("WORKER_CONCURRENCY", "2"))
+
+
+def _now_iso() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class JobQueue:
+    """SQLite queue of article topics.
+
+    Every method is safe to call from worker threads (asyncio.to_thread) of
+    one process; separate processes coordinate through SQLite's write lock.
+    """
+
+    def __init__(self, db_file: Optional[Path] = None):
+        """
+        Args:
+            db_file: Queue database (default: queue_path()).
+        """
+        self.db_file = Path(db_file or queue_path())
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(str(self.db_file), timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self) -> "JobQueue":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction holding the database write lock."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _query(self, sql: str, params=()) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    # Reads --------------------------------------------------------------
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return rows[0] if rows else None
+
+    def list(self, status: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        if status:
+            return self._query("SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?",
+                               (status, limit))
+        return self._query("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,))
+
+    def counts(self) -> Dict[str, int]:
+        counts = {status: 0 for status in JOB_STATUSES}
+        for row in self._query("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+            counts[row["status"]] = row["n"]
+        return counts
+
+    # Writes -------------------------------------------------------------
+
+    def submit(self, topic: str, priority: int = 0, attempts: Optional[int] = None) -> int:
+        """Queue a topic; returns the job id.
+
+        Args:
+            topic: The article topic.
+            priority: Higher runs first; equal priorities run in submit order.
+            attempts: Maximum attempts (default: JOB_MAX_ATTEMPTS).
+        """
+        topic = topic.strip()
+        if not topic:
+            raise ValueError("Topic must not be empty")
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (topic, priority, max_attempts, created_at) VALUES (?, ?, ?, ?)",
+                (topic, priority, attempts or max_attempts(), _now_iso()),
+            )
+            return cursor.lastrowid
+
+    def lease(self, owner: str, seconds: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Take the next runnable job for `owner`, or None if there is none.
+
+        Runnable are queued jobs past their retry delay and running jobs
+        whose lease expired (their worker crashed or hung). An expired job
+        with no attempts left is marked failed instead.
+        """
+        seconds = seconds or lease_seconds()
+        now = time.time()
+        with self.transaction() as conn:
+            while True:
+                row = conn.execute(
+                    "SELECT * FROM jobs "
+                    "WHERE (status = 'queued' AND not_before <= ?) "
+                    "   OR (status = 'running' AND lease_expires < ?) "
+                    "ORDER BY priority DESC, id LIMIT 1",
+                    (now, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                if row["status"] == "running" and row["attempts"] >= row["max_attempts"]:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'failed', lease_owner = NULL, lease_expires = NULL, "
+                        "finished_at = ?, error = ? WHERE id = ?",
+                        (_now_iso(), f"Lease expired on attempt {row['attempts']} ({row['lease_owner']})",
+                         row["id"]),
+                    )
+                    continue
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_owner = ?, "
+                    "lease_expires = ?, heartbeat_at = ?, started_at = ? WHERE id = ?",
+                    (owner, now + seconds, now, _now_iso(), row["id"]),
+                )
+                return dict(conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+
+    def heartbeat(self, job_id: int, owner: str, seconds: Optional[float] = None) -> bool:
+        """Extend `owner`'s lease; False if the job is no longer leased to it."""
+        seconds = seconds or lease_seconds()
+        now = time.time()
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, heartbeat_at = ? "
+                "WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (now + seconds, now, job_id, owner),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: int, owner: str, trace_id: Optional[str] = None,
+                 output_path: Optional[str] = None) -> bool:
+        """Mark a leased job done; False if the lease was lost meanwhile."""
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', lease_owner = NULL, lease_expires = NULL, "
+                "finished_at = ?, trace_id = ?, output_path = ?, error = NULL "
+                "WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (_now_iso(), trace_id, output_path, job_id, owner),
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: int, owner: str, error: str, delay: Optional[float] = None) -> Optional[str]:
+        """Record a failed attempt of a leased job.
+
+        The job is queued again after `delay` * 2^(attempts - 1) seconds
+        (default delay: JOB_RETRY_DELAY), or marked failed once it has no
+        attempts left.
+
+        Returns:
+            The job's new status, or None if the lease was lost meanwhile.
+        """
+        delay = retry_delay() if delay is None else delay
+        with self.transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (job_id, owner),
+            ).fetchone()
+            if row is None:
+                return None
+            if row["attempts"] >= row["max_attempts"]:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', lease_owner = NULL, lease_expires = NULL, "
+                    "finished_at = ?, error = ? WHERE id = ?",
+                    (_now_iso(), error, job_id),
+                )
+                return "failed"
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', lease_owner = NULL, lease_expires = NULL, "
+                "not_before = ?, error = ? WHERE id = ?",
+                (time.time() + delay * (2 ** (row["attempts"] - 1)), error, job_id),
+            )
+            return "queued"
+
+    def release(self, job_id: int, owner: str) -> bool:
+        """Return a leased job to the queue without using up an attempt (worker shutdown)."""
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = attempts - 1, lease_owner = NULL, "
+                "lease_expires = NULL WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (job_id, owner),
+            )
+            return cursor.rowcount == 1
+
+
+async def _default_run(topic: str) -> Dict[str, Any]:
+    from main import run_workflow
+    return await run_workflow(topic)
+
+
+class JobWorker:
+    """Drains a JobQueue with up to `concurrency` jobs in flight.
+
+    Usage:
+        worker = JobWorker(JobQueue(), concurrency=2)
+        await worker.run()      # until stop(); drain=True returns when the queue is empty
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        concurrency: Optional[int] = None,
+        run: Optional[Callable[[str], Awaitable[Dict[str, Any]]]] = None,
+        lease: Optional[float] = None,
+        poll_interval: float = 2.0,
+        owner: Optional[str] = None,
+    ):
+        """
+        Args:
+            queue: The queue to drain.
+            concurrency: Jobs run at once (default: WORKER_CONCURRENCY).
+            run: Generates one article from a topic and returns the
+                run_workflow result (default: main.run_workflow).
+            lease: Lease length in seconds (default: JOB_LEASE_SECONDS);
+                heartbeats renew it every third of that.
+            poll_interval: Seconds between polls of an empty queue.
+            owner: Lease owner name (default: host:pid:random).
+        """
+        self.queue = queue
+        self.concurrency = max(1, concurrency or worker_concurrency())
+        self.run_topic = run or _default_run
+        self.lease = lease or lease_seconds()
+        self.poll_interval = poll_interval
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.processed = 0
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        """Stop leasing new jobs; jobs in flight run to completion."""
+        self._stopping.set()
+
+    async def _heartbeat(self, job_id: int, job_task: asyncio.Task):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            if not await asyncio.to_thread(self.queue.heartbeat, job_id, self.owner, self.lease):
+                print(f"⚠️ 任务 #{job_id} 的租约已被收回, 停止执行")
+                job_task.cancel()
+                return
+
+    async def run_job(self, job: Dict[str, Any]):
+        """Run one leased job and record its outcome."""
+        job_id = job["id"]
+        print(f"▶️ 任务 #{job_id} (第{job['attempts']}次): {job['topic']}")
+        # Batch lane; topics share the scheduler's slots fairly
+        token = set_schedule_context("batch", normalize_topic(job["topic"]))
+        try:
+            job_task = asyncio.create_task(self.run_topic(job["topic"]))
+        finally:
+            reset_schedule_context(token)
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, job_task))
+        try:
+            result = await job_task
+        except asyncio.CancelledError:
+            if heartbeat.done():
+                return  # lease lost; whoever holds it now owns the job
+            await asyncio.to_thread(self.queue.release, job_id, self.owner)
+            raise
+        except Exception as e:
+            status = await asyncio.to_thread(self.queue.fail, job_id, self.owner, f"{type(e).__name__}: {e}")
+            print(f"❌ 任务 #{job_id} 失败 ({status}): {e}")
+            return
+        finally:
+            heartbeat.cancel()
+            job_task.cancel()
+
+        await asyncio.to_thread(self.queue.complete, job_id, self.owner,
+                                result.get("trace_id"), result.get("output_path"))
+        self.processed += 1
+        print(f"✅ 任务 #{job_id} 完成: {result.get('output_path')}")
+
+    async def _slot(self, drain: bool):
+        while not self._stopping.is_set():
+            job = await asyncio.to_thread(self.queue.lease, self.owner, self.lease)
+            if job is None:
+                if drain:
+                    return
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.run_job(job)
+
+    async def run(self, drain: bool = False) -> int:
+        """Process jobs until stop() (or, with drain, until nothing is runnable).
+
+        Returns:
+            Number of jobs completed.
+        """
+        await asyncio.gather(*(self._slot(drain) for _ in range(self.concurrency)))
+        return self.processed
+
+
+def _print_jobs(jobs: List[Dict[str, Any]]):
+    if not jobs:
+        print("No jobs")
+    for job in jobs:
+        print(f"#{job['id']:<4} {job['status']:<8} {job['attempts']}/{job['max_attempts']}  "
+              f"{job['created_at']}  {job['topic']}")
+        if job["output_path"] or job["error"]:
+            print(f"      {job['output_path'] or job['error']}")
+
+
+async def _work(queue: JobQueue, concurrency: Optional[int], drain: bool) -> int:
+    worker = JobWorker(queue, concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl+C cancels and in-flight jobs are released
+    print(f"Worker {worker.owner}: {worker.concurrency} slot(s) on {queue.db_file}")
+    processed = await worker.run(drain=drain)
+    print(f"Completed {processed} job(s)")
+    print(f"Queue waits: {json.dumps(get_scheduler().metrics())}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Queue and generate articles")
+    parser.add_argument("--db", default=None, help="Queue database (default: OUTPUT_DIR/jobs.db)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    submit_parser = subparsers.add_parser("submit", help="Queue a topic")
+    submit_parser.add_argument("topic")
+    submit_parser.add_argument("--priority", type=int, default=0)
+    status_parser = subparsers.add_parser("status", help="Show one job")
+    status_parser.add_argument("job_id", type=int)
+    list_parser = subparsers.add_parser("list", help="Most recent jobs")
+    list_parser.add_argument("--status", choices=JOB_STATUSES)
+    list_parser.add_argument("--limit", type=int, default=20)
+    work_parser = subparsers.add_parser("work", help="Run a worker that generates queued articles")
+    work_parser.add_argument("--concurrency", type=int, default=None)
+    work_parser.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+
+    args = parser.parse_args()
+
+    with JobQueue(Path(args.db) if args.db else None) as queue:
+        if args.command == "submit":
+            job_id = queue.submit(args.topic, priority=args.priority)
+            print(f"Queued job #{job_id}")
+        elif args.command == "status":
+            job = queue.get(args.job_id)
+            if job is None:
+                print(f"No job #{args.job_id}")
+                return 1
+            print(json.dumps(job, indent=2, ensure_ascii=False))
+        elif args.command == "list":
+            _print_jobs(queue.list(args.status, args.limit))
+            print(json.dumps(queue.counts()))
+        elif args.command == "work":
+            return asyncio.run(_work(queue, args.concurrency, args.drain))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -30,3 +30,11 @@ class LLMProvider(ABC):
     def display_name(self) -> str:
         """Return human-readable name for CLI display."""
         return f"{self.config.provider.upper()}-{self.config.model_id}"
+
+    async def warm_up(self) -> None:
+        """Build the model (and open a connection, if supported) before first use."""
+        self.create_model()
+
+    async def close(self) -> None:
+        """Release the model and any open connections."""
+        pass
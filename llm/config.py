@@ -1,6 +1,6 @@
 import os
 from typing import Dict, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
 
 @dataclass
@@ -65,6 +65,38 @@ class LLMConfig:
             model=model,
         )
 
+    # Pipeline stages that can run on their own provider/model
+    STAGES = ("planner", "writer", "compressor")
+
+    @classmethod
+    def load_stage(cls, stage: str) -> Optional[ProviderConfig]:
+        """Load the provider configuration for a pipeline stage.
+
+        LLM_{STAGE}_PROVIDER picks the provider (default: minimax) and
+        LLM_{STAGE}_MODEL overrides its model, so a stage can use a faster
+        model from the same account. Returns None when the provider is left
+        at its default and not configured.
+
+        Raises:
+            ValueError: If the stage is unknown, or LLM_{STAGE}_PROVIDER names
+                a provider without an API key.
+        """
+        if stage not in cls.STAGES:
+            raise ValueError(f"Unknown stage: {stage} (expected one of {cls.STAGES})")
+
+        prefix = f"LLM_{stage.upper()}"
+        provider_id = os.getenv(f"{prefix}_PROVIDER") or "minimax"
+        config = cls.load_provider(provider_id)
+        if config is None:
+            if os.getenv(f"{prefix}_PROVIDER"):
+                schema = cls.PROVIDERS.get(provider_id)
+                hint = f"set {schema['api_key_var']}" if schema else f"expected one of {tuple(cls.PROVIDERS)}"
+                raise ValueError(f"{prefix}_PROVIDER={provider_id} is not configured ({hint})")
+            return None
+
+        model = os.getenv(f"{prefix}_MODEL")
+        return replace(config, model=model) if model else config
+
     @classmethod
     def load_all_providers(cls) -> Dict[str, ProviderConfig]:
         """Load all configured providers."""
@@ -1,4 +1,4 @@
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, APIStatusError
 from agents.models.openai_chatcompletions import OpenAIChatCompletionsModel
 
 from llm.base import LLMProvider, ModelConfig
@@ -41,6 +41,24 @@ class MiniMaxProvider(LLMProvider):
             )
         return self._model
 
+    async def warm_up(self) -> None:
+        """Create the model and open a TLS connection to the API.
+
+        Any HTTP status counts as success: the point is the pooled
+        connection, not the response.
+        """
+        self.create_model()
+        try:
+            await self._client.with_options(max_retries=0, timeout=10).models.list()
+        except APIStatusError:
+            pass
+
+    async def close(self) -> None:
+        """Close the HTTP client; the next create_model() builds a new one."""
+        client, self._client, self._model = self._client, None, None
+        if client is not None:
+            await client.close()
+
     @property
     def config(self) -> ModelConfig:
         return self._config
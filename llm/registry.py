@@ -29,6 +29,14 @@ class ProviderRegistry:
         """Return list of available provider names."""
         return list(self._providers.keys())
 
+    @classmethod
+    def create(cls, config: ProviderConfig) -> LLMProvider:
+        """Build a provider instance from a configuration."""
+        provider_class = cls._provider_classes.get(config.provider_id)
+        if provider_class is None:
+            raise ValueError(f"No provider class registered for: {config.provider_id}")
+        return provider_class.from_config(config)
+
     @classmethod
     def from_env(cls) -> "ProviderRegistry":
         """Create registry from environment configuration."""
@@ -1,120 +1,492 @@
 """Main business flow for OpenAI Agent & MiniMax integration."""
 
+import asyncio
 import os
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any
+from typing import Callable, Dict, Any, Optional
 
 from dotenv import load_dotenv
 load_dotenv()
 
-from agent import create_agent_with_tools, run_agent
 from notebooklm_tool import run_search
 from logger import create_trace_id
+from prewarm import Prewarmer, prewarm_enabled
+from output_store import OutputStore, content_hash, dedup_mode
+from report_writer import compose_report, report_filename, write_atomic, write_atomic_async
+from retrieval_cache import (
+    RetrievalLog, find_prior_material, reuse_enabled,
+    set_retrieval_log, reset_retrieval_log,
+)
+from retrieval_compression import CompressionModel, set_compression_model, reset_compression_model
+from usage_ledger import UsageLedger, set_usage_ledger, reset_usage_ledger
+from stage_graph import Stage, StageGraph
+from speculation import (
+    SpeculativeSearch, render_round1_query, speculation_enabled,
+    set_speculation, reset_speculation,
+)
 
 
-async def run_workflow(topic: str) -> Dict[str, Any]:
-    """Run the complete workflow: search -> generate -> save.
+# The Agents SDK takes over a second to import, so agent is imported on
+# first use; the interactive CLI loads it in the background (see prewarm.py)
+def create_agent_with_tools(*args, **kwargs):
+    from agent import create_agent_with_tools as _create_agent_with_tools
+    return _create_agent_with_tools(*args, **kwargs)
+
+
+def create_planner_agent(*args, **kwargs):
+    from agent import create_planner_agent as _create_planner_agent
+    return _create_planner_agent(*args, **kwargs)
+
+
+def create_writer_agent(*args, **kwargs):
+    from agent import create_writer_agent as _create_writer_agent
+    return _create_writer_agent(*args, **kwargs)
+
+
+def create_stage_provider(*args, **kwargs):
+    from agent import create_stage_provider as _create_stage_provider
+    return _create_stage_provider(*args, **kwargs)
+
+
+async def run_agent(agent, prompt: str):
+    from agent import run_agent as _run_agent
+    return await _run_agent(agent, prompt)
+
+
+PROMPT_NAME = "writer_v1.txt"
+PLANNER_PROMPT_NAME = "planner_v1.txt"
+
+
+def cascade_enabled() -> bool:
+    """Whether retrieval runs on the planner model and writing on the writer model."""
+    return os.getenv("MODEL_CASCADE", "false").lower() in ("1", "true", "yes")
+
+
+def _model_name(provider, agent) -> Optional[str]:
+    """Provider/model label for the output index (None if unknown)."""
+    if provider is not None:
+        return provider.display_name
+    name = getattr(getattr(agent, "model", None), "model", None)
+    return name if isinstance(name, str) else None
+
+
+def _stage_ms(run_records, name: str) -> Optional[int]:
+    record = run_records.get(name)
+    return record.duration_ms if record is not None else None
+
+
+def _stage_listener(on_event) -> Optional[Callable]:
+    if on_event is None:
+        return None
+
+    def listener(record):
+        on_event({
+            "event": "stage",
+            "stage": record.name,
+            "status": record.status,
+            "attempt": record.attempts,
+            "duration_ms": record.duration_ms,
+            "error": record.error if record.status == "failed" else None,
+        })
+    return listener
+
+
+def _turn_listener(on_event) -> Optional[Callable]:
+    if on_event is None:
+        return None
+    totals = {"input_tokens": 0, "output_tokens": 0}
+
+    def listener(turn):
+        for name in totals:
+            totals[name] += turn[name]
+        on_event({
+            "event": "tokens",
+            "turn": turn["turn"],
+            "agent": turn["agent"],
+            "latency_ms": turn["latency_ms"],
+            "input_tokens": turn["input_tokens"],
+            "output_tokens": turn["output_tokens"],
+            "total_input_tokens": totals["input_tokens"],
+            "total_output_tokens": totals["output_tokens"],
+        })
+    return listener
+
+
+async def run_workflow(
+    topic: str,
+    provider=None,
+    on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Run the complete workflow: search (speculative) -> generate -> save.
+
+    The steps are stages of a StageGraph, so independent ones overlap: the
+    agent is built while earlier material is looked up and the round-1
+    search starts, and the report file is written while the index is
+    updated. Stage timings and the critical path are kept in the index.
 
     Args:
         topic: The topic to write about.
+        provider: Optional ready-built LLM provider (e.g. from Prewarmer).
+        on_event: Called with a progress event dict for every stage status
+            change ({"event": "stage", ...}) and model turn
+            ({"event": "tokens", ...}), e.g. to stream progress.
 
     Returns:
-        Dictionary containing topic, content, trace_id, and output_path.
+        Dictionary containing topic, content, trace_id, output_path and
+        usage (token and model-latency totals).
     """
     # Generate trace ID for this workflow
     trace_id = create_trace_id()
+    started = time.perf_counter()
+
+    # With the model cascade, a fast planner runs the retrieval rounds and
+    # hands a material brief to the writer; otherwise one agent does both
+    cascade = cascade_enabled()
+    retrieval_prompt = PLANNER_PROMPT_NAME if cascade else PROMPT_NAME
+    speculation: Dict[str, SpeculativeSearch] = {}
+    # Stage providers built for this run (not the caller's warm one)
+    owned_providers = []
+    retrieval_log = RetrievalLog()
+    ledger = UsageLedger(listener=_turn_listener(on_event))
+    # Built on the first llm-mode compression, if any
+    compression_model = CompressionModel(warm=provider)
 
-    # Step 1: Search for materials
-    search_results = await run_search(topic)
+    async def find_prior(inputs):
+        # Material from earlier articles on similar topics
+        return await asyncio.to_thread(find_prior_material, topic) if reuse_enabled() else None
 
-    # Step 2: Create agent with tools
-    agent = create_agent_with_tools(trace_id=trace_id)
+    async def start_search(inputs):
+        # Start the round-1 search the agent is about to ask for, so it runs
+        # while the agent is built and plans its first call (unless a
+        # near-identical topic already answered it)
+        prior = inputs["prior"]
+        if not speculation_enabled() or (prior and prior.covers_topic()):
+            return None
+        speculation["round1"] = SpeculativeSearch(
+            topic, render_round1_query(topic, retrieval_prompt), search=run_search
+        ).start()
+        return speculation["round1"]
 
-    # Step 3: Generate article
-    prompt = f"""Write an article about: {topic}
+    def stage_provider(stage: str):
+        stage_provider = create_stage_provider(stage, warm=provider)
+        if stage_provider is not provider:
+            owned_providers.append(stage_provider)
+        return stage_provider
 
-Search results to use as reference:
-{search_results}
+    async def build_agent(inputs):
+        if cascade:
+            planner = await asyncio.to_thread(stage_provider, "planner")
+            return await asyncio.to_thread(
+                create_planner_agent, trace_id=trace_id, provider=planner,
+                prompt_name=PLANNER_PROMPT_NAME,
+            )
+        return await asyncio.to_thread(
+            create_agent_with_tools, trace_id=trace_id, provider=provider, prompt_name=PROMPT_NAME
+        )
+
+    async def retrieve(inputs):
+        # The agent runs its own retrieval rounds (and, without the
+        # cascade, writes the article too). When a near-identical topic
+        # already answered round 1, it is not asked to search first.
+        prior = inputs["prior"]
+        first_round = "" if prior and prior.covers_topic() else (
+            "Start with the first-round retrieval from your workflow, using the search tool.\n\n"
+        )
+        if cascade:
+            prompt = f"""Plan an article about: {topic}
+
+{first_round}Finish with the material brief, not the article.
+"""
+        else:
+            prompt = f"""Write an article about: {topic}
+
+{first_round}Please write a comprehensive article based on the retrieved materials.
+"""
+        if prior:
+            max_chars = int(os.getenv("RETRIEVAL_REUSE_MAX_CHARS", "6000"))
+            prompt += f"""
+Materials already retrieved for similar earlier topics are below. Treat them
+as search results you already have: only search for angles they do not cover.
 
-Please write a comprehensive article based on this information.
+{prior.to_prompt(max_chars)}
 """
+        token = set_speculation(inputs["search"])
+        try:
+            result = await run_agent(inputs["agent"], prompt)
+        finally:
+            reset_speculation(token)
+        if not cascade:
+            ledger.finish(result)
+        return result
 
-    result = await run_agent(agent, prompt)
-    content = result.final_output
+    async def build_writer(inputs):
+        writer = await asyncio.to_thread(stage_provider, "writer")
+        return await asyncio.to_thread(create_writer_agent, trace_id=trace_id, provider=writer)
 
-    # Step 4: Save to file
-    output_path = save_report(topic, content, trace_id)
+    async def write_article(inputs):
+        # The strong writer turns the planner's brief into the article
+        plan_result = inputs["plan"]
+        result = await run_agent(inputs["writer"], f"""Write an article about: {topic}
+
+{plan_result.final_output}
+""")
+        ledger.finish(plan_result, result)
+        return result
+
+    async def prepare(inputs):
+        content = inputs["generate"].final_output
+        return await asyncio.to_thread(prepare_report, topic, content, trace_id)
+
+    async def write(inputs):
+        report = inputs["prepare"]
+        if report["existing"]:
+            return report["existing"]
+        return str(await write_atomic_async(report["path"], report["document"]))
+
+    async def index(inputs):
+        report = inputs["prepare"]
+        if report["existing"]:
+            return None
+        records = graph.records
+        timings = {
+            "agent_ms": _stage_ms(records, "agent"),
+            "plan_ms": _stage_ms(records, "plan"),
+            "generate_ms": _stage_ms(records, "generate"),
+            "total_ms": int((time.perf_counter() - started) * 1000),
+        }
+        agent = inputs["writer" if cascade else "agent"]
+        return await asyncio.to_thread(
+            index_report, report, topic, report["content"], trace_id,
+            provider=_model_name(provider, agent),
+            prompt_version=Path(PROMPT_NAME).stem,
+            timings={k: v for k, v in timings.items() if v is not None},
+            retrievals=retrieval_log.entries,
+            usage=ledger.turns,
+        )
+
+    generate_timeout = float(os.getenv("GENERATE_TIMEOUT", "1800"))
+    stages = [
+        Stage("prior", find_prior, timeout=30, resources=("disk",), optional=True),
+        Stage("search", start_search, after=("prior",), resources=("browser",), optional=True),
+        Stage("agent", build_agent, timeout=120, retries=1, resources=("llm",)),
+    ]
+    if cascade:
+        stages += [
+            Stage("plan", retrieve, after=("prior", "search", "agent"), timeout=generate_timeout,
+                  resources=("llm",)),
+            Stage("writer", build_writer, timeout=120, retries=1, resources=("llm",)),
+            Stage("generate", write_article, after=("plan", "writer"), timeout=generate_timeout,
+                  resources=("llm",)),
+        ]
+    else:
+        stages.append(Stage("generate", retrieve, after=("prior", "search", "agent"),
+                            timeout=generate_timeout, resources=("llm",)))
+    stages += [
+        Stage("prepare", prepare, after=("generate",), timeout=30, resources=("disk",)),
+        Stage("write", write, after=("prepare",), timeout=60, retries=2, resources=("disk",)),
+        Stage("index", index, after=("prepare", "writer" if cascade else "agent"), timeout=60,
+              retries=1, resources=("disk",), optional=True),
+    ]
+    graph = StageGraph(stages, listener=_stage_listener(on_event))
+
+    # Tool calls inside the stages see these through their copied context
+    log_token = set_retrieval_log(retrieval_log)
+    ledger_token = set_usage_ledger(ledger)
+    compression_token = set_compression_model(compression_model)
+    try:
+        run = await graph.run()
+    finally:
+        reset_compression_model(compression_token)
+        reset_usage_ledger(ledger_token)
+        reset_retrieval_log(log_token)
+        if "round1" in speculation:
+            await speculation["round1"].cancel()
+        for owned in owned_providers:
+            await owned.close()
+        await compression_model.close()
+
+    for record in run.records.values():
+        if record.status == "failed":  # optional stages; required ones raise
+            print(f"⚠️ 阶段 {record.name} 失败: {record.error}")
+    if run.results["index"] is not None:
+        await asyncio.to_thread(record_stage_timings, trace_id, run)
 
     return {
         "topic": topic,
-        "content": content,
+        "content": run.results["generate"].final_output,
         "trace_id": trace_id,
-        "output_path": output_path,
+        "output_path": run.results["write"],
+        "usage": ledger.totals(),
     }
 
 
-def save_report(topic: str, content: str, trace_id: str) -> str:
-    """Save the generated article to a file.
+def prepare_report(topic: str, content: str, trace_id: str) -> Dict[str, Any]:
+    """Plan a report save: target path, full document and duplicate check.
+
+    One timestamp is used for the filename, header and index entry. With
+    OUTPUT_DEDUP=refuse, `existing` is the path of an indexed article with
+    byte-identical content (None otherwise).
+    """
+    output_dir = Path(os.getenv("OUTPUT_DIR", "output"))
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    existing = None
+    if dedup_mode() == "refuse":
+        with OutputStore(output_dir) as store:
+            record = store.by_hash(content_hash(str(content)))
+        if record is not None:
+            existing = record["path"]
+            print(f"⚠️ 与已有文章完全相同, 未重复保存: {existing}")
+
+    generated = datetime.now()
+    return {
+        "output_dir": output_dir,
+        "path": output_dir / report_filename(topic, trace_id, generated),
+        "document": compose_report(topic, content, trace_id, generated).encode("utf-8"),
+        "content": str(content),
+        "generated": generated,
+        "existing": existing,
+    }
+
+
+def write_report(report: Dict[str, Any]) -> str:
+    """Write a prepared report; composed in memory, renamed into place."""
+    write_atomic(report["path"], report["document"])
+    return str(report["path"])
+
+
+def index_report(
+    report: Dict[str, Any],
+    topic: str,
+    content: str,
+    trace_id: str,
+    provider: Optional[str] = None,
+    prompt_version: Optional[str] = None,
+    timings: Optional[Dict[str, Any]] = None,
+    retrievals: Optional[list] = None,
+    usage: Optional[list] = None,
+) -> Optional[Dict[str, Any]]:
+    """Record a prepared report in the output index (None with OUTPUT_DEDUP=off)."""
+    if dedup_mode() == "off":
+        return None
+    with OutputStore(report["output_dir"]) as store:
+        record = store.record(
+            report["path"], topic, str(content), trace_id=trace_id, provider=provider,
+            prompt_version=prompt_version, timings=timings,
+            created_at=report["generated"].isoformat(), size_bytes=len(report["document"]),
+        )
+        if retrievals:
+            store.record_retrievals(trace_id, retrievals)
+        if usage:
+            store.record_usage(trace_id, usage)
+    if record["duplicate_of"]:
+        print(f"⚠️ 与已有文章 #{record['duplicate_of']} 内容完全相同")
+    return record
+
+
+def record_stage_timings(trace_id: str, run) -> None:
+    """Add a finished run's stage timings and critical path to its index entry."""
+    output_dir = Path(os.getenv("OUTPUT_DIR", "output"))
+    with OutputStore(output_dir) as store:
+        store.update_timings(trace_id, {"stages": run.timings(), "critical_path": run.critical_path})
+
+
+def save_report(
+    topic: str,
+    content: str,
+    trace_id: str,
+    provider: Optional[str] = None,
+    prompt_version: Optional[str] = None,
+    timings: Optional[Dict[str, Any]] = None,
+    retrievals: Optional[list] = None,
+    usage: Optional[list] = None,
+) -> str:
+    """Save the generated article to a file and record it in the output index.
+
+    With OUTPUT_DEDUP=refuse an article byte-identical to an indexed one is
+    not written again and the existing file's path is returned; the default
+    (flag) writes it and marks it as a duplicate.
 
     Args:
         topic: The article topic.
         content: The article content.
         trace_id: The trace ID for tracking.
+        provider: Provider/model that wrote the article.
+        prompt_version: Writer prompt version (e.g. "writer_v1").
+        timings: Stage durations in milliseconds.
+        retrievals: NotebookLM retrievals (query/result) behind the article.
+        usage: Model turns (tokens and latency) from the usage ledger.
 
     Returns:
         Path to the saved file.
     """
-    output_dir = Path(os.getenv("OUTPUT_DIR", "output"))
-    output_dir.mkdir(parents=True, exist_ok=True)
-
-    # Create filename with timestamp and trace_id
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    safe_topic = "".join(c if c.isalnum() else "_" for c in topic[:30])
-    filename = f"{timestamp}_{safe_topic}_{trace_id}.md"
-
-    filepath = output_dir / filename
+    report = prepare_report(topic, content, trace_id)
+    if report["existing"]:
+        return report["existing"]
 
-    # Write content
-    with open(filepath, "w", encoding="utf-8") as f:
-        f.write(f"# {topic}\n\n")
-        f.write(f"**Trace ID:** {trace_id}\n\n")
-        f.write(f"**Generated:** {datetime.now().isoformat()}\n\n")
-        f.write("---\n\n")
-        f.write(content)
+    path = write_report(report)
+    index_report(
+        report, topic, content, trace_id, provider=provider, prompt_version=prompt_version,
+        timings=timings, retrievals=retrievals, usage=usage,
+    )
+    return path
 
-    return str(filepath)
 
-
-async def main(topic: str):
+async def main(topic: Optional[str] = None) -> int:
     """Main entry point.
-    
+
     Args:
-        topic: The topic to write about.
+        topic: The topic to write about. Asked for interactively if omitted,
+            while the agent stack and NotebookLM page warm up in the background.
+
+    Returns:
+        Process exit code.
     """
+    prewarmer = None
+    provider = None
+
+    if topic is None:
+        if prewarm_enabled():
+            prewarmer = Prewarmer()
+            prewarmer.start()
+
+        # 交互式输入选题
+        topic = (await asyncio.to_thread(input, "请输入选题: ")).strip()
+        if not topic:
+            print("错误: 选题不能为空")
+            if prewarmer is not None:
+                await prewarmer.drop()
+            return 1
+
+        if prewarmer is not None:
+            provider = await prewarmer.claim(topic)
+
     print(f"选题: {topic}")
     print("正在生成文章...(预计2-3分钟)")
     print()
-    
-    result = await run_workflow(topic)
-    
+
+    try:
+        result = await run_workflow(topic, provider=provider)
+    finally:
+        if prewarmer is not None:
+            await prewarmer.wait()
+
     print()
     print(f"✅ 文章已保存: {result['output_path']}")
     print(f"Trace ID: {result['trace_id']}")
+    usage = result["usage"]
+    if usage["turns"]:
+        print(f"Tokens: {usage['input_tokens']} in / {usage['output_tokens']} out "
+              f"({usage['turns']} turns, {usage['llm_ms'] / 1000:.1f}s in the model)")
+    return 0
 
 
 if __name__ == "__main__":
     import sys
-    import asyncio
-    
-    if len(sys.argv) > 1:
-        # 从命令行参数获取选题
-        topic = " ".join(sys.argv[1:])
-    else:
-        # 交互式输入选题
-        topic = input("请输入选题: ").strip()
-        if not topic:
-            print("错误: 选题不能为空")
-            sys.exit(1)
-    
-    asyncio.run(main(topic))
+
+    # 从命令行参数获取选题; 否则交互式输入
+    topic = " ".join(sys.argv[1:]) if len(sys.argv) > 1 else None
+
+    sys.exit(asyncio.run(main(topic)))
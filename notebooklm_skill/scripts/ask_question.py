@@ -10,19 +10,24 @@ See: https://github.com/microsoft/playwright/issues/36139
 """
 
 import argparse
+import contextlib
+import json
 import sys
 import time
 import re
 from pathlib import Path
+from typing import Any, Dict, Optional
 
-from patchright.sync_api import sync_playwright
+from patchright.sync_api import sync_playwright, Page
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from auth_manager import AuthManager
 from notebook_manager import NotebookLibrary
-from config import QUERY_INPUT_SELECTORS, RESPONSE_SELECTORS
+from config import (
+    QUERY_INPUT_SELECTORS, RESPONSE_SELECTORS, QUERY_TIMEOUT_SECONDS, NOTEBOOKLM_BASE_URL, CONTEXT_MODE
+)
 from browser_utils import BrowserFactory, StealthUtils
 
 
@@ -37,39 +42,163 @@ FOLLOW_UP_REMINDER = (
 )
 
 
-def ask_notebooklm(question: str, notebook_url: str, headless: bool = True) -> str:
+NOTEBOOKLM_URL_PATTERN = re.compile("^" + re.escape(NOTEBOOKLM_BASE_URL) + "/")
+
+
+def find_query_input(page: Page, timeout: int = 10000):
+    """Wait for the NotebookLM query input (MCP approach); None if not found"""
+    for selector in QUERY_INPUT_SELECTORS:
+        try:
+            query_element = page.wait_for_selector(
+                selector,
+                timeout=timeout,
+                state="visible"  # Only check visibility, not disabled!
+            )
+            if query_element:
+                print(f"  ✓ Found input: {selector}")
+                return selector
+        except:
+            continue
+    return None
+
+
+def latest_response_text(page: Page) -> Optional[str]:
+    """Text of the newest response on the page, if any"""
+    for selector in RESPONSE_SELECTORS:
+        try:
+            elements = page.query_selector_all(selector)
+            if elements:
+                return elements[-1].inner_text().strip()
+        except:
+            continue
+    return None
+
+
+def ask_on_page(page: Page, question: str, timeout: int = QUERY_TIMEOUT_SECONDS) -> Optional[str]:
     """
-    Ask a question to NotebookLM
+    Type a question into an open notebook page and wait for the answer
+
+    Works on fresh and reused pages: a response that was already on the page
+    before the question is never mistaken for the new answer.
+
+    Args:
+        page: Page showing a NotebookLM notebook
+        question: Question to ask
+        timeout: Seconds to wait for a stable answer
+
+    Returns:
+        Answer text, or None if the input or answer never appeared
+    """
+    # Wait for query input (MCP approach)
+    print("  ⏳ Waiting for query input...")
+    input_selector = find_query_input(page)
+
+    if not input_selector:
+        print("  ❌ Could not find query input")
+        return None
+
+    previous_answer = latest_response_text(page)
+
+    # Type question (human-like, fast)
+    print("  ⏳ Typing question...")
+    StealthUtils.human_type(page, input_selector, question)
+
+    # Submit
+    print("  📤 Submitting...")
+    page.keyboard.press("Enter")
+
+    # Small pause
+    StealthUtils.random_delay(500, 1500)
+
+    # Wait for response (MCP approach: poll for stable text)
+    print("  ⏳ Waiting for answer...")
+
+    stable_count = 0
+    last_text = None
+    deadline = time.time() + timeout
+
+    while time.time() < deadline:
+        # Check if NotebookLM is still thinking (most reliable indicator)
+        try:
+            thinking_element = page.query_selector('div.thinking-message')
+            if thinking_element and thinking_element.is_visible():
+                time.sleep(1)
+                continue
+        except:
+            pass
+
+        text = latest_response_text(page)
+        if text and text != previous_answer:
+            if text == last_text:
+                stable_count += 1
+                if stable_count >= 3:  # Stable for 3 polls
+                    return text
+            else:
+                stable_count = 0
+                last_text = text
+
+        time.sleep(1)
+
+    print("  ❌ Timeout waiting for answer")
+    return None
+
+
+def ask_notebooklm_detailed(question: str, notebook_url: str, headless: bool = True,
+                            lean: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Ask a question to NotebookLM and report how it went
 
     Args:
         question: Question to ask
         notebook_url: NotebookLM notebook URL
         headless: Run browser in headless mode
+        lean: Block non-essential resources (default: NOTEBOOKLM_LEAN)
 
     Returns:
-        Answer text from NotebookLM
+        Dict with 'answer' (None on failure, no follow-up reminder),
+        'timings' (milliseconds per stage) and 'error' ({type, message} or None)
     """
+    result: Dict[str, Any] = {'answer': None, 'timings': {}, 'error': None}
+    timings = result['timings']
+    started = time.time()
+
+    def lap(stage: str, since: float) -> float:
+        now = time.time()
+        timings[stage] = int((now - since) * 1000)
+        return now
+
     auth = AuthManager()
 
     if not auth.is_authenticated():
         print("⚠️ Not authenticated. Run: python auth_manager.py setup")
-        return None
+        result['error'] = {'type': 'PermissionError',
+                           'message': 'NotebookLM not authenticated. Run: auth_manager.py setup'}
+        return result
 
     print(f"💬 Asking: {question}")
     print(f"📚 Notebook: {notebook_url}")
 
     playwright = None
+    browser = None
     context = None
 
     try:
         # Start playwright
         playwright = sync_playwright().start()
 
-        # Launch persistent browser context using factory
-        context = BrowserFactory.launch_persistent_context(
-            playwright,
-            headless=headless
-        )
+        if CONTEXT_MODE == 'isolated':
+            # Own Chrome with a context seeded from state.json: no profile
+            # lock, so concurrent one-shot questions don't collide
+            browser = BrowserFactory.launch_browser(playwright, headless=headless, lean=lean)
+            context = BrowserFactory.new_isolated_context(browser, lean=lean)
+        else:
+            # Launch persistent browser context using factory
+            context = BrowserFactory.launch_persistent_context(
+                playwright,
+                headless=headless,
+                lean=lean
+            )
+        stage = lap('browser_ms', started)
 
         # Navigate to notebook
         page = context.new_page()
@@ -77,102 +206,31 @@ def ask_notebooklm(question: str, notebook_url: str, headless: bool = True) -> s
         page.goto(notebook_url, wait_until="domcontentloaded")
 
         # Wait for NotebookLM (increased timeout for slower networks)
-        page.wait_for_url(re.compile(r"^https://notebooklm\.google\.com/"), timeout=120000)
-
-        # Wait for query input (MCP approach)
-        print("  ⏳ Waiting for query input...")
-        query_element = None
+        page.wait_for_url(NOTEBOOKLM_URL_PATTERN, timeout=120000)
+        stage = lap('navigate_ms', stage)
 
-        for selector in QUERY_INPUT_SELECTORS:
-            try:
-                query_element = page.wait_for_selector(
-                    selector,
-                    timeout=10000,
-                    state="visible"  # Only check visibility, not disabled!
-                )
-                if query_element:
-                    print(f"  ✓ Found input: {selector}")
-                    break
-            except:
-                continue
-
-        if not query_element:
-            print("  ❌ Could not find query input")
-            return None
-
-        # Type question (human-like, fast)
-        print("  ⏳ Typing question...")
-        
-        # Use primary selector for typing
-        input_selector = QUERY_INPUT_SELECTORS[0]
-        StealthUtils.human_type(page, input_selector, question)
-
-        # Submit
-        print("  📤 Submitting...")
-        page.keyboard.press("Enter")
-
-        # Small pause
-        StealthUtils.random_delay(500, 1500)
-
-        # Wait for response (MCP approach: poll for stable text)
-        print("  ⏳ Waiting for answer...")
-
-        answer = None
-        stable_count = 0
-        last_text = None
-        deadline = time.time() + 120  # 2 minutes timeout
-
-        while time.time() < deadline:
-            # Check if NotebookLM is still thinking (most reliable indicator)
-            try:
-                thinking_element = page.query_selector('div.thinking-message')
-                if thinking_element and thinking_element.is_visible():
-                    time.sleep(1)
-                    continue
-            except:
-                pass
-
-            # Try to find response with MCP selectors
-            for selector in RESPONSE_SELECTORS:
-                try:
-                    elements = page.query_selector_all(selector)
-                    if elements:
-                        # Get last (newest) response
-                        latest = elements[-1]
-                        text = latest.inner_text().strip()
-
-                        if text:
-                            if text == last_text:
-                                stable_count += 1
-                                if stable_count >= 3:  # Stable for 3 polls
-                                    answer = text
-                                    break
-                            else:
-                                stable_count = 0
-                                last_text = text
-                except:
-                    continue
-
-            if answer:
-                break
-
-            time.sleep(1)
+        answer = ask_on_page(page, question)
+        lap('answer_ms', stage)
 
         if not answer:
-            print("  ❌ Timeout waiting for answer")
-            return None
+            result['error'] = {'type': 'NoAnswer',
+                               'message': 'No answer from NotebookLM (query input or answer never appeared)'}
+            return result
 
         print("  ✅ Got answer!")
-        # Add follow-up reminder to encourage Claude to ask more questions
-        return answer + FOLLOW_UP_REMINDER
+        result['answer'] = answer
+        return result
 
     except Exception as e:
         print(f"  ❌ Error: {e}")
         import traceback
         traceback.print_exc()
-        return None
+        result['error'] = {'type': type(e).__name__, 'message': str(e)}
+        return result
 
     finally:
+        timings['total_ms'] = int((time.time() - started) * 1000)
+
         # Always clean up
         if context:
             try:
@@ -180,6 +238,12 @@ def ask_notebooklm(question: str, notebook_url: str, headless: bool = True) -> s
             except:
                 pass
 
+        if browser:
+            try:
+                browser.close()
+            except:
+                pass
+
         if playwright:
             try:
                 playwright.stop()
@@ -187,6 +251,90 @@ def ask_notebooklm(question: str, notebook_url: str, headless: bool = True) -> s
                 pass
 
 
+def ask_notebooklm(question: str, notebook_url: str, headless: bool = True, lean: Optional[bool] = None) -> str:
+    """
+    Ask a question to NotebookLM
+
+    Args:
+        question: Question to ask
+        notebook_url: NotebookLM notebook URL
+        headless: Run browser in headless mode
+        lean: Block non-essential resources (default: NOTEBOOKLM_LEAN)
+
+    Returns:
+        Answer text from NotebookLM
+    """
+    answer = ask_notebooklm_detailed(question, notebook_url, headless=headless, lean=lean)['answer']
+    if not answer:
+        return None
+
+    # Add follow-up reminder to encourage Claude to ask more questions
+    return answer + FOLLOW_UP_REMINDER
+
+
+def resolve_notebook_url(notebook_url: Optional[str], notebook_id: Optional[str]) -> Optional[str]:
+    """
+    Pick the notebook to ask: explicit URL, library ID, then the active notebook
+
+    Prints what is available when nothing matches.
+
+    Returns:
+        Notebook URL, or None if none could be resolved
+    """
+    if notebook_url:
+        return notebook_url
+
+    library = NotebookLibrary()
+
+    if notebook_id:
+        notebook = library.get_notebook(notebook_id)
+        if notebook:
+            return notebook['url']
+        print(f"❌ Notebook '{notebook_id}' not found")
+        return None
+
+    # Check for active notebook first
+    active = library.get_active_notebook()
+    if active:
+        print(f"📚 Using active notebook: {active['name']}")
+        return active['url']
+
+    # Show available notebooks
+    notebooks = library.list_notebooks()
+    if notebooks:
+        print("\n📚 Available notebooks:")
+        for nb in notebooks:
+            mark = " [ACTIVE]" if nb.get('id') == library.active_notebook_id else ""
+            print(f"  {nb['id']}: {nb['name']}{mark}")
+        print("\nSpecify with --notebook-id or set active:")
+        print("python scripts/run.py notebook_manager.py activate --id ID")
+    else:
+        print("❌ No notebooks in library. Add one first:")
+        print("python scripts/run.py notebook_manager.py add --url URL --name NAME --description DESC --topics TOPICS")
+    return None
+
+
+def answer_as_json(args) -> Dict[str, Any]:
+    """Resolve the notebook and ask, as the --json result object"""
+    notebook_url = resolve_notebook_url(args.notebook_url, args.notebook_id)
+    if not notebook_url:
+        return {
+            'question': args.question,
+            'notebook_url': None,
+            'answer': None,
+            'timings': {},
+            'error': {'type': 'NotebookNotFound', 'message': 'No notebook URL given and none in the library'}
+        }
+
+    result = ask_notebooklm_detailed(
+        question=args.question,
+        notebook_url=notebook_url,
+        headless=not args.show_browser,
+        lean=args.lean
+    )
+    return {'question': args.question, 'notebook_url': notebook_url, **result}
+
+
 def main():
     parser = argparse.ArgumentParser(description='Ask NotebookLM a question')
 
@@ -194,48 +342,31 @@ def main():
     parser.add_argument('--notebook-url', help='NotebookLM notebook URL')
     parser.add_argument('--notebook-id', help='Notebook ID from library')
     parser.add_argument('--show-browser', action='store_true', help='Show browser')
+    parser.add_argument('--lean', action='store_true', default=None,
+                        help='Block images, fonts, media and third-party requests')
+    parser.add_argument('--json', action='store_true',
+                        help='Print one JSON object (answer, timings, error) to stdout; progress to stderr')
 
     args = parser.parse_args()
 
-    # Resolve notebook URL
-    notebook_url = args.notebook_url
-
-    if not notebook_url and args.notebook_id:
-        library = NotebookLibrary()
-        notebook = library.get_notebook(args.notebook_id)
-        if notebook:
-            notebook_url = notebook['url']
-        else:
-            print(f"❌ Notebook '{args.notebook_id}' not found")
-            return 1
+    if args.json:
+        # Progress goes to stderr; stdout carries only the result object
+        stdout = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            result = answer_as_json(args)
+        stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+        return 0 if result['answer'] else 1
 
+    notebook_url = resolve_notebook_url(args.notebook_url, args.notebook_id)
     if not notebook_url:
-        # Check for active notebook first
-        library = NotebookLibrary()
-        active = library.get_active_notebook()
-        if active:
-            notebook_url = active['url']
-            print(f"📚 Using active notebook: {active['name']}")
-        else:
-            # Show available notebooks
-            notebooks = library.list_notebooks()
-            if notebooks:
-                print("\n📚 Available notebooks:")
-                for nb in notebooks:
-                    mark = " [ACTIVE]" if nb.get('id') == library.active_notebook_id else ""
-                    print(f"  {nb['id']}: {nb['name']}{mark}")
-                print("\nSpecify with --notebook-id or set active:")
-                print("python scripts/run.py notebook_manager.py activate --id ID")
-            else:
-                print("❌ No notebooks in library. Add one first:")
-                print("python scripts/run.py notebook_manager.py add --url URL --name NAME --description DESC --topics TOPICS")
-            return 1
+        return 1
 
     # Ask the question
     answer = ask_notebooklm(
         question=args.question,
         notebook_url=notebook_url,
-        headless=not args.show_browser
+        headless=not args.show_browser,
+        lean=args.lean
     )
 
     if answer:
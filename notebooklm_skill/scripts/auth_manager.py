@@ -24,8 +24,9 @@ from patchright.sync_api import sync_playwright, BrowserContext
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from config import BROWSER_STATE_DIR, STATE_FILE, AUTH_INFO_FILE, DATA_DIR
+from config import BROWSER_STATE_DIR, STATE_FILE, AUTH_INFO_FILE, DATA_DIR, AUTH_EXPIRY_MARGIN_SECONDS
 from browser_utils import BrowserFactory
+from state_cache import get_state_cache
 
 
 class AuthManager:
@@ -49,25 +50,70 @@ class AuthManager:
         self.auth_info_file = AUTH_INFO_FILE
         self.browser_state_dir = BROWSER_STATE_DIR
 
+    @property
+    def state_cache(self):
+        return get_state_cache(self.state_file)
+
     def is_authenticated(self) -> bool:
         """Check if valid authentication exists"""
-        if not self.state_file.exists():
+        cache = self.state_cache
+        try:
+            age_seconds = cache.age_seconds()
+            expires_in = cache.expires_in()
+        except (ValueError, OSError) as e:
+            # Corrupt or half-written state.json
+            print(f"⚠️ Could not read browser state: {e}. Run: auth_manager.py reauth")
+            return False
+        if age_seconds is None:
             return False
 
         # Check if state file is not too old (7 days)
-        age_days = (time.time() - self.state_file.stat().st_mtime) / 86400
+        age_days = age_seconds / 86400
         if age_days > 7:
             print(f"⚠️ Browser state is {age_days:.1f} days old, may need re-authentication")
 
+        # Auth cookies that have already expired will fail every query
+        if expires_in is not None and expires_in <= 0:
+            print("⚠️ Google auth cookies have expired. Run: auth_manager.py reauth")
+            return False
+
         return True
 
+    def needs_reauth(self, margin_seconds: float = AUTH_EXPIRY_MARGIN_SECONDS) -> bool:
+        """
+        Check whether authentication is missing or about to expire
+
+        Lets callers re-authenticate before a query fails instead of after.
+        """
+        cache = self.state_cache
+        try:
+            return not cache.exists() or cache.is_expiring(margin_seconds)
+        except (ValueError, OSError):
+            return True
+
     def get_auth_info(self) -> Dict[str, Any]:
-        """Get authentication information"""
+        """
+        Get authentication information
+
+        A corrupt or half-written state.json is reported as unauthenticated,
+        with the parse error under 'state_error'.
+        """
+        cache = self.state_cache
+        try:
+            age_seconds = cache.age_seconds()
+            expires_in = cache.expires_in()
+            state_error = None
+        except (ValueError, OSError) as e:
+            age_seconds = expires_in = None
+            state_error = str(e)
         info = {
-            'authenticated': self.is_authenticated(),
+            'authenticated': state_error is None and self.is_authenticated(),
             'state_file': str(self.state_file),
-            'state_exists': self.state_file.exists()
+            'state_exists': age_seconds is not None
         }
+        if state_error is not None:
+            info['state_error'] = state_error
+            info['needs_reauth'] = True
 
         if self.auth_info_file.exists():
             try:
@@ -78,8 +124,10 @@ class AuthManager:
                 pass
 
         if info['state_exists']:
-            age_hours = (time.time() - self.state_file.stat().st_mtime) / 3600
-            info['state_age_hours'] = age_hours
+            info['state_age_hours'] = age_seconds / 3600
+            if expires_in is not None:
+                info['cookies_expire_in_hours'] = expires_in / 3600
+            info['needs_reauth'] = self.needs_reauth()
 
         return info
 
@@ -328,6 +376,12 @@ def main():
         print(f"  Authenticated: {'Yes' if info['authenticated'] else 'No'}")
         if info.get('state_age_hours'):
             print(f"  State age: {info['state_age_hours']:.1f} hours")
+        if info.get('cookies_expire_in_hours') is not None:
+            print(f"  Cookies expire in: {info['cookies_expire_in_hours']:.1f} hours")
+        if info.get('state_error'):
+            print(f"  ⚠️ State file is corrupt ({info['state_error']}) - run: auth_manager.py reauth")
+        elif info.get('needs_reauth'):
+            print("  ⚠️ Auth expires soon - run: auth_manager.py reauth")
         if info.get('authenticated_at_iso'):
             print(f"  Last auth: {info['authenticated_at_iso']}")
         print(f"  State file: {info['state_file']}")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Browser Profile Benchmark for NotebookLM
+Compares page-ready time and peak browser RSS between the standard and lean
+launch modes
+
+Page-ready = from context launch until the query input is visible.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from patchright.sync_api import sync_playwright
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import QUERY_INPUT_SELECTORS, PAGE_LOAD_TIMEOUT
+from browser_utils import BrowserFactory
+from notebook_manager import NotebookLibrary
+from resource_monitor import PeakRSSSampler, format_bytes
+
+
+def measure_launch(notebook_url: str, lean: bool, headless: bool = True) -> Dict[str, Any]:
+    """
+    Launch a context, open the notebook and wait for the query input
+
+    Returns:
+        Dict with mode, ready_seconds (None on failure) and peak_rss_bytes
+    """
+    playwright = sync_playwright().start()
+    context = None
+    ready_seconds: Optional[float] = None
+    error = None
+    sampler = PeakRSSSampler()
+
+    try:
+        with sampler:
+            start = time.perf_counter()
+            context = BrowserFactory.launch_persistent_context(playwright, headless=headless, lean=lean)
+            page = context.new_page()
+            page.goto(notebook_url, wait_until="domcontentloaded", timeout=PAGE_LOAD_TIMEOUT)
+            page.wait_for_selector(
+                ", ".join(QUERY_INPUT_SELECTORS), state="visible", timeout=PAGE_LOAD_TIMEOUT
+            )
+            ready_seconds = time.perf_counter() - start
+            # Let late requests settle so the peak reflects a usable page
+            time.sleep(2)
+    except Exception as e:
+        error = str(e)
+    finally:
+        if context:
+            try:
+                context.close()
+            except Exception:
+                pass
+        playwright.stop()
+
+    return {
+        'mode': 'lean' if lean else 'standard',
+        'ready_seconds': ready_seconds,
+        'peak_rss_bytes': sampler.peak_bytes,
+        'error': error
+    }
+
+
+def summarize(runs):
+    ready = [r['ready_seconds'] for r in runs if r['ready_seconds'] is not None]
+    rss = [r['peak_rss_bytes'] for r in runs if r['peak_rss_bytes'] is not None]
+    return {
+        'runs': len(runs),
+        'failures': sum(1 for r in runs if r['error']),
+        'ready_seconds_median': statistics.median(ready) if ready else None,
+        'peak_rss_bytes_median': int(statistics.median(rss)) if rss else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare standard vs lean browser launch')
+    parser.add_argument('--notebook-url', help='Notebook URL (default: active notebook)')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per mode')
+    parser.add_argument('--show-browser', action='store_true', help='Show browser')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    notebook_url = args.notebook_url
+    if not notebook_url:
+        active = NotebookLibrary().get_active_notebook()
+        if not active:
+            print("❌ No --notebook-url and no active notebook")
+            return 1
+        notebook_url = active['url']
+
+    results = {}
+    for lean in (False, True):
+        runs = []
+        for i in range(args.runs):
+            run = measure_launch(notebook_url, lean=lean, headless=not args.show_browser)
+            runs.append(run)
+            if not args.json:
+                print(f"  {run['mode']:<8} run {i + 1}: ready={run['ready_seconds']} "
+                      f"peak={format_bytes(run['peak_rss_bytes'])} {run['error'] or ''}")
+        results['lean' if lean else 'standard'] = summarize(runs)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print("\n📊 Browser launch comparison")
+    print(f"  {'mode':<10} {'ready (s)':>10} {'peak RSS':>12} {'failures':>9}")
+    for mode, summary in results.items():
+        ready = summary['ready_seconds_median']
+        ready_str = f"{ready:.2f}" if ready is not None else "n/a"
+        print(f"  {mode:<10} {ready_str:>10} {format_bytes(summary['peak_rss_bytes_median']):>12} "
+              f"{summary['failures']:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
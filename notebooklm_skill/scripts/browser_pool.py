@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Browser Pool for NotebookLM
+Keeps N browser contexts with up to M notebook pages each, so questions
+start on an already-loaded page instead of launching Chrome every time
+
+Guardrails for long-running Chrome:
+- Liveness probes: page still on NotebookLM with the query input visible
+- Recycling: pages after K questions, contexts when browser RSS passes a ceiling
+- Warm spares: idle pages pre-navigated to the default notebook
+
+Contexts are persistent profiles by default (one Chrome and one profile
+directory per context). With NOTEBOOKLM_CONTEXT_MODE=isolated all contexts
+share one Chrome process and are cheap non-persistent contexts seeded from
+state.json; set NOTEBOOKLM_POOL_PAGES_PER_CONTEXT=1 to give every
+concurrent question its own context.
+
+The sync Playwright API is bound to one thread, so a pool must be used from
+the thread that created it (the worker's main thread). stats() only reads
+counters and is safe to call from other threads.
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import (
+    BROWSER_PROFILE_DIR, CONTEXT_MODE, QUERY_INPUT_SELECTORS, PAGE_LOAD_TIMEOUT, NOTEBOOKLM_HOST,
+    POOL_CONTEXTS, POOL_PAGES_PER_CONTEXT, POOL_MAX_QUESTIONS_PER_PAGE,
+    POOL_RSS_CEILING_MB, POOL_WARM_SPARES
+)
+from resource_monitor import process_tree_rss
+
+
+class PoolExhaustedError(RuntimeError):
+    """Every page slot is in use"""
+
+
+class PooledPage:
+    """A notebook page owned by the pool"""
+
+    def __init__(self, page: Any, slot: int):
+        self.page = page
+        self.slot = slot
+        self.notebook_url: Optional[str] = None
+        self.questions = 0
+        self.in_use = False
+        self.created_at = time.time()
+
+
+class BrowserPool:
+    """
+    Pool of browser contexts and pre-navigated NotebookLM pages
+
+    Usage:
+        pool = BrowserPool(playwright, warm_url=notebook_url)
+        answer = pool.ask("question", notebook_url)
+        print(pool.stats())
+        pool.close()
+    """
+
+    def __init__(
+        self,
+        playwright: Any = None,
+        contexts: int = POOL_CONTEXTS,
+        pages_per_context: int = POOL_PAGES_PER_CONTEXT,
+        max_questions_per_page: int = POOL_MAX_QUESTIONS_PER_PAGE,
+        rss_ceiling_mb: Optional[int] = POOL_RSS_CEILING_MB,
+        warm_spares: int = POOL_WARM_SPARES,
+        warm_url: Optional[str] = None,
+        headless: bool = True,
+        lean: Optional[bool] = None,
+        context_factory: Optional[Callable[[int], Any]] = None,
+        asker: Optional[Callable[[Any, str], Optional[str]]] = None,
+        host: str = NOTEBOOKLM_HOST,
+        context_mode: str = CONTEXT_MODE
+    ):
+        """
+        Args:
+            playwright: Started sync Playwright (needed by the default context factory)
+            contexts: Number of browser contexts (N)
+            pages_per_context: Page slots per context (M)
+            max_questions_per_page: Recycle a page after this many questions (K)
+            rss_ceiling_mb: Recycle a context when browser RSS exceeds this (None = off)
+            warm_spares: Idle pages to keep pre-navigated to warm_url
+            warm_url: Default notebook for warm spares
+            headless: Run browsers headless
+            lean: Lean browser mode (default: NOTEBOOKLM_LEAN)
+            context_factory: slot -> BrowserContext (default: by context_mode)
+            asker: (page, question) -> answer (default: ask_question.ask_on_page)
+            host: Host a live page must be on (default: NOTEBOOKLM_BASE_URL's)
+            context_mode: Default factory: "persistent" profile per slot, or
+                "isolated" contexts in one shared Chrome (default: NOTEBOOKLM_CONTEXT_MODE)
+        """
+        self.playwright = playwright
+        self.max_contexts = contexts
+        self.pages_per_context = pages_per_context
+        self.max_questions_per_page = max_questions_per_page
+        self.rss_ceiling_bytes = rss_ceiling_mb * 1024 * 1024 if rss_ceiling_mb else None
+        self.warm_spares = warm_spares
+        self.warm_url = warm_url
+        self.headless = headless
+        self.lean = lean
+        self.context_factory = context_factory or self._default_context_factory
+        self.asker = asker
+        self.host = host
+        self.context_mode = context_mode
+        self._shared_browser = None
+
+        self.contexts: Dict[int, Any] = {}
+        self.pages: List[PooledPage] = []
+
+        self._counters = {
+            'acquired': 0,
+            'questions': 0,
+            'warm_hits': 0,
+            'pages_recycled': 0,
+            'contexts_recycled': 0,
+            'probe_failures': 0,
+            'wait_seconds_total': 0.0,
+            'wait_seconds_max': 0.0
+        }
+
+    # Context management -------------------------------------------------
+
+    def _default_context_factory(self, slot: int) -> Any:
+        from browser_utils import BrowserFactory, SharedBrowser
+
+        if self.context_mode == 'isolated':
+            if self._shared_browser is None:
+                self._shared_browser = SharedBrowser(self.playwright, headless=self.headless, lean=self.lean)
+            return self._shared_browser(slot)
+
+        # Chrome locks a profile directory, so each extra context gets its
+        # own; cookies are injected from state.json either way
+        profile = BROWSER_PROFILE_DIR if slot == 0 else BROWSER_PROFILE_DIR.with_name(f"browser_profile_{slot}")
+        return BrowserFactory.launch_persistent_context(
+            self.playwright, headless=self.headless, user_data_dir=str(profile), lean=self.lean
+        )
+
+    def _context(self, slot: int) -> Any:
+        context = self.contexts.get(slot)
+        if context is None:
+            context = self.contexts[slot] = self.context_factory(slot)
+        return context
+
+    def _free_slot(self) -> Optional[int]:
+        """A context slot with room for another page (existing contexts first)"""
+        counts = {slot: 0 for slot in range(self.max_contexts)}
+        for pooled in self.pages:
+            counts[pooled.slot] += 1
+        for slot in sorted(counts, key=lambda s: (s not in self.contexts, s)):
+            if counts[slot] < self.pages_per_context:
+                return slot
+        return None
+
+    def _new_page(self, notebook_url: str) -> PooledPage:
+        slot = self._free_slot()
+        if slot is None:
+            raise PoolExhaustedError(
+                f"All {self.max_contexts * self.pages_per_context} pages are in use")
+
+        pooled = PooledPage(self._context(slot).new_page(), slot)
+        self.pages.append(pooled)
+        try:
+            self._navigate(pooled, notebook_url)
+        except Exception:
+            self._discard(pooled)
+            raise
+        return pooled
+
+    def _navigate(self, pooled: PooledPage, notebook_url: str):
+        pooled.page.goto(notebook_url, wait_until="domcontentloaded", timeout=PAGE_LOAD_TIMEOUT)
+        pooled.notebook_url = notebook_url
+        pooled.questions = 0
+        if not self.probe(pooled, wait=True):
+            raise RuntimeError(f"Notebook page did not become ready: {notebook_url}")
+
+    def _discard(self, pooled: PooledPage):
+        if pooled in self.pages:
+            self.pages.remove(pooled)
+        try:
+            pooled.page.close()
+        except Exception:
+            pass
+
+    # Health -------------------------------------------------------------
+
+    def probe(self, pooled: PooledPage, wait: bool = False) -> bool:
+        """
+        Liveness probe: page open, still on NotebookLM, query input visible
+
+        Args:
+            pooled: Page to check
+            wait: Wait up to the page-load timeout for the input to appear
+        """
+        page = pooled.page
+        try:
+            if page.is_closed() or self.host not in page.url:
+                return False
+            if wait:
+                page.wait_for_selector(", ".join(QUERY_INPUT_SELECTORS), state="visible",
+                                       timeout=PAGE_LOAD_TIMEOUT)
+                return True
+            return any(page.is_visible(selector) for selector in QUERY_INPUT_SELECTORS)
+        except Exception:
+            return False
+
+    def recycle_page(self, pooled: PooledPage):
+        """Close a page; its slot is refilled on demand or by maintain()"""
+        self._discard(pooled)
+        self._counters['pages_recycled'] += 1
+
+    def recycle_context(self, slot: int):
+        """Close a context and every idle page in it"""
+        for pooled in [p for p in self.pages if p.slot == slot]:
+            if pooled.in_use:
+                return  # try again once the question finishes
+        for pooled in [p for p in self.pages if p.slot == slot]:
+            self._discard(pooled)
+        context = self.contexts.pop(slot, None)
+        if context is not None:
+            try:
+                context.close()
+            except Exception:
+                pass
+            self._counters['contexts_recycled'] += 1
+
+    def _enforce_rss_ceiling(self):
+        if not self.rss_ceiling_bytes or not self.contexts:
+            return
+        rss = process_tree_rss()
+        if rss is None or rss <= self.rss_ceiling_bytes:
+            return
+
+        # Recycle the busiest idle context: the one that has answered the most
+        served = {slot: 0 for slot in self.contexts}
+        busy = set()
+        for pooled in self.pages:
+            served[pooled.slot] = served.get(pooled.slot, 0) + pooled.questions
+            if pooled.in_use:
+                busy.add(pooled.slot)
+        candidates = [slot for slot in served if slot not in busy]
+        if candidates:
+            print(f"♻️  Browser RSS {rss // (1024 * 1024)} MB over ceiling, recycling a context")
+            self.recycle_context(max(candidates, key=lambda s: served[s]))
+
+    # Public API ---------------------------------------------------------
+
+    def acquire(self, notebook_url: str) -> PooledPage:
+        """
+        Get a ready page for a notebook
+
+        Prefers an idle page already showing the notebook (warm hit), then
+        re-navigates another idle page, then opens a new one.
+
+        Raises:
+            PoolExhaustedError: If every page slot is in use
+        """
+        start = time.perf_counter()
+
+        pooled = None
+        for candidate in [p for p in self.pages if not p.in_use and p.notebook_url == notebook_url]:
+            if self.probe(candidate):
+                pooled = candidate
+                self._counters['warm_hits'] += 1
+                break
+            self._counters['probe_failures'] += 1
+            self.recycle_page(candidate)
+
+        if pooled is None:
+            idle = [p for p in self.pages if not p.in_use]
+            if idle and self._free_slot() is None:
+                pooled = idle[0]
+                try:
+                    self._navigate(pooled, notebook_url)
+                except Exception:
+                    self.recycle_page(pooled)
+                    pooled = None
+            if pooled is None:
+                pooled = self._new_page(notebook_url)
+
+        pooled.in_use = True
+        waited = time.perf_counter() - start
+        self._counters['acquired'] += 1
+        self._counters['wait_seconds_total'] += waited
+        self._counters['wait_seconds_max'] = max(self._counters['wait_seconds_max'], waited)
+        return pooled
+
+    def release(self, pooled: PooledPage, healthy: bool = True):
+        """Return a page; unhealthy or worn-out pages are recycled"""
+        pooled.in_use = False
+        if not healthy or pooled.questions >= self.max_questions_per_page:
+            self.recycle_page(pooled)
+
+    def ask(self, question: str, notebook_url: str) -> Optional[str]:
+        """Ask a question on a pooled page"""
+        if self.asker is None:
+            from ask_question import ask_on_page
+            self.asker = ask_on_page
+
+        pooled = self.acquire(notebook_url)
+        answer = None
+        try:
+            answer = self.asker(pooled.page, question)
+            pooled.questions += 1
+            self._counters['questions'] += 1
+            return answer
+        finally:
+            self.release(pooled, healthy=answer is not None)
+
+    def warm(self, notebook_url: str) -> PooledPage:
+        """
+        Make sure an idle page is ready on a notebook (pre-warming)
+
+        Raises:
+            PoolExhaustedError: If every page slot is in use
+        """
+        for pooled in self.pages:
+            if not pooled.in_use and pooled.notebook_url == notebook_url and self.probe(pooled):
+                return pooled
+
+        idle = [p for p in self.pages if not p.in_use]
+        if idle and self._free_slot() is None:
+            pooled = idle[0]
+            try:
+                self._navigate(pooled, notebook_url)
+                return pooled
+            except Exception:
+                self.recycle_page(pooled)
+        return self._new_page(notebook_url)
+
+    def maintain(self):
+        """
+        Idle-time upkeep: enforce the RSS ceiling and top up warm spares
+
+        Call between questions (e.g. after a response has been sent).
+        """
+        self._enforce_rss_ceiling()
+
+        if not self.warm_url:
+            return
+        spares = [p for p in self.pages if not p.in_use and p.notebook_url == self.warm_url]
+        while len(spares) < self.warm_spares and self._free_slot() is not None:
+            try:
+                spares.append(self._new_page(self.warm_url))
+            except Exception as e:
+                print(f"  ⚠️ Could not warm a spare page: {e}")
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool statistics"""
+        pages = list(self.pages)
+        counters = dict(self._counters)
+        acquired = counters['acquired']
+        return {
+            'contexts': len(self.contexts),
+            'pages': len(pages),
+            'in_use': sum(1 for p in pages if p.in_use),
+            'idle': sum(1 for p in pages if not p.in_use),
+            'capacity': self.max_contexts * self.pages_per_context,
+            'acquired': acquired,
+            'questions': counters['questions'],
+            'warm_hits': counters['warm_hits'],
+            'recycled_pages': counters['pages_recycled'],
+            'recycled_contexts': counters['contexts_recycled'],
+            'probe_failures': counters['probe_failures'],
+            'avg_wait_ms': int(counters['wait_seconds_total'] / acquired * 1000) if acquired else 0,
+            'max_wait_ms': int(counters['wait_seconds_max'] * 1000)
+        }
+
+    def close(self):
+        """Close every page and context"""
+        for pooled in list(self.pages):
+            self._discard(pooled)
+        for context in self.contexts.values():
+            try:
+                context.close()
+            except Exception:
+                pass
+        self.contexts = {}
+        if self._shared_browser is not None:
+            self._shared_browser.close()
+            self._shared_browser = None
@@ -3,57 +3,205 @@ Browser Utilities for NotebookLM Skill
 Handles browser launching, stealth features, and common interactions
 """
 
-import json
 import time
 import random
 from typing import Optional, List
+from urllib.parse import urlparse
 
-from patchright.sync_api import Playwright, BrowserContext, Page
-from config import BROWSER_PROFILE_DIR, STATE_FILE, BROWSER_ARGS, USER_AGENT
+from patchright.sync_api import Playwright, Browser, BrowserContext, Page, Route
+from config import (
+    BROWSER_PROFILE_DIR, STATE_FILE, BROWSER_ARGS, USER_AGENT,
+    LEAN_MODE_DEFAULT, LEAN_BROWSER_ARGS, LEAN_BLOCKED_RESOURCE_TYPES,
+    LEAN_ALLOWED_HOSTS, LEAN_BLOCKED_URL_PATTERNS
+)
+from state_cache import get_state_cache
+from profile_lock import ProfileLock
 
 
 class BrowserFactory:
-    """Factory for creating configured browser contexts"""
+    """
+    Factory for creating configured browser contexts
+
+    Two modes:
+    - launch_persistent_context: one Chrome per profile directory (locked
+      while in use, so concurrent launches wait their turn; the login lives
+      in the profile)
+    - launch_browser + new_isolated_context: one Chrome process with many
+      cheap non-persistent contexts, each seeded from state.json
+    """
 
     @staticmethod
     def launch_persistent_context(
         playwright: Playwright,
         headless: bool = True,
-        user_data_dir: str = str(BROWSER_PROFILE_DIR)
+        user_data_dir: str = str(BROWSER_PROFILE_DIR),
+        lean: Optional[bool] = None
     ) -> BrowserContext:
         """
         Launch a persistent browser context with anti-detection features
         and cookie workaround.
+
+        Lean mode (default: NOTEBOOKLM_LEAN) adds memory-saving Chromium
+        flags and aborts images, fonts, media, third-party hosts and
+        telemetry requests.
+
+        Waits (up to NOTEBOOKLM_PROFILE_LOCK_TIMEOUT) while another process
+        has the profile open; the lock is released when the context closes.
         """
-        # Launch persistent context
-        context = playwright.chromium.launch_persistent_context(
-            user_data_dir=user_data_dir,
+        if lean is None:
+            lean = LEAN_MODE_DEFAULT
+
+        lock = ProfileLock(user_data_dir).acquire()
+        try:
+            # Launch persistent context
+            context = playwright.chromium.launch_persistent_context(
+                user_data_dir=user_data_dir,
+                channel="chrome",  # Use real Chrome
+                headless=headless,
+                no_viewport=True,
+                ignore_default_args=["--enable-automation"],
+                user_agent=USER_AGENT,
+                args=BROWSER_ARGS + (LEAN_BROWSER_ARGS if lean else [])
+            )
+        except Exception:
+            lock.release()
+            raise
+        context.on("close", lambda _: lock.release())
+
+        if lean:
+            context.route("**/*", BrowserFactory._lean_route)
+
+        # Cookie Workaround for Playwright bug #36139
+        # Session cookies (expires=-1) don't persist in user_data_dir automatically
+        BrowserFactory._inject_cookies(context)
+
+        return context
+
+    @staticmethod
+    def launch_browser(
+        playwright: Playwright,
+        headless: bool = True,
+        lean: Optional[bool] = None
+    ) -> Browser:
+        """
+        Launch a Chrome process for isolated contexts (no user_data_dir,
+        so nothing on disk is locked)
+        """
+        if lean is None:
+            lean = LEAN_MODE_DEFAULT
+
+        return playwright.chromium.launch(
             channel="chrome",  # Use real Chrome
             headless=headless,
-            no_viewport=True,
             ignore_default_args=["--enable-automation"],
-            user_agent=USER_AGENT,
-            args=BROWSER_ARGS
+            args=BROWSER_ARGS + (LEAN_BROWSER_ARGS if lean else [])
         )
 
-        # Cookie Workaround for Playwright bug #36139
-        # Session cookies (expires=-1) don't persist in user_data_dir automatically
-        BrowserFactory._inject_cookies(context)
+    @staticmethod
+    def new_isolated_context(browser: Browser, lean: Optional[bool] = None) -> BrowserContext:
+        """
+        Open a non-persistent context seeded from state.json via storage_state
+
+        Gets the saved login (Google cookies, session ones included, and
+        local storage) without copying the profile; nothing is written back.
+        Without state.json the context starts logged out.
+        """
+        if lean is None:
+            lean = LEAN_MODE_DEFAULT
+
+        cache = get_state_cache(STATE_FILE)
+        storage_state = None
+        try:
+            if cache.refresh() is not None:
+                storage_state = {
+                    'cookies': cache.cookies(),
+                    'origins': (cache.state() or {}).get('origins', [])
+                }
+        except Exception as e:
+            print(f"  ⚠️  Could not load state.json: {e}")
+
+        context = browser.new_context(
+            storage_state=storage_state,
+            no_viewport=True,
+            user_agent=USER_AGENT
+        )
+
+        if lean:
+            context.route("**/*", BrowserFactory._lean_route)
 
         return context
 
+    @staticmethod
+    def is_lean_blocked(url: str, resource_type: str) -> bool:
+        """Whether lean mode drops a request"""
+        if resource_type in LEAN_BLOCKED_RESOURCE_TYPES:
+            return True
+
+        host = urlparse(url).hostname or ''
+        if not any(host == h or host.endswith('.' + h) for h in LEAN_ALLOWED_HOSTS):
+            return True
+
+        return any(pattern in url for pattern in LEAN_BLOCKED_URL_PATTERNS)
+
+    @staticmethod
+    def _lean_route(route: Route):
+        request = route.request
+        if BrowserFactory.is_lean_blocked(request.url, request.resource_type):
+            route.abort()
+        else:
+            route.continue_()
+
     @staticmethod
     def _inject_cookies(context: BrowserContext):
-        """Inject cookies from state.json if available"""
-        if STATE_FILE.exists():
+        """Inject cookies from state.json if available (parsed once per file version)"""
+        cache = get_state_cache(STATE_FILE)
+        try:
+            if cache.refresh() is None:
+                return
+
+            cookies = cache.cookies()
+            if cookies:
+                context.add_cookies(cookies)
+                # print(f"  🔧 Injected {len(cookies)} cookies from state.json")
+        except Exception as e:
+            print(f"  ⚠️  Could not load state.json: {e}")
+
+
+class SharedBrowser:
+    """
+    One Chrome process handing out isolated contexts
+
+    Callable as a BrowserPool context_factory (slot -> context). Chrome is
+    launched on the first context and relaunched if it disconnects.
+
+    Usage:
+        shared = SharedBrowser(playwright)
+        context = shared(0)
+        ...
+        shared.close()
+    """
+
+    def __init__(self, playwright: Playwright, headless: bool = True, lean: Optional[bool] = None):
+        self.playwright = playwright
+        self.headless = headless
+        self.lean = lean
+        self.browser: Optional[Browser] = None
+        self.launches = 0
+
+    def __call__(self, slot: int = 0) -> BrowserContext:
+        if self.browser is None or not self.browser.is_connected():
+            self.browser = BrowserFactory.launch_browser(self.playwright, headless=self.headless, lean=self.lean)
+            self.launches += 1
+        return BrowserFactory.new_isolated_context(self.browser, lean=self.lean)
+
+    def close(self):
+        """Close Chrome (and with it every context it handed out)"""
+        browser, self.browser = self.browser, None
+        if browser is not None:
             try:
-                with open(STATE_FILE, 'r') as f:
-                    state = json.load(f)
-                    if 'cookies' in state and len(state['cookies']) > 0:
-                        context.add_cookies(state['cookies'])
-                        # print(f"  🔧 Injected {len(state['cookies'])} cookies from state.json")
-            except Exception as e:
-                print(f"  ⚠️  Could not load state.json: {e}")
+                browser.close()
+            except Exception:
+                pass
 
 
 class StealthUtils:
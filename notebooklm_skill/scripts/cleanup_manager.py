@@ -2,12 +2,42 @@
 """
 Cleanup Manager for NotebookLM Skill
 Manages cleanup of skill data and browser state
+
+Sizes are measured with os.scandir, scanning directories on a thread pool
+(a months-old Chrome profile holds tens of thousands of cache files), and
+kept per category for a short while so a preview followed by a cleanup
+scans only once. The prune mode only empties Chrome's Cache, Code Cache and
+GPUCache directories: cookies and local storage stay, so the login
+survives and the profile stays small.
 """
 
+import os
+import sys
 import shutil
+import time
 import argparse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
+
+
+def _scan_dir(path: str) -> Tuple[int, List[str]]:
+    """Bytes of the files directly in a directory, plus its subdirectories"""
+    size = 0
+    subdirs = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        size += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    pass  # vanished or unreadable
+    except OSError:
+        pass
+    return size, subdirs
 
 
 class CleanupManager:
@@ -21,11 +51,34 @@ class CleanupManager:
     - Safe deletion with confirmation
     """
 
-    def __init__(self):
-        """Initialize the cleanup manager"""
+    # Legacy JSON library plus the SQLite database and its WAL side files
+    LIBRARY_FILES = ['library.json', 'library.db', 'library.db-wal', 'library.db-shm']
+
+    # Chrome profile directories that only hold caches (safe to prune)
+    PRUNE_DIR_NAMES = ('Cache', 'Code Cache', 'GPUCache')
+
+    def __init__(
+        self,
+        data_dir: Optional[Path] = None,
+        workers: Optional[int] = None,
+        cache_ttl: float = 60.0
+    ):
+        """
+        Initialize the cleanup manager
+
+        Args:
+            data_dir: Skill data directory (default: notebooklm_skill/data)
+            workers: Threads for size scans (1 scans sequentially)
+            cache_ttl: Seconds a category's sizes are reused
+        """
         # Skill directory paths
         self.skill_dir = Path(__file__).parent.parent
-        self.data_dir = self.skill_dir / "data"
+        self.data_dir = Path(data_dir) if data_dir else self.skill_dir / "data"
+        self.profile_dir = self.data_dir / "browser_state" / "browser_profile"
+
+        self.workers = workers or min(8, (os.cpu_count() or 1) + 4)
+        self.cache_ttl = cache_ttl
+        self._category_cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
 
     def get_cleanup_paths(self, preserve_library: bool = False) -> Dict[str, Any]:
         """
@@ -39,94 +92,207 @@ class CleanupManager:
 
         Note: .venv is NEVER deleted - it's part of the skill infrastructure
         """
-        paths = {
-            'browser_state': [],
-            'sessions': [],
-            'library': [],
-            'auth': [],
-            'other': []
-        }
-
-        total_size = 0
-
-        if self.data_dir.exists():
-            # Browser state
-            browser_state_dir = self.data_dir / "browser_state"
-            if browser_state_dir.exists():
-                for item in browser_state_dir.iterdir():
-                    size = self._get_size(item)
-                    paths['browser_state'].append({
-                        'path': str(item),
-                        'size': size,
-                        'type': 'dir' if item.is_dir() else 'file'
-                    })
-                    total_size += size
-
-            # Sessions
-            sessions_file = self.data_dir / "sessions.json"
-            if sessions_file.exists():
-                size = sessions_file.stat().st_size
-                paths['sessions'].append({
-                    'path': str(sessions_file),
-                    'size': size,
-                    'type': 'file'
-                })
-                total_size += size
-
-            # Library (unless preserved)
-            if not preserve_library:
-                library_file = self.data_dir / "library.json"
-                if library_file.exists():
-                    size = library_file.stat().st_size
-                    paths['library'].append({
-                        'path': str(library_file),
-                        'size': size,
-                        'type': 'file'
-                    })
-                    total_size += size
-
-            # Auth info
-            auth_info = self.data_dir / "auth_info.json"
-            if auth_info.exists():
-                size = auth_info.stat().st_size
-                paths['auth'].append({
-                    'path': str(auth_info),
-                    'size': size,
-                    'type': 'file'
-                })
-                total_size += size
-
-            # Other files in data dir (but NEVER .venv!)
-            for item in self.data_dir.iterdir():
-                if item.name not in ['browser_state', 'sessions.json', 'library.json', 'auth_info.json']:
-                    size = self._get_size(item)
-                    paths['other'].append({
-                        'path': str(item),
-                        'size': size,
-                        'type': 'dir' if item.is_dir() else 'file'
-                    })
-                    total_size += size
+        names = ['browser_state', 'sessions', 'library', 'auth', 'other']
+        if preserve_library:
+            names.remove('library')
+        paths = {'browser_state': [], 'sessions': [], 'library': [], 'auth': [], 'other': []}
+        paths.update(self._categories(names))
 
         return {
             'categories': paths,
-            'total_size': total_size,
+            'total_size': sum(item['size'] for items in paths.values() for item in items),
             'total_items': sum(len(items) for items in paths.values())
         }
 
+    def _category_paths(self, category: str) -> List[Path]:
+        """Paths belonging to a category (no sizes yet)"""
+        if not self.data_dir.exists():
+            return []
+        if category == 'browser_state':
+            browser_state_dir = self.data_dir / "browser_state"
+            return sorted(browser_state_dir.iterdir()) if browser_state_dir.exists() else []
+        if category == 'sessions':
+            return [p for p in [self.data_dir / "sessions.json"] if p.exists()]
+        if category == 'library':
+            return [self.data_dir / name for name in self.LIBRARY_FILES if (self.data_dir / name).exists()]
+        if category == 'auth':
+            return [p for p in [self.data_dir / "auth_info.json"] if p.exists()]
+        if category == 'other':
+            # Other files in data dir (but NEVER .venv!)
+            known = ['browser_state', 'sessions.json', 'auth_info.json', *self.LIBRARY_FILES]
+            return sorted(item for item in self.data_dir.iterdir() if item.name not in known)
+        if category == 'browser_cache':
+            return self._find_cache_dirs()
+        raise ValueError(f"Unknown category: {category}")
+
+    def _categories(self, names: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Items with sizes per category, sizing every stale category in one parallel scan"""
+        now = time.monotonic()
+        result = {}
+        stale = {}
+        for name in names:
+            cached = self._category_cache.get(name)
+            if cached and now - cached[0] < self.cache_ttl:
+                result[name] = cached[1]
+            else:
+                stale[name] = self._category_paths(name)
+
+        all_paths = [path for category_paths in stale.values() for path in category_paths]
+        sizes = iter(self._get_sizes(all_paths))
+        for name, category_paths in stale.items():
+            items = [{
+                'path': str(path),
+                'size': next(sizes),
+                'type': 'dir' if path.is_dir() else 'file'
+            } for path in category_paths]
+            self._category_cache[name] = (now, items)
+            result[name] = items
+        return result
+
+    def invalidate_cache(self):
+        """Forget cached sizes (after anything was deleted)"""
+        self._category_cache.clear()
+
     def _get_size(self, path: Path) -> int:
         """Get size of file or directory in bytes"""
-        if path.is_file():
-            return path.stat().st_size
-        elif path.is_dir():
-            total = 0
+        return self._get_sizes([path])[0]
+
+    def _get_sizes(self, paths: List[Path]) -> List[int]:
+        """
+        Sizes of several files or directories in bytes
+
+        Directories are scanned breadth-first, one directory per task, so the
+        thread pool stays busy however unbalanced the trees are.
+        """
+        totals = [0] * len(paths)
+        roots = []
+        for i, path in enumerate(paths):
+            try:
+                if path.is_dir() and not path.is_symlink():
+                    roots.append((i, str(path)))
+                elif path.is_file():
+                    totals[i] = path.stat().st_size
+            except OSError:
+                pass
+
+        if self.workers <= 1:
+            for i, root in roots:
+                stack = [root]
+                while stack:
+                    size, subdirs = _scan_dir(stack.pop())
+                    totals[i] += size
+                    stack.extend(subdirs)
+            return totals
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = {pool.submit(_scan_dir, root): i for i, root in roots}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = pending.pop(future)
+                    size, subdirs = future.result()
+                    totals[i] += size
+                    for subdir in subdirs:
+                        pending[pool.submit(_scan_dir, subdir)] = i
+        return totals
+
+    def _find_cache_dirs(self) -> List[Path]:
+        """Cache directories anywhere in the Chrome profile (not descending into them)"""
+        found = []
+        if not self.profile_dir.is_dir():
+            return found
+        stack = [str(self.profile_dir)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if not entry.is_dir(follow_symlinks=False):
+                            continue
+                        if entry.name in self.PRUNE_DIR_NAMES:
+                            found.append(Path(entry.path))
+                        else:
+                            stack.append(entry.path)
+            except OSError:
+                pass
+        return sorted(found)
+
+    def browser_running(self) -> bool:
+        """True if Chrome holds the profile (its SingletonLock link exists)"""
+        return os.path.lexists(self.profile_dir / "SingletonLock")
+
+    def get_prune_paths(self) -> Dict[str, Any]:
+        """
+        Get the Chrome cache directories that prune would delete
+
+        Returns:
+            Dict with paths and sizes
+        """
+        items = self._categories(['browser_cache'])['browser_cache']
+        return {
+            'profile_dir': str(self.profile_dir),
+            'paths': items,
+            'total_size': sum(item['size'] for item in items),
+            'total_items': len(items)
+        }
+
+    def prune_profile(self, dry_run: bool = False, force: bool = False) -> Dict[str, Any]:
+        """
+        Delete Chrome's Cache, Code Cache and GPUCache directories
+
+        Cookies, local storage and the rest of the profile are kept.
+
+        Args:
+            dry_run: Preview only, don't delete
+            force: Prune even if Chrome seems to be using the profile
+
+        Returns:
+            Dict with prune results
+
+        Raises:
+            RuntimeError: If the browser is running and force is not set
+        """
+        prune_data = self.get_prune_paths()
+
+        if dry_run:
+            return {
+                'dry_run': True,
+                'would_delete': prune_data['total_items'],
+                'would_free': prune_data['total_size']
+            }
+
+        if self.browser_running() and not force:
+            raise RuntimeError(
+                f"Chrome is using {self.profile_dir} (SingletonLock present); "
+                "close the browser or worker first, or use --force"
+            )
+
+        deleted_items = []
+        failed_items = []
+        deleted_size = 0
+        for item_info in prune_data['paths']:
+            path = Path(item_info['path'])
             try:
-                for item in path.rglob('*'):
-                    if item.is_file():
-                        total += item.stat().st_size
-            except Exception:
+                shutil.rmtree(path)
+                deleted_items.append(str(path))
+                deleted_size += item_info['size']
+                print(f"  ✅ Pruned: {path.relative_to(self.profile_dir)}")
+            except FileNotFoundError:
                 pass
-            return total
-        return 0
+            except Exception as e:
+                failed_items.append({
+                    'path': str(path),
+                    'error': str(e)
+                })
+                print(f"  ❌ Failed: {path.name} ({e})")
+        self.invalidate_cache()
+
+        return {
+            'deleted_items': deleted_items,
+            'failed_items': failed_items,
+            'deleted_size': deleted_size,
+            'deleted_count': len(deleted_items),
+            'failed_count': len(failed_items)
+        }
 
     def _format_size(self, size: int) -> str:
         """Format size in human-readable form"""
@@ -183,6 +349,8 @@ class CleanupManager:
                     })
                     print(f"  ❌ Failed: {path.name} ({e})")
 
+        self.invalidate_cache()
+
         # Recreate browser_state dir if everything was deleted
         if not preserve_library and not failed_items:
             browser_state_dir = self.data_dir / "browser_state"
@@ -222,6 +390,23 @@ class CleanupManager:
         print("\nThis preview shows what would be deleted.")
         print("Use --confirm to actually perform the cleanup.")
 
+    def print_prune_preview(self):
+        """Print a preview of the cache directories prune would delete"""
+        data = self.get_prune_paths()
+
+        print("\n🔍 Prune Preview (Chrome caches only)")
+        print("=" * 60)
+        for item in data['paths']:
+            path = Path(item['path']).relative_to(self.profile_dir)
+            print(f"  📂 {str(path):<40} {self._format_size(item['size']):>10}")
+
+        print("\n" + "=" * 60)
+        print(f"Total items: {data['total_items']}")
+        print(f"Total size: {self._format_size(data['total_size'])}")
+        print("\n🍪 Cookies, local storage and the login are kept")
+        if self.browser_running():
+            print("⚠️  Chrome is using the profile; close it before pruning")
+
 
 def main():
     """Command-line interface for cleanup management"""
@@ -241,9 +426,26 @@ Examples:
 
   # Force cleanup without preview
   python cleanup_manager.py --confirm --force
+
+  # Preview / delete only Chrome caches (keeps cookies and login)
+  python cleanup_manager.py --prune
+  python cleanup_manager.py --prune --confirm
         """
     )
 
+    parser.add_argument(
+        '--prune',
+        action='store_true',
+        help='Only delete Chrome Cache, Code Cache and GPUCache from the browser profile'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Threads for scanning sizes (1 = sequential)'
+    )
+
     parser.add_argument(
         '--confirm',
         action='store_true',
@@ -253,19 +455,38 @@ Examples:
     parser.add_argument(
         '--preserve-library',
         action='store_true',
-        help='Keep the notebook library (library.json)'
+        help='Keep the notebook library (library.json / library.db)'
     )
 
     parser.add_argument(
         '--force',
         action='store_true',
-        help='Skip confirmation prompt'
+        help='Skip confirmation prompt (with --prune: prune even if Chrome is running)'
     )
 
     args = parser.parse_args()
 
     # Initialize manager
-    manager = CleanupManager()
+    manager = CleanupManager(workers=args.workers)
+
+    if args.prune:
+        if not args.confirm:
+            manager.print_prune_preview()
+            print("\nUse --prune --confirm to delete these caches.")
+            return
+
+        print("\n🗑️ Pruning browser caches...")
+        try:
+            result = manager.prune_profile(force=args.force)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return 1
+        print(f"\n✅ Prune complete!")
+        print(f"  Deleted: {result['deleted_count']} cache dirs")
+        print(f"  Freed: {manager._format_size(result['deleted_size'])}")
+        if result['failed_count'] > 0:
+            print(f"  ⚠️ Failed: {result['failed_count']} items")
+        return
 
     if args.confirm:
         # Show preview first unless forced
@@ -299,4 +520,4 @@ Examples:
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
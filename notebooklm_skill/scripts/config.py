@@ -3,16 +3,20 @@ Configuration for NotebookLM Skill
 Centralizes constants, selectors, and paths
 """
 
+import os
 from pathlib import Path
+from urllib.parse import urlparse
 
 # Paths
 SKILL_DIR = Path(__file__).parent.parent
-DATA_DIR = SKILL_DIR / "data"
+# NOTEBOOKLM_DATA_DIR moves the profile, login state and library (e.g. for tests)
+DATA_DIR = Path(os.getenv('NOTEBOOKLM_DATA_DIR') or SKILL_DIR / "data")
 BROWSER_STATE_DIR = DATA_DIR / "browser_state"
 BROWSER_PROFILE_DIR = BROWSER_STATE_DIR / "browser_profile"
 STATE_FILE = BROWSER_STATE_DIR / "state.json"
 AUTH_INFO_FILE = DATA_DIR / "auth_info.json"
-LIBRARY_FILE = DATA_DIR / "library.json"
+LIBRARY_FILE = DATA_DIR / "library.json"  # Legacy format, import/export only
+LIBRARY_DB_FILE = DATA_DIR / "library.db"
 
 # NotebookLM Selectors
 QUERY_INPUT_SELECTORS = [
@@ -36,9 +40,90 @@ BROWSER_ARGS = [
     '--no-default-browser-check'
 ]
 
+# Lean mode: skip non-essential resources and trim Chromium's footprint
+# (opt-in per launch, or for every launch with NOTEBOOKLM_LEAN=1)
+LEAN_MODE_DEFAULT = os.getenv('NOTEBOOKLM_LEAN', '').lower() in ('1', 'true', 'yes')
+
+LEAN_BROWSER_ARGS = [
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-breakpad',
+    '--mute-audio',
+    '--renderer-process-limit=2',
+    '--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication',
+]
+
+LEAN_BLOCKED_RESOURCE_TYPES = {'image', 'font', 'media'}
+
+# First-party hosts NotebookLM needs (plus NOTEBOOKLM_BASE_URL's host, added
+# below); every other host is aborted in lean mode
+LEAN_ALLOWED_HOSTS = [
+    'google.com',
+    'gstatic.com',
+    'googleapis.com',
+    'googleusercontent.com',
+]
+
+# Telemetry endpoints on first-party hosts
+LEAN_BLOCKED_URL_PATTERNS = [
+    'play.google.com/log',
+    '/gen_204',
+    'google-analytics.com',
+    'googletagmanager.com',
+    '/jserror',
+]
+
+# Cookies injected from state.json: only these exact domains are needed
+COOKIE_DOMAINS = {
+    'google.com',
+    'notebooklm.google.com',
+    'accounts.google.com',
+}
+
+# Google session cookies whose expiry decides when to re-authenticate
+AUTH_COOKIE_NAMES = {
+    'SID', 'HSID', 'SSID', 'APISID', 'SAPISID',
+    '__Secure-1PSID', '__Secure-3PSID',
+}
+
+# Treat auth as expiring this long before the cookies actually expire
+AUTH_EXPIRY_MARGIN_SECONDS = 3600
+
 USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
 
 # Timeouts
 LOGIN_TIMEOUT_MINUTES = 10
 QUERY_TIMEOUT_SECONDS = 120
 PAGE_LOAD_TIMEOUT = 30000
+
+# NotebookLM origin (liveness probes check the page is still on it). Point
+# NOTEBOOKLM_BASE_URL at fake_notebooklm.py for offline load testing.
+NOTEBOOKLM_BASE_URL = os.getenv('NOTEBOOKLM_BASE_URL', 'https://notebooklm.google.com').rstrip('/')
+NOTEBOOKLM_HOST = NOTEBOOKLM_BASE_URL.split('://', 1)[-1]
+
+# Lean mode must not abort the NotebookLM origin itself (e.g. 127.0.0.1)
+_NOTEBOOKLM_HOSTNAME = urlparse(NOTEBOOKLM_BASE_URL).hostname
+if _NOTEBOOKLM_HOSTNAME and _NOTEBOOKLM_HOSTNAME not in LEAN_ALLOWED_HOSTS:
+    LEAN_ALLOWED_HOSTS.append(_NOTEBOOKLM_HOSTNAME)
+
+# Browser contexts: "persistent" (launch_persistent_context on a locked
+# profile directory) or "isolated" (one Chrome process, lightweight
+# non-persistent contexts seeded from state.json; nothing locked on disk,
+# so concurrent processes and contexts never collide)
+CONTEXT_MODES = ('persistent', 'isolated')
+CONTEXT_MODE = os.getenv('NOTEBOOKLM_CONTEXT_MODE', 'persistent').lower()
+if CONTEXT_MODE not in CONTEXT_MODES:
+    CONTEXT_MODE = 'persistent'
+
+# Seconds a persistent launch waits for another process to release the profile
+PROFILE_LOCK_TIMEOUT = float(os.getenv('NOTEBOOKLM_PROFILE_LOCK_TIMEOUT', '300'))
+
+# Browser pool (used by the long-lived worker)
+POOL_CONTEXTS = int(os.getenv('NOTEBOOKLM_POOL_CONTEXTS', '1'))
+POOL_PAGES_PER_CONTEXT = int(os.getenv('NOTEBOOKLM_POOL_PAGES_PER_CONTEXT', '2'))
+POOL_MAX_QUESTIONS_PER_PAGE = int(os.getenv('NOTEBOOKLM_POOL_MAX_QUESTIONS_PER_PAGE', '20'))
+POOL_RSS_CEILING_MB = int(os.getenv('NOTEBOOKLM_POOL_RSS_CEILING_MB', '1500'))
+POOL_WARM_SPARES = int(os.getenv('NOTEBOOKLM_POOL_WARM_SPARES', '1'))
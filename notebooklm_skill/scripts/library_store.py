@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+SQLite Storage Backend for the Notebook Library
+Atomic, incremental persistence that is safe across processes
+
+- Every write is a single transaction (BEGIN IMMEDIATE takes the database
+  write lock, so concurrent processes serialize instead of clobbering each
+  other's changes)
+- WAL journal: readers never block the writer
+- Indexes on id, topics and tags
+- Import/export of the legacy library.json format
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+# Columns stored directly; topics/tags live in their own indexed tables and
+# any unknown keys are kept in `extra` so JSON round-trips are lossless
+COLUMNS = [
+    'id', 'url', 'name', 'description', 'content_types', 'use_cases',
+    'created_at', 'updated_at', 'use_count', 'last_used'
+]
+JSON_COLUMNS = {'content_types', 'use_cases'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notebooks (
+    id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    content_types TEXT NOT NULL DEFAULT '[]',
+    use_cases TEXT NOT NULL DEFAULT '[]',
+    created_at TEXT,
+    updated_at TEXT,
+    use_count INTEGER NOT NULL DEFAULT 0,
+    last_used TEXT,
+    extra TEXT NOT NULL DEFAULT '{}',
+    position INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS notebook_topics (
+    notebook_id TEXT NOT NULL REFERENCES notebooks(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    topic TEXT NOT NULL,
+    PRIMARY KEY (notebook_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_notebook_topics_topic ON notebook_topics(topic COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS notebook_tags (
+    notebook_id TEXT NOT NULL REFERENCES notebooks(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (notebook_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_notebook_tags_tag ON notebook_tags(tag COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class LibraryStore:
+    """
+    SQLite-backed storage for notebook metadata
+
+    One store may be shared by several threads (the worker answers cheap
+    commands from its reader thread and questions from the main thread);
+    the connection is guarded by a lock.
+    """
+
+    def __init__(self, db_file: Path):
+        """
+        Open (and create if needed) the library database
+
+        Args:
+            db_file: Path to the SQLite database file
+        """
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.RLock()
+
+        self._conn = sqlite3.connect(str(self.db_file), timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        """Close the database connection"""
+        self._conn.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a write transaction holding the database write lock"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._bump_revision()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _rows(self, sql: str, params=()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _bump_revision(self):
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('revision', '1') "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+    # Reads --------------------------------------------------------------
+
+    def revision(self) -> int:
+        """Monotonic counter bumped by every committed write (any process)"""
+        return int(self.get_meta('revision') or 0)
+
+    def get_meta(self, key: str) -> Optional[str]:
+        rows = self._rows("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0]['value'] if rows else None
+
+    def count(self) -> int:
+        return self._rows("SELECT COUNT(*) FROM notebooks")[0][0]
+
+    def load_all(self) -> Tuple[Dict[str, Dict[str, Any]], Optional[str]]:
+        """
+        Load every notebook plus the active notebook ID
+
+        Returns:
+            (notebooks keyed by ID in insertion order, active notebook ID)
+        """
+        topics = self._load_lists('notebook_topics', 'topic')
+        tags = self._load_lists('notebook_tags', 'tag')
+
+        notebooks = {}
+        for row in self._rows("SELECT * FROM notebooks ORDER BY position, rowid"):
+            notebook = self._row_to_notebook(row, topics.get(row['id'], []), tags.get(row['id'], []))
+            notebooks[notebook['id']] = notebook
+
+        return notebooks, self.get_meta('active_notebook_id')
+
+    def get(self, notebook_id: str) -> Optional[Dict[str, Any]]:
+        """Load a single notebook by ID (primary key lookup)"""
+        rows = self._rows("SELECT * FROM notebooks WHERE id = ?", (notebook_id,))
+        if not rows:
+            return None
+        topics = [r['topic'] for r in self._rows(
+            "SELECT topic FROM notebook_topics WHERE notebook_id = ? ORDER BY position", (notebook_id,))]
+        tags = [r['tag'] for r in self._rows(
+            "SELECT tag FROM notebook_tags WHERE notebook_id = ? ORDER BY position", (notebook_id,))]
+        return self._row_to_notebook(rows[0], topics, tags)
+
+    def find_by_topic(self, topic: str) -> List[str]:
+        """IDs of notebooks with an exact (case-insensitive) topic match"""
+        rows = self._rows(
+            "SELECT DISTINCT notebook_id FROM notebook_topics WHERE topic = ? COLLATE NOCASE", (topic,))
+        return [r['notebook_id'] for r in rows]
+
+    def find_by_tag(self, tag: str) -> List[str]:
+        """IDs of notebooks with an exact (case-insensitive) tag match"""
+        rows = self._rows(
+            "SELECT DISTINCT notebook_id FROM notebook_tags WHERE tag = ? COLLATE NOCASE", (tag,))
+        return [r['notebook_id'] for r in rows]
+
+    def _load_lists(self, table: str, column: str) -> Dict[str, List[str]]:
+        lists: Dict[str, List[str]] = {}
+        for row in self._rows(f"SELECT notebook_id, {column} FROM {table} ORDER BY notebook_id, position"):
+            lists.setdefault(row['notebook_id'], []).append(row[column])
+        return lists
+
+    @staticmethod
+    def _row_to_notebook(row: sqlite3.Row, topics: List[str], tags: List[str]) -> Dict[str, Any]:
+        notebook = {}
+        for column in COLUMNS:
+            value = row[column]
+            notebook[column] = json.loads(value) if column in JSON_COLUMNS else value
+        notebook['topics'] = topics
+        notebook['tags'] = tags
+        notebook.update(json.loads(row['extra']))
+        return notebook
+
+    # Writes -------------------------------------------------------------
+
+    def insert(self, notebook: Dict[str, Any], activate_if_first: bool = False):
+        """
+        Insert a new notebook
+
+        Raises:
+            ValueError: If a notebook with the same ID already exists
+        """
+        with self.transaction() as conn:
+            exists = conn.execute("SELECT 1 FROM notebooks WHERE id = ?", (notebook['id'],)).fetchone()
+            if exists:
+                raise ValueError(f"Notebook with ID '{notebook['id']}' already exists")
+            self._write_notebook(conn, notebook)
+            if activate_if_first and self.count() == 1:
+                self._set_meta(conn, 'active_notebook_id', notebook['id'])
+
+    def update(self, notebook: Dict[str, Any]):
+        """Replace a notebook's metadata (same ID)"""
+        with self.transaction() as conn:
+            self._write_notebook(conn, notebook)
+
+    def delete(self, notebook_id: str) -> Optional[str]:
+        """
+        Delete a notebook, moving the active marker if needed
+
+        Returns:
+            The active notebook ID after the delete
+        """
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM notebooks WHERE id = ?", (notebook_id,))
+            active = self.get_meta('active_notebook_id')
+            if active == notebook_id:
+                row = conn.execute("SELECT id FROM notebooks ORDER BY position, rowid LIMIT 1").fetchone()
+                active = row['id'] if row else None
+                self._set_meta(conn, 'active_notebook_id', active)
+            return active
+
+    def set_active(self, notebook_id: Optional[str]):
+        self.set_meta('active_notebook_id', notebook_id)
+
+    def set_meta(self, key: str, value: Optional[str]):
+        with self.transaction() as conn:
+            self._set_meta(conn, key, value)
+
+    def increment_use_count(self, notebook_id: str, last_used: str) -> Optional[int]:
+        """
+        Single-row usage update
+
+        Returns:
+            The new use count, or None if the notebook does not exist
+        """
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE notebooks SET use_count = use_count + 1, last_used = ? WHERE id = ?",
+                (last_used, notebook_id))
+            if cursor.rowcount == 0:
+                return None
+            return conn.execute("SELECT use_count FROM notebooks WHERE id = ?", (notebook_id,)).fetchone()[0]
+
+    def _write_notebook(self, conn: sqlite3.Connection, notebook: Dict[str, Any]):
+        values = [
+            json.dumps(notebook.get(c) or [], ensure_ascii=False) if c in JSON_COLUMNS else notebook.get(c)
+            for c in COLUMNS
+        ]
+        values[COLUMNS.index('use_count')] = notebook.get('use_count') or 0
+        known = set(COLUMNS) | {'topics', 'tags'}
+        extra = {k: v for k, v in notebook.items() if k not in known}
+
+        position = conn.execute("SELECT position FROM notebooks WHERE id = ?", (notebook['id'],)).fetchone()
+        if position is None:
+            position = conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM notebooks").fetchone()
+        placeholders = ', '.join('?' for _ in COLUMNS)
+        updates = ', '.join(f"{c} = excluded.{c}" for c in COLUMNS[1:])
+        conn.execute(
+            f"INSERT INTO notebooks ({', '.join(COLUMNS)}, extra, position) "
+            f"VALUES ({placeholders}, ?, ?) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates}, extra = excluded.extra",
+            values + [json.dumps(extra, ensure_ascii=False), position[0]])
+
+        conn.execute("DELETE FROM notebook_topics WHERE notebook_id = ?", (notebook['id'],))
+        conn.execute("DELETE FROM notebook_tags WHERE notebook_id = ?", (notebook['id'],))
+        conn.executemany(
+            "INSERT INTO notebook_topics (notebook_id, position, topic) VALUES (?, ?, ?)",
+            [(notebook['id'], i, t) for i, t in enumerate(notebook.get('topics') or [])])
+        conn.executemany(
+            "INSERT INTO notebook_tags (notebook_id, position, tag) VALUES (?, ?, ?)",
+            [(notebook['id'], i, t) for i, t in enumerate(notebook.get('tags') or [])])
+
+    @staticmethod
+    def _set_meta(conn: sqlite3.Connection, key: str, value: Optional[str]):
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value))
+
+    # JSON compatibility -------------------------------------------------
+
+    def import_json(self, json_file: Path, replace: bool = False) -> int:
+        """
+        Import notebooks from the legacy library.json format
+
+        Args:
+            json_file: Path to a library.json file
+            replace: Drop existing notebooks first (otherwise existing IDs are overwritten)
+
+        Returns:
+            Number of notebooks imported
+        """
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        notebooks = data.get('notebooks', {})
+        with self.transaction() as conn:
+            if replace:
+                conn.execute("DELETE FROM notebooks")
+            for notebook_id, notebook in notebooks.items():
+                self._write_notebook(conn, {**notebook, 'id': notebook.get('id', notebook_id)})
+            active = data.get('active_notebook_id')
+            if active or replace:
+                self._set_meta(conn, 'active_notebook_id', active)
+
+        return len(notebooks)
+
+    def export_json(self, json_file: Path):
+        """Atomically write the library in the legacy library.json format"""
+        notebooks, active = self.load_all()
+        data = {
+            'notebooks': notebooks,
+            'active_notebook_id': active,
+            'updated_at': datetime.now().isoformat()
+        }
+        atomic_write_json(Path(json_file), data)
+
+
+def atomic_write_json(path: Path, data: Any):
+    """Write JSON to a temp file in the same directory, fsync, then rename into place"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
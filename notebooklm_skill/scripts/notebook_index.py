@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Ranked Full-Text Search over Notebook Metadata
+In-memory inverted index with BM25 scoring and CJK-aware tokenization
+
+Latin text is split into lowercase words; runs of CJK characters are split
+into overlapping character bigrams ("技术选型" -> 技术, 术选, 选型), so
+Chinese topics match without a word segmenter.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+_TOKEN_RE = re.compile(
+    r"[a-z0-9]+"
+    r"|[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\u3040-\u30ff\uac00-\ud7af]+"
+)
+
+# Repeat tokens from the more descriptive fields (a light BM25F)
+FIELD_WEIGHTS = {
+    'name': 3,
+    'topics': 3,
+    'tags': 2,
+    'description': 1,
+    'use_cases': 1,
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into search terms (words and CJK bigrams)"""
+    tokens = []
+    for run in _TOKEN_RE.findall(text.lower()):
+        if run[0].isascii():
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def _notebook_terms(notebook: Dict[str, Any]) -> List[str]:
+    terms = []
+    for field, weight in FIELD_WEIGHTS.items():
+        value = notebook.get(field) or ''
+        if isinstance(value, list):
+            value = ' '.join(value)
+        terms.extend(tokenize(value) * weight)
+    return terms
+
+
+class NotebookIndex:
+    """Inverted index over notebook metadata with BM25 ranking"""
+
+    def __init__(self, notebooks: Iterable[Dict[str, Any]], k1: float = 1.5, b: float = 0.75):
+        """
+        Build the index
+
+        Args:
+            notebooks: Notebook dicts (as stored by NotebookLibrary)
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.doc_ids: List[str] = []
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+
+        for notebook in notebooks:
+            doc = len(self.doc_ids)
+            terms = _notebook_terms(notebook)
+            self.doc_ids.append(notebook['id'])
+            self.doc_lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                self.postings.setdefault(term, []).append((doc, tf))
+
+        total = sum(self.doc_lengths)
+        self.avg_length = total / len(self.doc_lengths) if self.doc_lengths else 0.0
+
+        n = len(self.doc_ids)
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def search(self, query: str, limit: Optional[int] = 10) -> List[Tuple[str, float]]:
+        """
+        Rank notebooks against a query
+
+        Args:
+            query: Free text (topic, question, keywords)
+            limit: Maximum number of results (None = all matches)
+
+        Returns:
+            (notebook ID, score) pairs, best first; only positive scores
+        """
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = self.idf[term]
+            for doc, tf in docs:
+                norm = 1 - self.b + self.b * self.doc_lengths[doc] / (self.avg_length or 1)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self.doc_ids[doc], score) for doc, score in ranked[:limit]]
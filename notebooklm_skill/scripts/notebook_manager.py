@@ -3,62 +3,78 @@
 Notebook Library Management for NotebookLM
 Manages a library of NotebookLM notebooks with metadata
 Based on the MCP server implementation
+
+Storage is a SQLite database (library.db) with per-operation transactions;
+the legacy library.json is imported on first use and can still be
+exported/imported in the same format.
 """
 
 import json
 import argparse
 import uuid
 import os
+import sys
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from library_store import LibraryStore
+from notebook_index import NotebookIndex
+
 
 class NotebookLibrary:
     """Manages a collection of NotebookLM notebooks with metadata"""
 
-    def __init__(self):
-        """Initialize the notebook library"""
+    def __init__(self, data_dir: Optional[Path] = None):
+        """
+        Initialize the notebook library
+
+        Args:
+            data_dir: Directory holding library.db (default: the skill's data/ directory)
+        """
         # Store data within the skill directory
         skill_dir = Path(__file__).parent.parent
-        self.data_dir = skill_dir / "data"
+        self.data_dir = Path(data_dir) if data_dir else skill_dir / "data"
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
         self.library_file = self.data_dir / "library.json"
+        self.db_file = self.data_dir / "library.db"
         self.notebooks: Dict[str, Dict[str, Any]] = {}
         self.active_notebook_id: Optional[str] = None
 
+        self.store = LibraryStore(self.db_file)
+        self._revision = -1
+        self._index: Optional[NotebookIndex] = None
+
         # Load existing library
         self._load_library()
 
     def _load_library(self):
-        """Load library from disk"""
-        if self.library_file.exists():
-            try:
-                with open(self.library_file, 'r') as f:
-                    data = json.load(f)
-                    self.notebooks = data.get('notebooks', {})
-                    self.active_notebook_id = data.get('active_notebook_id')
-                    print(f"📚 Loaded library with {len(self.notebooks)} notebooks")
-            except Exception as e:
-                print(f"⚠️ Error loading library: {e}")
-                self.notebooks = {}
-                self.active_notebook_id = None
-        else:
-            self._save_library()
-
-    def _save_library(self):
-        """Save library to disk"""
+        """Load library from disk, importing a legacy library.json once"""
         try:
-            data = {
-                'notebooks': self.notebooks,
-                'active_notebook_id': self.active_notebook_id,
-                'updated_at': datetime.now().isoformat()
-            }
-            with open(self.library_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            if self.library_file.exists() and self.store.get_meta('json_imported') is None:
+                if self.store.count() == 0:
+                    count = self.store.import_json(self.library_file)
+                    print(f"📦 Imported {count} notebooks from {self.library_file.name}")
+                self.store.set_meta('json_imported', datetime.now().isoformat())
+
+            self._refresh()
+            print(f"📚 Loaded library with {len(self.notebooks)} notebooks")
         except Exception as e:
-            print(f"❌ Error saving library: {e}")
+            print(f"⚠️ Error loading library: {e}")
+            self.notebooks = {}
+            self.active_notebook_id = None
+
+    def _refresh(self):
+        """Reload the in-memory view if any process has written since the last load"""
+        revision = self.store.revision()
+        if revision != self._revision:
+            self.notebooks, self.active_notebook_id = self.store.load_all()
+            self._revision = revision
+            self._index = None
 
     def add_notebook(
         self,
@@ -88,10 +104,6 @@ class NotebookLibrary:
         # Generate ID from name
         notebook_id = name.lower().replace(' ', '-').replace('_', '-')
 
-        # Check for duplicates
-        if notebook_id in self.notebooks:
-            raise ValueError(f"Notebook with ID '{notebook_id}' already exists")
-
         # Create notebook object
         notebook = {
             'id': notebook_id,
@@ -108,14 +120,10 @@ class NotebookLibrary:
             'last_used': None
         }
 
-        # Add to library
-        self.notebooks[notebook_id] = notebook
-
-        # Set as active if it's the first notebook
-        if len(self.notebooks) == 1:
-            self.active_notebook_id = notebook_id
-
-        self._save_library()
+        # Add to library (raises ValueError on duplicate ID);
+        # set as active if it's the first notebook
+        self.store.insert(notebook, activate_if_first=True)
+        self._refresh()
 
         print(f"✅ Added notebook: {name} ({notebook_id})")
         return notebook
@@ -130,17 +138,11 @@ class NotebookLibrary:
         Returns:
             True if removed, False if not found
         """
+        self._refresh()
         if notebook_id in self.notebooks:
-            del self.notebooks[notebook_id]
-
-            # Clear active if it was removed
-            if self.active_notebook_id == notebook_id:
-                self.active_notebook_id = None
-                # Set new active if there are other notebooks
-                if self.notebooks:
-                    self.active_notebook_id = list(self.notebooks.keys())[0]
-
-            self._save_library()
+            # Moves the active marker to another notebook if needed
+            self.store.delete(notebook_id)
+            self._refresh()
             print(f"✅ Removed notebook: {notebook_id}")
             return True
 
@@ -168,11 +170,10 @@ class NotebookLibrary:
         Returns:
             Updated notebook object
         """
-        if notebook_id not in self.notebooks:
+        notebook = self.store.get(notebook_id)
+        if notebook is None:
             raise ValueError(f"Notebook not found: {notebook_id}")
 
-        notebook = self.notebooks[notebook_id]
-
         # Update fields if provided
         if name is not None:
             notebook['name'] = name
@@ -191,45 +192,58 @@ class NotebookLibrary:
 
         notebook['updated_at'] = datetime.now().isoformat()
 
-        self._save_library()
+        self.store.update(notebook)
+        self._refresh()
         print(f"✅ Updated notebook: {notebook['name']}")
         return notebook
 
     def get_notebook(self, notebook_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific notebook by ID"""
+        self._refresh()
         return self.notebooks.get(notebook_id)
 
     def list_notebooks(self) -> List[Dict[str, Any]]:
         """List all notebooks in the library"""
+        self._refresh()
         return list(self.notebooks.values())
 
+    def find_by_topic(self, topic: str) -> List[Dict[str, Any]]:
+        """Notebooks with an exact (case-insensitive) topic, via the topic index"""
+        self._refresh()
+        return [self.notebooks[i] for i in self.store.find_by_topic(topic) if i in self.notebooks]
+
+    def find_by_tag(self, tag: str) -> List[Dict[str, Any]]:
+        """Notebooks with an exact (case-insensitive) tag, via the tag index"""
+        self._refresh()
+        return [self.notebooks[i] for i in self.store.find_by_tag(tag) if i in self.notebooks]
+
     def search_notebooks(self, query: str) -> List[Dict[str, Any]]:
         """
         Search notebooks by query
 
         Args:
-            query: Search query (searches name, description, topics, tags)
+            query: Search query (searches name, description, topics, tags, use cases)
 
         Returns:
-            List of matching notebooks
+            List of matching notebooks, most relevant first
         """
-        query_lower = query.lower()
-        results = []
+        return [notebook for notebook, _ in self.rank_notebooks(query, limit=None)]
 
-        for notebook in self.notebooks.values():
-            # Search in various fields
-            searchable = [
-                notebook['name'].lower(),
-                notebook['description'].lower(),
-                ' '.join(notebook['topics']).lower(),
-                ' '.join(notebook['tags']).lower(),
-                ' '.join(notebook.get('use_cases', [])).lower()
-            ]
+    def rank_notebooks(self, query: str, limit: Optional[int] = 10) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Rank notebooks against a query with BM25 (CJK-aware)
 
-            if any(query_lower in field for field in searchable):
-                results.append(notebook)
+        Args:
+            query: Topic, question or keywords
+            limit: Maximum number of results (None = all matches)
 
-        return results
+        Returns:
+            (notebook, score) pairs, best first
+        """
+        self._refresh()
+        if self._index is None:
+            self._index = NotebookIndex(self.notebooks.values())
+        return [(self.notebooks[i], score) for i, score in self._index.search(query, limit=limit)]
 
     def select_notebook(self, notebook_id: str) -> Dict[str, Any]:
         """
@@ -241,11 +255,12 @@ class NotebookLibrary:
         Returns:
             The activated notebook
         """
+        self._refresh()
         if notebook_id not in self.notebooks:
             raise ValueError(f"Notebook not found: {notebook_id}")
 
-        self.active_notebook_id = notebook_id
-        self._save_library()
+        self.store.set_active(notebook_id)
+        self._refresh()
 
         notebook = self.notebooks[notebook_id]
         print(f"✅ Activated notebook: {notebook['name']}")
@@ -253,6 +268,7 @@ class NotebookLibrary:
 
     def get_active_notebook(self) -> Optional[Dict[str, Any]]:
         """Get the currently active notebook"""
+        self._refresh()
         if self.active_notebook_id:
             return self.notebooks.get(self.active_notebook_id)
         return None
@@ -267,18 +283,56 @@ class NotebookLibrary:
         Returns:
             Updated notebook
         """
-        if notebook_id not in self.notebooks:
+        previous_revision = self._revision
+        last_used = datetime.now().isoformat()
+        use_count = self.store.increment_use_count(notebook_id, last_used)
+        if use_count is None:
             raise ValueError(f"Notebook not found: {notebook_id}")
 
-        notebook = self.notebooks[notebook_id]
-        notebook['use_count'] += 1
-        notebook['last_used'] = datetime.now().isoformat()
+        if self.store.revision() != previous_revision + 1 or notebook_id not in self.notebooks:
+            # Someone else wrote in between: reload
+            self._refresh()
+            return self.notebooks[notebook_id]
 
-        self._save_library()
+        # Only our single-row update happened: patch the cached copy
+        self._revision = previous_revision + 1
+        notebook = self.notebooks[notebook_id]
+        notebook['use_count'] = use_count
+        notebook['last_used'] = last_used
         return notebook
 
+    def export_json(self, path: Optional[Path] = None) -> Path:
+        """
+        Export the library in the legacy library.json format (atomic write)
+
+        Args:
+            path: Output file (default: data/library.json)
+
+        Returns:
+            Path written
+        """
+        path = Path(path) if path else self.library_file
+        self.store.export_json(path)
+        return path
+
+    def import_json(self, path: Path, replace: bool = False) -> int:
+        """
+        Import notebooks from a library.json file
+
+        Args:
+            path: File in the legacy library.json format
+            replace: Drop existing notebooks first
+
+        Returns:
+            Number of notebooks imported
+        """
+        count = self.store.import_json(Path(path), replace=replace)
+        self._refresh()
+        return count
+
     def get_stats(self) -> Dict[str, Any]:
         """Get library statistics"""
+        self._refresh()
         total_notebooks = len(self.notebooks)
         total_topics = set()
         total_use_count = 0
@@ -301,7 +355,7 @@ class NotebookLibrary:
             'total_use_count': total_use_count,
             'active_notebook': self.get_active_notebook(),
             'most_used_notebook': most_used,
-            'library_path': str(self.library_file)
+            'library_path': str(self.db_file)
         }
 
 
@@ -338,6 +392,13 @@ def main():
     # Stats command
     subparsers.add_parser('stats', help='Show library statistics')
 
+    # Export / import (legacy library.json format)
+    export_parser = subparsers.add_parser('export', help='Export library as JSON')
+    export_parser.add_argument('--output', help='Output file (default: data/library.json)')
+    import_parser = subparsers.add_parser('import', help='Import library from JSON')
+    import_parser.add_argument('--input', required=True, help='library.json file to import')
+    import_parser.add_argument('--replace', action='store_true', help='Replace existing notebooks')
+
     args = parser.parse_args()
 
     # Initialize library
@@ -373,11 +434,11 @@ def main():
             print("📚 Library is empty. Add notebooks with: notebook_manager.py add")
 
     elif args.command == 'search':
-        results = library.search_notebooks(args.query)
+        results = library.rank_notebooks(args.query)
         if results:
             print(f"\n🔍 Found {len(results)} notebooks:")
-            for notebook in results:
-                print(f"\n  📓 {notebook['name']} ({notebook['id']})")
+            for notebook, score in results:
+                print(f"\n  📓 {notebook['name']} ({notebook['id']})  score={score:.2f}")
                 print(f"     {notebook['description']}")
         else:
             print(f"🔍 No notebooks found for: {args.query}")
@@ -402,6 +463,14 @@ def main():
             print(f"  Most used: {stats['most_used_notebook']['name']} ({stats['most_used_notebook']['use_count']} uses)")
         print(f"  Library path: {stats['library_path']}")
 
+    elif args.command == 'export':
+        path = library.export_json(args.output)
+        print(f"✅ Exported library to: {path}")
+
+    elif args.command == 'import':
+        count = library.import_json(args.input, replace=args.replace)
+        print(f"✅ Imported {count} notebooks")
+
     else:
         parser.print_help()
 
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Long-lived NotebookLM Worker
+Answers newline-delimited JSON commands over stdin/stdout so callers pay the
+Python + patchright start-up cost once instead of once per question
+
+Protocol (one JSON object per line):
+    request:  {"id": 1, "method": "ask", "params": {"question": "...", "notebook_url": "..."}}
+    response: {"id": 1, "result": {...}}  or  {"id": 1, "error": {"type": "...", "message": "..."}}
+    event:    {"event": "ready", "pid": 1234}  /  {"event": "retiring", "questions_served": 50}
+
+Methods: ask, warm, status, list_notebooks, reset
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+# Keep the real stdout for the protocol; everything the skill prints
+# (progress lines, warnings) goes to stderr instead
+_PROTOCOL_OUT = sys.stdout
+sys.stdout = sys.stderr
+
+from auth_manager import AuthManager
+from notebook_manager import NotebookLibrary
+from ask_question import ask_notebooklm_detailed, FOLLOW_UP_REMINDER
+from browser_pool import BrowserPool
+
+
+class NotebookWorker:
+    """
+    Serves NotebookLM commands for a single notebook
+
+    Questions run on a BrowserPool, so notebook pages stay open between
+    questions (--no-pool launches a fresh browser per question instead).
+    Browser work (ask, warm, reset) runs serially on the main thread
+    because the sync Playwright API is bound to the thread that started it.
+    Cheap commands (status, list_notebooks) are answered straight from the
+    reader thread, so they never wait behind a running question.
+    """
+
+    BROWSER_METHODS = {'ask', 'warm', 'reset'}
+
+    def __init__(
+        self,
+        notebook_url: Optional[str] = None,
+        max_questions: int = 50,
+        headless: bool = True,
+        use_pool: bool = True
+    ):
+        self.notebook_url = notebook_url
+        self.max_questions = max_questions
+        self.headless = headless
+        self.use_pool = use_pool
+        self.started_at = time.time()
+        self.questions_served = 0
+
+        self._write_lock = threading.Lock()
+        self._jobs: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._auth: Optional[AuthManager] = None
+        self._library: Optional[NotebookLibrary] = None
+        self._playwright = None
+        self._pool: Optional[BrowserPool] = None
+
+    @property
+    def auth(self) -> AuthManager:
+        if self._auth is None:
+            self._auth = AuthManager()
+        return self._auth
+
+    @property
+    def library(self) -> NotebookLibrary:
+        if self._library is None:
+            self._library = NotebookLibrary()
+        return self._library
+
+    @property
+    def pool(self) -> BrowserPool:
+        """Browser pool, started on first use (main thread only)"""
+        if self._pool is None:
+            from patchright.sync_api import sync_playwright
+            self._playwright = sync_playwright().start()
+            self._pool = BrowserPool(self._playwright, warm_url=self.notebook_url, headless=self.headless)
+        return self._pool
+
+    def close_pool(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+    def send(self, message: Dict[str, Any]):
+        """Write one protocol message to stdout"""
+        line = json.dumps(message, ensure_ascii=False)
+        with self._write_lock:
+            _PROTOCOL_OUT.write(line + "\n")
+            _PROTOCOL_OUT.flush()
+
+    def _reply(self, request_id: Any, result: Any = None, error: Optional[Exception] = None):
+        if error is not None:
+            self.send({
+                'id': request_id,
+                'error': {'type': type(error).__name__, 'message': str(error)}
+            })
+        else:
+            self.send({'id': request_id, 'result': result})
+
+    def _read_requests(self):
+        """Reader thread: parse stdin lines and dispatch them"""
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                self._reply(None, error=ValueError(f"Invalid JSON: {e}"))
+                continue
+
+            method = request.get('method')
+            if method in self.BROWSER_METHODS:
+                self._jobs.put(request)
+            else:
+                self._handle(request)
+
+        # stdin closed: the parent went away
+        self._jobs.put(None)
+
+    def _handle(self, request: Dict[str, Any]):
+        request_id = request.get('id')
+        method = request.get('method')
+        params = request.get('params') or {}
+
+        handler = getattr(self, f"cmd_{method}", None)
+        if handler is None:
+            self._reply(request_id, error=ValueError(f"Unknown method: {method}"))
+            return
+
+        try:
+            self._reply(request_id, result=handler(**params))
+        except Exception as e:
+            self._reply(request_id, error=e)
+
+    # Commands -----------------------------------------------------------
+
+    def cmd_ask(self, question: str, notebook_url: Optional[str] = None,
+                reminder: bool = True) -> Dict[str, Any]:
+        """Answer a question; `reminder` appends FOLLOW_UP_REMINDER (off for tool callers)"""
+        notebook_url = notebook_url or self.notebook_url
+        if not notebook_url:
+            active = self.library.get_active_notebook()
+            if not active:
+                raise ValueError("No notebook URL given and no active notebook in library")
+            notebook_url = active['url']
+
+        if not self.auth.is_authenticated():
+            raise PermissionError("NotebookLM not authenticated. Run: auth_manager.py setup")
+
+        start = time.time()
+        if self.use_pool:
+            print(f"💬 Asking: {question}")
+            answer = self.pool.ask(question, notebook_url)
+        else:
+            answer = ask_notebooklm_detailed(question=question, notebook_url=notebook_url,
+                                             headless=self.headless)['answer']
+        self.questions_served += 1
+
+        if answer is None:
+            raise RuntimeError("Failed to get answer from NotebookLM")
+        if reminder:
+            answer += FOLLOW_UP_REMINDER
+
+        return {
+            'answer': answer,
+            'notebook_url': notebook_url,
+            'duration_ms': int((time.time() - start) * 1000)
+        }
+
+    def cmd_warm(self, notebook_url: Optional[str] = None) -> Dict[str, Any]:
+        """Open a notebook page ahead of the first question"""
+        notebook_url = notebook_url or self.notebook_url
+        if not self.use_pool or not notebook_url or not self.auth.is_authenticated():
+            return {'warmed': False, 'notebook_url': notebook_url}
+
+        start = time.time()
+        if not self.pool.warm_url:
+            self.pool.warm_url = notebook_url  # warm spares follow the first notebook warmed
+        self.pool.warm(notebook_url)
+        return {
+            'warmed': True,
+            'notebook_url': notebook_url,
+            'duration_ms': int((time.time() - start) * 1000)
+        }
+
+    def cmd_status(self) -> Dict[str, Any]:
+        return {
+            'pid': os.getpid(),
+            'notebook_url': self.notebook_url,
+            'authenticated': self.auth.is_authenticated(),
+            'needs_reauth': self.auth.needs_reauth(),
+            'questions_served': self.questions_served,
+            'max_questions': self.max_questions,
+            'uptime_seconds': time.time() - self.started_at,
+            'pending': self._jobs.qsize(),
+            'pool': self._pool.stats() if self._pool is not None else None
+        }
+
+    def cmd_list_notebooks(self) -> Dict[str, Any]:
+        library = self.library
+        return {
+            'notebooks': library.list_notebooks(),
+            'active_notebook_id': library.active_notebook_id
+        }
+
+    def cmd_reset(self) -> Dict[str, Any]:
+        # Drop cached state so the next command re-reads auth and library from
+        # disk and opens fresh browser pages
+        self._auth = None
+        self._library = None
+        self.close_pool()
+        return {'reset': True}
+
+    # Main loop ----------------------------------------------------------
+
+    def serve(self) -> int:
+        """Run until stdin closes or the question budget is spent"""
+        reader = threading.Thread(target=self._read_requests, daemon=True)
+        reader.start()
+
+        self.send({'event': 'ready', 'pid': os.getpid()})
+
+        try:
+            while True:
+                request = self._jobs.get()
+                if request is None:
+                    return 0
+
+                self._handle(request)
+
+                if self.max_questions and self.questions_served >= self.max_questions:
+                    # Exit to bound memory; the client starts a fresh worker on demand
+                    self.send({'event': 'retiring', 'questions_served': self.questions_served})
+                    return 0
+
+                # Idle-time upkeep once the answer is already on its way
+                if self._pool is not None and self._jobs.empty():
+                    try:
+                        self._pool.maintain()
+                    except Exception as e:
+                        print(f"  ⚠️ Pool maintenance failed: {e}")
+        finally:
+            self.close_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Long-lived NotebookLM worker (JSON lines over stdin/stdout)')
+    parser.add_argument('--notebook-url', help='Default notebook URL for ask commands')
+    parser.add_argument('--max-questions', type=int, default=50,
+                        help='Exit after this many questions to bound memory (0 = unlimited)')
+    parser.add_argument('--show-browser', action='store_true', help='Show browser')
+    parser.add_argument('--no-pool', action='store_true',
+                        help='Launch a fresh browser per question instead of pooling pages')
+
+    args = parser.parse_args()
+
+    worker = NotebookWorker(
+        notebook_url=args.notebook_url,
+        max_questions=args.max_questions,
+        headless=not args.show_browser,
+        use_pool=not args.no_pool
+    )
+    return worker.serve()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Cross-process Lock on a Chrome Profile Directory
+Chrome refuses to open a profile another Chrome already holds, so a second
+persistent launch (another ask_question process, a worker, the CLI) fails
+outright. The lock makes it wait its turn instead, up to
+NOTEBOOKLM_PROFILE_LOCK_TIMEOUT seconds.
+
+The lock is an flock on "<profile>.lock" next to the profile; the OS drops
+it when the holder exits, so a crashed process never leaves it stuck. On
+platforms without fcntl the lock is a no-op and Chrome's own check remains.
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from config import PROFILE_LOCK_TIMEOUT
+
+
+class ProfileLock:
+    """Exclusive lock on one profile directory, held until release()"""
+
+    def __init__(self, profile_dir: Union[str, Path], timeout: float = PROFILE_LOCK_TIMEOUT):
+        self.profile_dir = Path(profile_dir)
+        self.path = self.profile_dir.with_name(self.profile_dir.name + ".lock")
+        self.timeout = timeout
+        self._fd: Optional[int] = None
+
+    def acquire(self) -> "ProfileLock":
+        """
+        Wait for the profile to be free
+
+        Raises:
+            TimeoutError: If another process still holds it after `timeout` seconds
+        """
+        if fcntl is None or self._fd is not None:
+            return self
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self._fd = fd
+                return self
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise TimeoutError(
+                        f"Browser profile {self.profile_dir} still in use after {self.timeout:.0f}s; "
+                        f"set NOTEBOOKLM_CONTEXT_MODE=isolated to ask questions concurrently"
+                    )
+                time.sleep(0.2)
+
+    def release(self):
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def __enter__(self) -> "ProfileLock":
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
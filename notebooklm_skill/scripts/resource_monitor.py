@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Process Resource Monitoring for NotebookLM Skill
+Measures resident memory of the browser process tree (Linux /proc)
+
+Chrome runs as children of the Playwright driver, which is a child of this
+Python process, so the browser's memory is the RSS of our descendants.
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PROC = Path("/proc")
+
+
+def _children_map() -> Dict[int, List[int]]:
+    children: Dict[int, List[int]] = {}
+    for entry in PROC.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # Format: pid (comm) state ppid ... ; comm may contain spaces/parens
+        ppid = int(stat[stat.rindex(')') + 2:].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+    return children
+
+
+def _rss_bytes(pid: int) -> int:
+    try:
+        with open(PROC / str(pid) / "statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def process_tree_rss(root_pid: Optional[int] = None, include_root: bool = False) -> Optional[int]:
+    """
+    Total RSS of a process's descendants
+
+    Args:
+        root_pid: Root of the tree (default: this process)
+        include_root: Count the root process itself
+
+    Returns:
+        Bytes, or None where /proc is unavailable (macOS, Windows)
+    """
+    if not PROC.exists():
+        return None
+
+    root_pid = root_pid or os.getpid()
+    children = _children_map()
+
+    total = _rss_bytes(root_pid) if include_root else 0
+    stack = list(children.get(root_pid, []))
+    while stack:
+        pid = stack.pop()
+        total += _rss_bytes(pid)
+        stack.extend(children.get(pid, []))
+    return total
+
+
+class PeakRSSSampler:
+    """
+    Samples process-tree RSS in a background thread and keeps the peak
+
+    Usage:
+        with PeakRSSSampler() as sampler:
+            ...  # browser work
+        print(sampler.peak_bytes)
+    """
+
+    def __init__(self, root_pid: Optional[int] = None, interval: float = 0.2):
+        self.root_pid = root_pid
+        self.interval = interval
+        self.peak_bytes: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sample(self) -> Optional[int]:
+        rss = process_tree_rss(self.root_pid)
+        if rss is not None and (self.peak_bytes is None or rss > self.peak_bytes):
+            self.peak_bytes = rss
+        return rss
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "PeakRSSSampler":
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.sample()
+        return False
+
+
+def format_bytes(size: Optional[int]) -> str:
+    """Human-readable size"""
+    if size is None:
+        return "n/a"
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+if __name__ == "__main__":
+    print(f"Process tree RSS: {format_bytes(process_tree_rss(include_root=True))}")
@@ -55,6 +55,8 @@ def main():
         print("  session_manager.py  - Manage sessions")
         print("  auth_manager.py     - Handle authentication")
         print("  cleanup_manager.py  - Clean up skill data")
+        print("  notebook_worker.py  - Long-lived JSON-lines worker")
+        print("  browser_benchmark.py - Compare standard vs lean browser mode")
         sys.exit(1)
 
     script_name = sys.argv[1]
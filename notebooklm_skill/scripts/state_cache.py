@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Shared Cache for the Browser State File (state.json)
+Parses state.json once per modification and answers cookie/expiry questions
+
+Used by BrowserFactory (cookie injection) and AuthManager (status checks) so
+neither re-reads or re-stats the file on every call.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import STATE_FILE, COOKIE_DOMAINS, AUTH_COOKIE_NAMES
+
+
+class StateFileCache:
+    """
+    Cached view of one Playwright storage-state file
+
+    The parsed file is kept until its (mtime, size) changes, and cookies are
+    pre-filtered to the Google domains NotebookLM actually needs.
+    """
+
+    def __init__(self, path: Path = STATE_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[Tuple[int, int]] = None
+        self._stat: Optional[os.stat_result] = None
+        self._state: Optional[Dict[str, Any]] = None
+        self._cookies: List[Dict[str, Any]] = []
+
+    def refresh(self) -> Optional[Tuple[int, int]]:
+        """
+        Stat the file once and re-parse it only if it changed
+
+        Returns:
+            (mtime_ns, size) fingerprint, or None if the file does not exist
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            with self._lock:
+                self._fingerprint = self._stat = self._state = None
+                self._cookies = []
+            return None
+
+        fingerprint = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            self._stat = stat
+            if fingerprint != self._fingerprint:
+                with open(self.path, 'r') as f:
+                    self._state = json.load(f)
+                self._cookies = [
+                    c for c in self._state.get('cookies', [])
+                    if _domain_needed(c.get('domain', ''))
+                ]
+                self._fingerprint = fingerprint
+        return fingerprint
+
+    @property
+    def fingerprint(self) -> Optional[Tuple[int, int]]:
+        return self._fingerprint
+
+    def exists(self) -> bool:
+        return self.refresh() is not None
+
+    def age_seconds(self) -> Optional[float]:
+        """Seconds since state.json was last written"""
+        if self.refresh() is None:
+            return None
+        return time.time() - self._stat.st_mtime
+
+    def state(self) -> Optional[Dict[str, Any]]:
+        """Full parsed storage state"""
+        self.refresh()
+        return self._state
+
+    def cookies(self) -> List[Dict[str, Any]]:
+        """Cookies for the needed Google domains only"""
+        self.refresh()
+        return list(self._cookies)
+
+    def expires_at(self) -> Optional[float]:
+        """
+        Earliest expiry (epoch seconds) of the Google auth cookies
+
+        Session cookies (expires == -1) carry no expiry and are ignored.
+        Falls back to every needed cookie if no known auth cookie is present.
+        """
+        cookies = self.cookies()
+        auth_cookies = [c for c in cookies if c.get('name') in AUTH_COOKIE_NAMES] or cookies
+        expiries = [c['expires'] for c in auth_cookies if (c.get('expires') or -1) > 0]
+        return min(expiries) if expiries else None
+
+    def expires_in(self) -> Optional[float]:
+        """Seconds until the earliest auth cookie expires (negative if already expired)"""
+        expires_at = self.expires_at()
+        return None if expires_at is None else expires_at - time.time()
+
+    def is_expiring(self, margin_seconds: float = 0) -> bool:
+        """True if an auth cookie expires within margin_seconds (or already has)"""
+        expires_in = self.expires_in()
+        return expires_in is not None and expires_in <= margin_seconds
+
+
+def _domain_needed(domain: str) -> bool:
+    return domain.lstrip('.') in COOKIE_DOMAINS
+
+
+_caches: Dict[Path, StateFileCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_state_cache(path: Path = STATE_FILE) -> StateFileCache:
+    """Get the process-wide cache for a state file"""
+    path = Path(path)
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = StateFileCache(path)
+        return cache
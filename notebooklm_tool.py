@@ -10,8 +10,14 @@ Requires:
 
 import os
 import sys
+import json
+import asyncio
+import signal
 import subprocess
 from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from scheduler import get_scheduler
 
 # Path to notebooklm_skill
 NOTEBOOKLM_SKILL_PATH = Path(__file__).parent / "notebooklm_skill" / "scripts"
@@ -23,22 +29,286 @@ NOTEBOOKLM_PYTHON = NOTEBOOKLM_SKILL_ROOT / ".venv" / "bin" / "python"
 if str(NOTEBOOKLM_SKILL_PATH) not in sys.path:
     sys.path.insert(0, str(NOTEBOOKLM_SKILL_PATH))
 
+# Long-lived worker settings (see notebooklm_skill/scripts/notebook_worker.py)
+WORKER_REQUEST_TIMEOUT = 300  # 5 minutes, same as the one-shot subprocess
+WORKER_LOG_FILE = NOTEBOOKLM_SKILL_ROOT / "data" / "worker.log"
+
+
+class WorkerError(Exception):
+    """Raised when the NotebookLM worker reports an error or dies."""
+
+    def __init__(self, error_type: str, message: str):
+        super().__init__(message)
+        self.error_type = error_type
+
+
+class NotebookWorker:
+    """Client for one long-lived notebook_worker.py child process.
+
+    Requests are newline-delimited JSON with an ``id``; a background reader
+    task resolves the matching future when the worker answers, so several
+    callers can have requests in flight at once. The worker is (re)started
+    lazily: after a crash, or after it retires itself on reaching
+    ``max_questions``.
+    """
+
+    def __init__(self, notebook_url: Optional[str] = None, max_questions: int = 50):
+        self.notebook_url = notebook_url
+        self.max_questions = max_questions
+        self.restarts = 0
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+        # request id -> (process it was sent to, future of its reply)
+        self._pending: Dict[int, Tuple[asyncio.subprocess.Process, asyncio.Future]] = {}
+        self._next_id = 0
+        self._start_lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    async def start(self):
+        """Start the worker process if it is not already running."""
+        async with self._start_lock:
+            if self.running:
+                return
+            if self._process is not None:
+                self.restarts += 1
+
+            cmd = [
+                str(NOTEBOOKLM_PYTHON),
+                str(NOTEBOOKLM_SKILL_PATH / "notebook_worker.py"),
+                "--max-questions", str(self.max_questions),
+            ]
+            if self.notebook_url:
+                cmd += ["--notebook-url", self.notebook_url]
+
+            WORKER_LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with open(WORKER_LOG_FILE, "ab") as log:
+                self._process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=log,
+                    cwd=NOTEBOOKLM_SKILL_PATH.parent,
+                )
+            self._reader = asyncio.create_task(self._read_responses(self._process))
+
+    async def _read_responses(self, process: asyncio.subprocess.Process):
+        """Resolve pending futures as responses arrive; fail them on EOF.
+
+        Only requests sent to `process` are failed when it exits: a retry
+        may already be waiting on its replacement.
+        """
+        while True:
+            line = await process.stdout.readline()
+            if not line:
+                break
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            entry = self._pending.get(message.get("id"))
+            if entry is None or entry[0] is not process:
+                continue  # events ("ready", "retiring") and orphaned replies
+            future = self._pending.pop(message["id"])[1]
+            if future.done():
+                continue
+
+            if "error" in message:
+                error = message["error"] or {}
+                future.set_exception(
+                    WorkerError(error.get("type", "Error"), error.get("message", ""))
+                )
+            else:
+                future.set_result(message.get("result"))
+
+        await process.wait()
+        orphaned = [request_id for request_id, (owner, _) in self._pending.items() if owner is process]
+        for request_id in orphaned:
+            future = self._pending.pop(request_id)[1]
+            if not future.done():
+                future.set_exception(
+                    WorkerError("WorkerExited", f"worker exited with code {process.returncode}")
+                )
+
+    async def request(
+        self,
+        method: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: float = WORKER_REQUEST_TIMEOUT,
+    ) -> Any:
+        """Send one command and wait for its result.
+
+        Retries once on a fresh worker if the current one exits while the
+        request is in flight.
+        """
+        for attempt in range(2):
+            await self.start()
+
+            process = self._process
+            self._next_id += 1
+            request_id = self._next_id
+            future = asyncio.get_running_loop().create_future()
+            self._pending[request_id] = (process, future)
+
+            line = json.dumps({"id": request_id, "method": method, "params": params or {}})
+            try:
+                process.stdin.write(line.encode("utf-8") + b"\n")
+                await process.stdin.drain()
+                return await asyncio.wait_for(future, timeout=timeout)
+            except (BrokenPipeError, ConnectionResetError):
+                self._pending.pop(request_id, None)
+                if attempt:
+                    raise WorkerError("WorkerExited", "worker pipe closed")
+                await process.wait()
+            except WorkerError as e:
+                if e.error_type != "WorkerExited" or attempt:
+                    raise
+            except asyncio.TimeoutError:
+                self._pending.pop(request_id, None)
+                await self.close()  # a hung browser is not worth keeping
+                raise
+
+    async def close(self):
+        """Stop the worker process."""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        if process.returncode is None:
+            try:
+                process.stdin.close()
+                await asyncio.wait_for(process.wait(), timeout=5)
+            except (asyncio.TimeoutError, BrokenPipeError, ConnectionResetError):
+                process.kill()
+                await process.wait()
+        if self._reader is not None:
+            await self._reader
+            self._reader = None
+
+
+# One worker for the whole process, shared by all run_search calls: its
+# browser holds the profile, so a second one could not launch Chrome. Every
+# request names its notebook.
+_worker: Optional[NotebookWorker] = None
+
+
+def _use_worker() -> bool:
+    """Whether run_search should go through a long-lived worker."""
+    return os.getenv("NOTEBOOKLM_WORKER", "").lower() in ("1", "true", "yes")
+
+
+def get_worker() -> NotebookWorker:
+    """Get (or create) the process-wide worker; it serves every notebook."""
+    global _worker
+    if _worker is None:
+        max_questions = int(os.getenv("NOTEBOOKLM_WORKER_MAX_QUESTIONS", "50"))
+        _worker = NotebookWorker(max_questions=max_questions)
+    return _worker
+
+
+async def shutdown_workers():
+    """Stop the NotebookLM worker started by this process."""
+    global _worker
+    worker, _worker = _worker, None
+    if worker is not None:
+        await worker.close()
+
+
+_library = None
+
+
+def _get_library():
+    """Get the shared NotebookLibrary (None if it cannot be opened)."""
+    global _library
+    if _library is None:
+        try:
+            from notebook_manager import NotebookLibrary
+            _library = NotebookLibrary()
+        except Exception:
+            return None
+    return _library
+
+
+def _parallel_browsers() -> bool:
+    """Whether several questions can each have a browser open at once.
+
+    Only one-shot questions in isolated mode can: a persistent profile is
+    locked by the Chrome that has it open, and the worker runs its browser
+    work one question at a time.
+    """
+    isolated = os.getenv("NOTEBOOKLM_CONTEXT_MODE", "persistent").lower() == "isolated"
+    return isolated and not _use_worker()
+
+
+def _routing_enabled() -> bool:
+    return os.getenv("NOTEBOOK_ROUTING", "true").lower() not in ("0", "false", "no")
+
 
-def _get_notebook_url() -> str:
-    """Get NotebookLM notebook URL from environment.
+def route_notebook(query: str, limit: int = 1) -> list:
+    """Rank library notebooks for a query.
+
+    Args:
+        query: Topic or question text.
+        limit: Maximum number of notebooks to return.
 
     Returns:
-        Notebook URL string.
+        Notebook dicts, best match first, scoring at least NOTEBOOK_ROUTING_MIN_SCORE.
     """
-    # Try to get from environment
+    library = _get_library()
+    if library is None or not query:
+        return []
+
+    min_score = float(os.getenv("NOTEBOOK_ROUTING_MIN_SCORE", "0.5"))
+    try:
+        ranked = library.rank_notebooks(query, limit=limit)
+    except Exception:
+        return []
+    return [notebook for notebook, score in ranked if score >= min_score]
+
+
+def _pinned_notebook_url() -> Optional[str]:
+    """The notebook pinned by NOTEBOOK_URL or NOTEBOOK_ID, if any."""
     url = os.getenv("NOTEBOOK_URL")
     if url:
         return url
 
-    # Try to construct from NOTEBOOK_ID
     notebook_id = os.getenv("NOTEBOOK_ID")
     if notebook_id:
         return f"https://notebooklm.google.com/notebook/{notebook_id}"
+    return None
+
+
+def _get_notebook_url(query: Optional[str] = None) -> str:
+    """Get the NotebookLM notebook URL for a query.
+
+    Resolution order: NOTEBOOK_URL, NOTEBOOK_ID, the best library match for
+    the query (BM25 routing), the library's active notebook, and finally
+    the NotebookLM home page. A pinned notebook is never routed away from.
+
+    Args:
+        query: Optional topic/question used to route to a library notebook.
+
+    Returns:
+        Notebook URL string.
+    """
+    # Try to get from environment
+    url = _pinned_notebook_url()
+    if url:
+        return url
+
+    if query and _routing_enabled():
+        routed = route_notebook(query)
+        if routed:
+            return routed[0]["url"]
+
+    # Fall back to the library's active notebook
+    library = _get_library()
+    if library is not None:
+        active = library.get_active_notebook()
+        if active:
+            return active["url"]
 
     # Default fallback
     return "https://notebooklm.google.com"
@@ -65,9 +335,152 @@ def _check_authenticated() -> bool:
         return False
 
 
+class SearchError(Exception):
+    """A failed NotebookLM query; the message is ready to hand to the model."""
+
+
+def _auth_error_message() -> str:
+    return (
+        "Error: NotebookLM not authenticated. "
+        f"Please run: cd {NOTEBOOKLM_SKILL_PATH.parent} && python scripts/run.py auth_manager.py setup"
+    )
+
+
+async def _ask_notebook(query: str, notebook_url: str, timeout: float = 300) -> str:
+    """Ask one notebook and return the raw answer text.
+
+    Goes through the long-lived worker when NOTEBOOKLM_WORKER is enabled,
+    otherwise runs ask_question.py in a subprocess (off the event loop, so
+    several notebooks can be queried at once). Either way only the
+    answer comes back: no progress lines, framing or follow-up reminder.
+    Each question holds a "browser" slot of the scheduler while it runs;
+    `timeout` starts once the slot is granted.
+
+    Raises:
+        SearchError: If the query fails or times out.
+    """
+    async with get_scheduler().slot("browser"):
+        return await _ask_notebook_now(query, notebook_url, timeout)
+
+
+async def _ask_notebook_now(query: str, notebook_url: str, timeout: float) -> str:
+    if _use_worker():
+        try:
+            result = await get_worker().request(
+                "ask", {"question": query, "notebook_url": notebook_url, "reminder": False},
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            raise SearchError(f"Search timeout for '{query}' - took too long to respond")
+        except WorkerError as e:
+            if e.error_type == "PermissionError":
+                raise SearchError(_auth_error_message())
+            raise SearchError(f"Search failed for '{query}': {e}")
+        except Exception as e:
+            raise SearchError(f"Error searching for '{query}': {str(e)}")
+        return ((result or {}).get("answer") or "").strip()
+
+    try:
+        # Run the ask_question.py script via run.py wrapper
+        # Use notebooklm_skill's own venv Python to ensure correct dependencies
+        result = await _run_skill(
+            [
+                str(NOTEBOOKLM_PYTHON),
+                str(NOTEBOOKLM_SKILL_PATH / "run.py"),
+                "ask_question.py",
+                "--question", query,
+                "--notebook-url", notebook_url,
+                "--json",
+            ],
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        raise SearchError(f"Search timeout for '{query}' - took too long to respond")
+    except Exception as e:
+        raise SearchError(f"Error searching for '{query}': {str(e)}")
+
+    # The result object is always printed unless ask_question.py crashed
+    payload = parse_answer_json(result.stdout) or {"answer": None, "error": None}
+    error = payload.get("error")
+    if error or result.returncode != 0 or payload.get("answer") is None:
+        error = error or {}
+        if error.get("type") == "PermissionError":
+            raise SearchError(_auth_error_message())
+        message = error.get("message") or (result.stderr or "").strip() or "Unknown error"
+        raise SearchError(f"Search failed for '{query}': {message}")
+    return (payload.get("answer") or "").strip()
+
+
+async def _run_skill(cmd: list, timeout: float) -> subprocess.CompletedProcess:
+    """Run a one-shot skill command without blocking the event loop.
+
+    The command gets its own process group (run.py starts the script, which
+    starts Playwright and Chrome), and the whole group is stopped if the
+    call times out or is cancelled, so an abandoned question does not keep
+    a browser running after its scheduler slot is released.
+
+    Raises:
+        asyncio.TimeoutError: If the command runs longer than `timeout`.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=NOTEBOOKLM_SKILL_PATH.parent,
+        start_new_session=os.name != "nt",
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+    except BaseException:  # timeout or cancellation
+        await asyncio.shield(_stop_process_group(process))
+        raise
+    return subprocess.CompletedProcess(
+        cmd, process.returncode,
+        stdout.decode("utf-8", errors="replace"), stderr.decode("utf-8", errors="replace"),
+    )
+
+
+async def _stop_process_group(process: asyncio.subprocess.Process, grace: float = 5):
+    """SIGTERM a process's group (Playwright then closes its browsers), SIGKILL after `grace`."""
+    def signal_group(sig):
+        try:
+            if os.name == "nt":
+                process.kill()
+            else:
+                os.killpg(process.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    signal_group(signal.SIGTERM)
+    try:
+        await asyncio.wait_for(process.wait(), timeout=grace)
+    except asyncio.TimeoutError:
+        signal_group(getattr(signal, "SIGKILL", signal.SIGTERM))
+        await process.wait()
+
+
+def parse_answer_json(stdout: str) -> Optional[Dict[str, Any]]:
+    """The result object of `ask_question.py --json` (its last stdout line).
+
+    Returns None if stdout holds no such object.
+    """
+    for line in reversed((stdout or "").strip().splitlines()):
+        try:
+            payload = json.loads(line)
+        except json.JSONDecodeError:
+            return None
+        return payload if isinstance(payload, dict) and "answer" in payload else None
+    return None
+
+
 async def run_search(query: str) -> str:
     """Search for information using NotebookLM skill.
 
+    With NOTEBOOK_SCATTER_TOP_K > 1, isolated browser contexts and no
+    notebook pinned by NOTEBOOK_URL or NOTEBOOK_ID, the query fans out to
+    the best-matching library notebooks (see scatter_gather_search);
+    otherwise it goes to the single notebook chosen by _get_notebook_url.
+
     Args:
         query: The search query string.
 
@@ -85,47 +498,116 @@ async def run_search(query: str) -> str:
             "Please clone https://github.com/PleasePrompto/notebooklm-skill to notebooklm_skill/"
         )
 
-    # Check authentication
-    if not _check_authenticated():
-        return (
-            "Error: NotebookLM not authenticated. "
-            f"Please run: cd {NOTEBOOKLM_SKILL_PATH.parent} && python scripts/run.py auth_manager.py setup"
-        )
+    # The worker checks authentication itself; the one-shot path checks up front
+    if not _use_worker() and not _check_authenticated():
+        return _auth_error_message()
 
-    notebook_url = _get_notebook_url()
+    top_k = int(os.getenv("NOTEBOOK_SCATTER_TOP_K", "1"))
+    if top_k > 1 and _parallel_browsers() and not _pinned_notebook_url():
+        notebooks = route_notebook(query, limit=top_k)
+        if len(notebooks) > 1:
+            deadline = float(os.getenv("NOTEBOOK_SCATTER_DEADLINE", "120"))
+            return await scatter_gather_search(query, notebooks, deadline=deadline)
+
+    notebook_url = _get_notebook_url(query)
 
     try:
-        # Run the ask_question.py script via run.py wrapper
-        # Use notebooklm_skill's own venv Python to ensure correct dependencies
-        result = subprocess.run(
-            [
-                str(NOTEBOOKLM_PYTHON),
-                str(NOTEBOOKLM_SKILL_PATH / "run.py"),
-                "ask_question.py",
-                "--question", query,
-                "--notebook-url", notebook_url,
-            ],
-            capture_output=True,
-            text=True,
-            cwd=NOTEBOOKLM_SKILL_PATH.parent,
-            timeout=300,  # 5 minutes timeout
-        )
+        output = await _ask_notebook(query, notebook_url)
+    except SearchError as e:
+        return str(e)
 
-        if result.returncode != 0:
-            error_msg = result.stderr.strip() if result.stderr else "Unknown error"
-            return f"Search failed for '{query}': {error_msg}"
+    if output:
+        return f"Search results for '{query}':\n{output}"
+    else:
+        return f"No results found for '{query}'"
 
-        # Return stdout which contains the answer
-        output = result.stdout.strip()
-        if output:
-            return f"Search results for '{query}':\n{output}"
-        else:
-            return f"No results found for '{query}'"
 
-    except subprocess.TimeoutExpired:
-        return f"Search timeout for '{query}' - took too long to respond"
-    except Exception as e:
-        return f"Error searching for '{query}': {str(e)}"
+async def scatter_gather_search(query: str, notebooks: list, deadline: float = 120) -> str:
+    """Query several notebooks in parallel and merge their answers.
+
+    Every notebook gets the same deadline; answers that are not back by then
+    are dropped (and their queries cancelled) instead of stalling the article.
+    The questions run side by side, so this needs isolated browser contexts
+    (NOTEBOOKLM_CONTEXT_MODE=isolated); run_search only calls it then.
+
+    Args:
+        query: The search query string.
+        notebooks: Library notebook dicts, most relevant first.
+        deadline: Seconds to wait for each notebook.
+
+    Returns:
+        Merged answers with per-notebook attribution.
+    """
+    tasks = {
+        asyncio.create_task(_ask_notebook(query, notebook["url"], timeout=deadline)): notebook
+        for notebook in notebooks
+    }
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    # Cancelled queries stop their browsers before their slots are released
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    answers = []
+    dropped = []
+    for task, notebook in tasks.items():  # keep relevance order
+        if task in pending:
+            dropped.append(f"{notebook['name']} (timeout)")
+        elif task.exception() is not None:
+            dropped.append(f"{notebook['name']} ({task.exception()})")
+        elif task.result():
+            answers.append((notebook["name"], task.result()))
+
+    if not answers:
+        reasons = "; ".join(dropped) or "no answers"
+        return f"Search failed for '{query}': {reasons}"
+
+    return merge_answers(query, answers, dropped)
+
+
+def _passage_key(passage: str) -> set:
+    from notebook_index import tokenize
+    return set(tokenize(passage))
+
+
+def merge_answers(query: str, answers: list, dropped: Optional[list] = None, threshold: float = 0.8) -> str:
+    """Merge answers from several notebooks, dropping overlapping passages.
+
+    A passage (paragraph) is dropped when most of its terms already appeared
+    in a passage kept earlier, so higher-ranked notebooks win ties.
+
+    Args:
+        query: The search query string.
+        answers: (notebook name, answer text) pairs, most relevant first.
+        dropped: Notebooks that failed or missed the deadline.
+        threshold: Share of a passage's terms that must be covered to count as a duplicate.
+
+    Returns:
+        Search results with one section per notebook.
+    """
+    kept_keys: list = []
+    sections = []
+
+    for name, answer in answers:
+        passages = []
+        for passage in answer.split("\n"):
+            passage = passage.strip()
+            if not passage:
+                continue
+            key = _passage_key(passage)
+            if key and any(len(key & seen) / len(key) >= threshold for seen in kept_keys):
+                continue
+            if key:
+                kept_keys.append(key)
+            passages.append(passage)
+        if passages:
+            sections.append(f"### Source: {name}\n" + "\n".join(passages))
+
+    header = f"Search results for '{query}' ({len(answers)} notebooks):"
+    result = header + "\n\n" + "\n\n".join(sections)
+    if dropped:
+        result += "\n\n(No answer from: " + "; ".join(dropped) + ")"
+    return result
 
 
 def setup_authentication():
@@ -0,0 +1,545 @@
+"""Indexed store for generated articles.
+
+Every report written to OUTPUT_DIR is recorded in a SQLite index next to it
+(index.db) with its topic, normalized topic, trace_id, provider, prompt
+version, content hash, size and timings. Lookups by topic, trace or hash are
+index seeks instead of a scan of output/, and byte-identical articles are
+flagged (or refused) at save time. The NotebookLM retrievals behind each
+report are kept too, so later runs on similar topics can reuse them, as are
+the model turns (tokens and latency) each report cost.
+
+CLI:
+    python output_store.py list [--limit N]
+    python output_store.py topic "产品经理需要参与技术选型"
+    python output_store.py similar "产品经理要懂技术选型"
+    python output_store.py trace trace_20260130_115903_4439bda4
+    python output_store.py duplicates
+    python output_store.py usage --by prompt_version
+    python output_store.py reindex        # index .md files already in output/
+    python output_store.py stats
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import unicodedata
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+INDEX_FILE_NAME = "index.db"
+
+# What to do with an article whose content hash is already in the index
+DEDUP_MODES = ("flag", "refuse", "off")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    topic TEXT NOT NULL,
+    normalized_topic TEXT NOT NULL,
+    trace_id TEXT UNIQUE,
+    provider TEXT,
+    prompt_version TEXT,
+    content_hash TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    timings TEXT NOT NULL DEFAULT '{}',
+    duplicate_of INTEGER REFERENCES reports(id)
+);
+CREATE INDEX IF NOT EXISTS idx_reports_normalized_topic ON reports(normalized_topic);
+CREATE INDEX IF NOT EXISTS idx_reports_content_hash ON reports(content_hash);
+CREATE INDEX IF NOT EXISTS idx_reports_created_at ON reports(created_at);
+CREATE TABLE IF NOT EXISTS retrievals (
+    id INTEGER PRIMARY KEY,
+    trace_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    query TEXT NOT NULL,
+    result TEXT NOT NULL,
+    duration_ms INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_retrievals_trace_id ON retrievals(trace_id);
+CREATE TABLE IF NOT EXISTS usage_turns (
+    id INTEGER PRIMARY KEY,
+    trace_id TEXT NOT NULL,
+    turn INTEGER NOT NULL,
+    agent TEXT,
+    latency_ms INTEGER,
+    input_tokens INTEGER NOT NULL DEFAULT 0,
+    output_tokens INTEGER NOT NULL DEFAULT 0,
+    cached_tokens INTEGER NOT NULL DEFAULT 0,
+    reasoning_tokens INTEGER NOT NULL DEFAULT 0,
+    total_tokens INTEGER NOT NULL DEFAULT 0,
+    response_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_usage_turns_trace_id ON usage_turns(trace_id);
+"""
+
+# Columns a usage summary can be grouped by
+USAGE_GROUPS = ("prompt_version", "provider", "normalized_topic")
+
+# Header written by main.save_report (used to index existing files)
+_HEADER_TOPIC = re.compile(r"^# (.+)$", re.M)
+_HEADER_TRACE = re.compile(r"^\*\*Trace ID:\*\* (\S+)", re.M)
+_HEADER_GENERATED = re.compile(r"^\*\*Generated:\*\* (\S+)", re.M)
+_HEADER_END = "\n---\n\n"
+
+
+def normalize_topic(topic: str) -> str:
+    """Canonical form of a topic for exact-match lookups.
+
+    NFKC-folds full-width characters, lowercases, and drops whitespace and
+    punctuation, so "  产品经理，需要参与技术选型？" and "产品经理需要参与技术选型"
+    normalize to the same key.
+    """
+    text = unicodedata.normalize("NFKC", topic).lower()
+    return "".join(ch for ch in text if ch.isalnum())
+
+
+def topic_ngrams(topic: str, n: int = 2) -> set:
+    """Character n-grams of the normalized topic (CJK topics have no spaces)."""
+    text = normalize_topic(topic)
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def topic_similarity(a: str, b: str) -> float:
+    """Dice coefficient over character bigrams of two topics (0..1)."""
+    grams_a, grams_b = topic_ngrams(a), topic_ngrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    return 2 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+
+
+def content_hash(content: str) -> str:
+    """SHA-256 of the article body (the part that excludes the per-run header)."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def dedup_mode() -> str:
+    mode = os.getenv("OUTPUT_DEDUP", "flag").lower()
+    return mode if mode in DEDUP_MODES else "flag"
+
+
+class OutputStore:
+    """SQLite index of the reports in one output directory.
+
+    Report paths are stored resolved (absolute), so the index means the same
+    from any working directory and for any spelling of the output directory.
+    """
+
+    def __init__(self, output_dir: Path):
+        """
+        Args:
+            output_dir: Directory holding the reports; the index lives inside it.
+        """
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.db_file = self.output_dir / INDEX_FILE_NAME
+
+        self._conn = sqlite3.connect(str(self.db_file), timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._resolve_relative_paths()
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self) -> "OutputStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction holding the database write lock."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _key(path: Path) -> str:
+        """How a report path is stored in the index."""
+        return str(Path(path).resolve())
+
+    def _resolve_relative_paths(self):
+        """Rewrite paths indexed relative to an earlier working directory."""
+        rows = [row for row in self._conn.execute("SELECT id, path FROM reports").fetchall()
+                if not Path(row["path"]).is_absolute()]
+        if not rows:
+            return
+        root = self.output_dir.resolve()
+        updates = []
+        for row in rows:
+            relative = Path(row["path"])
+            # The report's own directory: the output dir itself or a subdirectory (archive/)
+            for candidate in (root / relative.name, root / relative.parent.name / relative.name):
+                if candidate.exists():
+                    updates.append((str(candidate), row["id"]))
+                    break
+        if updates:
+            with self.transaction() as conn:
+                conn.executemany("UPDATE OR IGNORE reports SET path = ? WHERE id = ?", updates)
+
+    @staticmethod
+    def _row(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        record = dict(row)
+        record["timings"] = json.loads(record.get("timings") or "{}")
+        return record
+
+    # Reads --------------------------------------------------------------
+
+    def by_trace(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT * FROM reports WHERE trace_id = ?", (trace_id,)).fetchone()
+        return self._row(row)
+
+    def by_topic(self, topic: str) -> List[Dict[str, Any]]:
+        """Reports whose normalized topic equals the topic's, newest first."""
+        rows = self._conn.execute(
+            "SELECT * FROM reports WHERE normalized_topic = ? ORDER BY created_at DESC",
+            (normalize_topic(topic),),
+        ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def by_hash(self, digest: str) -> Optional[Dict[str, Any]]:
+        """The earliest report with this content hash."""
+        row = self._conn.execute(
+            "SELECT * FROM reports WHERE content_hash = ? ORDER BY id LIMIT 1", (digest,)
+        ).fetchone()
+        return self._row(row)
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        rows = self._conn.execute(
+            "SELECT * FROM reports ORDER BY created_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def duplicates(self) -> List[Dict[str, Any]]:
+        rows = self._conn.execute(
+            "SELECT * FROM reports WHERE duplicate_of IS NOT NULL ORDER BY created_at DESC"
+        ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+    def similar(self, topic: str, limit: int = 3, min_score: float = 0.6,
+                with_retrievals: bool = False) -> List[Dict[str, Any]]:
+        """Newest original report per topic, ranked by similarity to `topic`.
+
+        Each distinct normalized topic is scored once, through its newest
+        non-duplicate report, so the cost grows with topics rather than runs.
+
+        Args:
+            with_retrievals: Only consider reports with recorded retrievals,
+                so a later run that made no searches of its own does not
+                hide the material of an earlier one.
+
+        Returns:
+            Report records with an added `similarity` field, best first.
+        """
+        having = (" AND EXISTS (SELECT 1 FROM retrievals WHERE retrievals.trace_id = reports.trace_id)"
+                  if with_retrievals else "")
+        rows = self._conn.execute(
+            "SELECT * FROM reports WHERE id IN ("
+            f"  SELECT MAX(id) FROM reports WHERE duplicate_of IS NULL{having} GROUP BY normalized_topic"
+            ")"
+        ).fetchall()
+        scored = []
+        for row in rows:
+            score = topic_similarity(topic, row["topic"])
+            if score >= min_score:
+                record = self._row(row)
+                record["similarity"] = score
+                scored.append(record)
+        scored.sort(key=lambda r: (r["similarity"], r["created_at"]), reverse=True)
+        return scored[:limit]
+
+    def retrievals(self, trace_id: str) -> List[Dict[str, Any]]:
+        """Recorded NotebookLM retrievals of a trace, in call order."""
+        rows = self._conn.execute(
+            "SELECT query, result, duration_ms FROM retrievals WHERE trace_id = ? ORDER BY position",
+            (trace_id,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def usage(self, trace_id: str) -> List[Dict[str, Any]]:
+        """Recorded model turns (tokens and latency) of a trace, in order."""
+        rows = self._conn.execute(
+            "SELECT turn, agent, latency_ms, input_tokens, output_tokens, cached_tokens, "
+            "reasoning_tokens, total_tokens, response_id FROM usage_turns "
+            "WHERE trace_id = ? ORDER BY turn",
+            (trace_id,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def usage_summary(self, by: str = "prompt_version") -> List[Dict[str, Any]]:
+        """Average cost per article, grouped by a report column.
+
+        Only reports with recorded usage count. Seconds per article come from
+        the report's total_ms timing.
+
+        Returns:
+            One dict per group: articles, turns, input/output/cached/total
+            tokens and seconds, all per article.
+        """
+        if by not in USAGE_GROUPS:
+            raise ValueError(f"Unknown grouping: {by} (expected one of {USAGE_GROUPS})")
+        rows = self._conn.execute(
+            f"SELECT r.{by} AS {by}, COUNT(*) AS articles, AVG(u.turns) AS turns, "
+            "AVG(u.input_tokens) AS input_tokens, AVG(u.output_tokens) AS output_tokens, "
+            "AVG(u.cached_tokens) AS cached_tokens, AVG(u.total_tokens) AS total_tokens, "
+            "AVG(json_extract(r.timings, '$.total_ms')) / 1000.0 AS seconds "
+            "FROM reports r JOIN ("
+            "  SELECT trace_id, COUNT(*) AS turns, SUM(input_tokens) AS input_tokens, "
+            "  SUM(output_tokens) AS output_tokens, SUM(cached_tokens) AS cached_tokens, "
+            "  SUM(total_tokens) AS total_tokens FROM usage_turns GROUP BY trace_id"
+            ") u ON u.trace_id = r.trace_id "
+            f"GROUP BY r.{by} ORDER BY articles DESC",
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        row = self._conn.execute(
+            "SELECT COUNT(*) AS reports, COUNT(DISTINCT normalized_topic) AS topics, "
+            "COUNT(duplicate_of) AS duplicates, COALESCE(SUM(size_bytes), 0) AS total_bytes "
+            "FROM reports"
+        ).fetchone()
+        return dict(row)
+
+    # Writes -------------------------------------------------------------
+
+    def record(
+        self,
+        path: Path,
+        topic: str,
+        content: str,
+        trace_id: Optional[str] = None,
+        provider: Optional[str] = None,
+        prompt_version: Optional[str] = None,
+        timings: Optional[Dict[str, Any]] = None,
+        created_at: Optional[str] = None,
+        size_bytes: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Add (or update) the index entry for a written report.
+
+        Returns:
+            The stored record; `duplicate_of` is the id of an earlier report
+            with byte-identical content, if any.
+        """
+        path = Path(path)
+        key = self._key(path)
+        digest = content_hash(content)
+        if size_bytes is None:
+            size_bytes = path.stat().st_size if path.exists() else len(content.encode("utf-8"))
+
+        with self.transaction() as conn:
+            original = conn.execute(
+                "SELECT id FROM reports WHERE content_hash = ? AND path != ? ORDER BY id LIMIT 1",
+                (digest, key),
+            ).fetchone()
+            conn.execute(
+                "INSERT INTO reports (path, topic, normalized_topic, trace_id, provider, prompt_version, "
+                "content_hash, size_bytes, created_at, timings, duplicate_of) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET topic = excluded.topic, "
+                "normalized_topic = excluded.normalized_topic, trace_id = excluded.trace_id, "
+                "provider = excluded.provider, prompt_version = excluded.prompt_version, "
+                "content_hash = excluded.content_hash, size_bytes = excluded.size_bytes, "
+                "created_at = excluded.created_at, timings = excluded.timings, "
+                "duplicate_of = excluded.duplicate_of",
+                (
+                    key, topic, normalize_topic(topic), trace_id, provider, prompt_version,
+                    digest, size_bytes, created_at or datetime.now().isoformat(),
+                    json.dumps(timings or {}, ensure_ascii=False),
+                    original["id"] if original else None,
+                ),
+            )
+            row = conn.execute("SELECT * FROM reports WHERE path = ?", (key,)).fetchone()
+        return self._row(row)
+
+    def record_retrievals(self, trace_id: str, entries: List[Dict[str, Any]]):
+        """Replace the recorded retrievals of a trace."""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM retrievals WHERE trace_id = ?", (trace_id,))
+            conn.executemany(
+                "INSERT INTO retrievals (trace_id, position, query, result, duration_ms) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(trace_id, i, e["query"], e["result"], e.get("duration_ms"))
+                 for i, e in enumerate(entries)],
+            )
+
+    def record_usage(self, trace_id: str, turns: List[Dict[str, Any]]):
+        """Replace the recorded model turns of a trace."""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM usage_turns WHERE trace_id = ?", (trace_id,))
+            conn.executemany(
+                "INSERT INTO usage_turns (trace_id, turn, agent, latency_ms, input_tokens, "
+                "output_tokens, cached_tokens, reasoning_tokens, total_tokens, response_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(trace_id, t["turn"], t.get("agent"), t.get("latency_ms"), t.get("input_tokens", 0),
+                  t.get("output_tokens", 0), t.get("cached_tokens", 0), t.get("reasoning_tokens", 0),
+                  t.get("total_tokens", 0), t.get("response_id"))
+                 for t in turns],
+            )
+
+    def update_timings(self, trace_id: str, timings: Dict[str, Any]) -> bool:
+        """Merge keys into the stored timings of a trace."""
+        with self.transaction() as conn:
+            row = conn.execute("SELECT timings FROM reports WHERE trace_id = ?", (trace_id,)).fetchone()
+            if row is None:
+                return False
+            merged = {**json.loads(row["timings"] or "{}"), **timings}
+            conn.execute("UPDATE reports SET timings = ? WHERE trace_id = ?",
+                         (json.dumps(merged, ensure_ascii=False), trace_id))
+        return True
+
+    def move(self, old_path: Path, new_path: Path) -> bool:
+        """Repoint an entry whose file was moved (e.g. archived)."""
+        with self.transaction() as conn:
+            cursor = conn.execute("UPDATE reports SET path = ? WHERE path = ?",
+                                  (self._key(new_path), self._key(old_path)))
+        return cursor.rowcount > 0
+
+    def forget_missing(self) -> int:
+        """Drop entries whose file no longer exists; returns how many."""
+        missing = [
+            row["id"] for row in self._conn.execute("SELECT id, path FROM reports").fetchall()
+            if not Path(row["path"]).exists()
+        ]
+        if missing:
+            with self.transaction() as conn:
+                conn.execute("UPDATE reports SET duplicate_of = NULL WHERE duplicate_of IN (%s)"
+                             % ",".join("?" * len(missing)), missing)
+                conn.executemany("DELETE FROM reports WHERE id = ?", [(i,) for i in missing])
+        return len(missing)
+
+    def reindex(self) -> int:
+        """Index report files in the output directory that are not indexed yet.
+
+        Returns:
+            Number of files added.
+        """
+        known = {row["path"] for row in self._conn.execute("SELECT path FROM reports").fetchall()}
+        added = 0
+        for path in sorted(self.output_dir.glob("*.md")):
+            if self._key(path) in known:
+                continue
+            parsed = parse_report(path.read_text(encoding="utf-8"))
+            if parsed is None:
+                continue
+            trace_id = parsed["trace_id"]
+            if trace_id and self.by_trace(trace_id):
+                trace_id = None  # keep the first file for a trace
+            self.record(path, parsed["topic"], parsed["content"], trace_id=trace_id,
+                        created_at=parsed["created_at"])
+            added += 1
+        return added
+
+
+def parse_report(text: str) -> Optional[Dict[str, Any]]:
+    """Split a saved report into header fields and article content."""
+    topic = _HEADER_TOPIC.search(text)
+    if topic is None:
+        return None
+    header, _, content = text.partition(_HEADER_END)
+    trace = _HEADER_TRACE.search(header)
+    generated = _HEADER_GENERATED.search(header)
+    return {
+        "topic": topic.group(1).strip(),
+        "trace_id": trace.group(1) if trace else None,
+        "created_at": generated.group(1) if generated else None,
+        "content": content,
+    }
+
+
+def _print_records(records: List[Dict[str, Any]]):
+    if not records:
+        print("No reports found")
+        return
+    for record in records:
+        duplicate = f"  (duplicate of #{record['duplicate_of']})" if record["duplicate_of"] else ""
+        total = record["timings"].get("total_ms")
+        took = f"  {total / 1000:.1f}s" if total else ""
+        print(f"#{record['id']:<4} {record['created_at'][:19]}  {record['topic']}{took}{duplicate}")
+        print(f"      {record['trace_id'] or '-'}  {record['size_bytes']} B  {record['path']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the generated-article index")
+    parser.add_argument("--output-dir", default=os.getenv("OUTPUT_DIR", "output"))
+    subparsers = parser.add_subparsers(dest="command")
+
+    list_parser = subparsers.add_parser("list", help="Most recent reports")
+    list_parser.add_argument("--limit", type=int, default=20)
+    topic_parser = subparsers.add_parser("topic", help="Reports for a topic (normalized match)")
+    topic_parser.add_argument("topic")
+    trace_parser = subparsers.add_parser("trace", help="Report for a trace ID")
+    trace_parser.add_argument("trace_id")
+    similar_parser = subparsers.add_parser("similar", help="Reports on similar topics (bigram similarity)")
+    similar_parser.add_argument("topic")
+    similar_parser.add_argument("--min-score", type=float, default=0.5)
+    subparsers.add_parser("duplicates", help="Reports identical to an earlier one")
+    usage_parser = subparsers.add_parser("usage", help="Tokens and seconds per article")
+    usage_parser.add_argument("--by", choices=USAGE_GROUPS, default="prompt_version")
+    subparsers.add_parser("reindex", help="Index existing report files, drop missing ones")
+    subparsers.add_parser("stats", help="Index statistics")
+
+    args = parser.parse_args()
+
+    with OutputStore(Path(args.output_dir)) as store:
+        if args.command == "topic":
+            _print_records(store.by_topic(args.topic))
+        elif args.command == "similar":
+            for record in store.similar(args.topic, limit=10, min_score=args.min_score):
+                retrievals = len(store.retrievals(record["trace_id"])) if record["trace_id"] else 0
+                print(f"{record['similarity']:.2f}  {record['topic']}  "
+                      f"({retrievals} retrievals)  {record['path']}")
+        elif args.command == "trace":
+            record = store.by_trace(args.trace_id)
+            if record is None:
+                print(f"No report for {args.trace_id}")
+                return 1
+            record["retrievals"] = store.retrievals(args.trace_id)
+            record["usage"] = store.usage(args.trace_id)
+            print(json.dumps(record, indent=2, ensure_ascii=False))
+        elif args.command == "duplicates":
+            _print_records(store.duplicates())
+        elif args.command == "usage":
+            summary = store.usage_summary(args.by)
+            if not summary:
+                print("No recorded usage")
+            for row in summary:
+                seconds = f"{row['seconds']:.1f}s" if row["seconds"] is not None else "-"
+                print(f"{str(row[args.by] or '-'):<24} {row['articles']:>4} articles  "
+                      f"{row['turns']:.1f} turns  {row['input_tokens']:.0f} in / "
+                      f"{row['output_tokens']:.0f} out ({row['cached_tokens']:.0f} cached)  {seconds}")
+        elif args.command == "reindex":
+            removed = store.forget_missing()
+            added = store.reindex()
+            print(f"Indexed {added} new report(s), dropped {removed} missing")
+        elif args.command == "stats":
+            print(json.dumps(store.stats(), indent=2))
+        else:
+            _print_records(store.recent(getattr(args, "limit", 20)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
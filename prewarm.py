@@ -0,0 +1,170 @@
+"""Pre-warming of the agent stack and NotebookLM while the user types a topic.
+
+The interactive CLI spends its first seconds waiting on input(). Prewarmer
+overlaps that idle time with the costs every first run pays anyway:
+importing the Agents SDK, building the provider/model and its HTTP
+connection, and (in worker mode) opening the default notebook on a pooled
+browser page of the process's worker; once the topic is known, the notebook
+it routes to is opened as well. Resources nobody claims within
+PREWARM_TIMEOUT are dropped.
+"""
+
+import asyncio
+import importlib
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_PREWARM_TIMEOUT = 300.0
+
+
+def prewarm_enabled() -> bool:
+    return os.getenv("PREWARM", "true").lower() not in ("0", "false", "no")
+
+
+def _default_provider_factory() -> Any:
+    # Importing agent pulls in the Agents SDK, openai and httpx
+    agent_module = importlib.import_module("agent")
+    return agent_module._get_default_provider()
+
+
+class Prewarmer:
+    """Warms the LLM provider and NotebookLM browser in the background.
+
+    Usage:
+        prewarmer = Prewarmer()
+        prewarmer.start()
+        topic = await asyncio.to_thread(input, "...")
+        provider = await prewarmer.claim(topic)  # None if expired or failed
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        warm_browser: Optional[bool] = None,
+        provider_factory: Optional[Callable[[], Any]] = None,
+    ):
+        """
+        Args:
+            timeout: Seconds to keep warm resources without a topic
+                (default: PREWARM_TIMEOUT).
+            warm_browser: Open the default notebook in the worker
+                (default: only when NOTEBOOKLM_WORKER is enabled, since
+                one-shot queries cannot reuse a page).
+            provider_factory: Builds the LLM provider (default: MiniMax from env).
+        """
+        from notebooklm_tool import _use_worker
+
+        if timeout is None:
+            timeout = float(os.getenv("PREWARM_TIMEOUT", str(DEFAULT_PREWARM_TIMEOUT)))
+        self.timeout = timeout
+        self.warm_browser = _use_worker() if warm_browser is None else warm_browser
+        self.provider_factory = provider_factory or _default_provider_factory
+
+        self.provider = None
+        self.notebook_url: Optional[str] = None
+        self.expired = False
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+        self._llm_task: Optional[asyncio.Task] = None
+        self._browser_task: Optional[asyncio.Task] = None
+        self._routed_task: Optional[asyncio.Task] = None
+        self._expiry: Optional[asyncio.TimerHandle] = None
+        self._drop_task: Optional[asyncio.Task] = None
+
+    @property
+    def _tasks(self) -> List[asyncio.Task]:
+        return [t for t in (self._llm_task, self._browser_task, self._routed_task) if t is not None]
+
+    def start(self):
+        """Start warming; must be called from a running event loop."""
+        self._llm_task = asyncio.create_task(self._timed("llm", self._warm_llm))
+        if self.warm_browser:
+            self._browser_task = asyncio.create_task(self._timed("browser", self._warm_browser))
+        self._expiry = asyncio.get_running_loop().call_later(self.timeout, self._expire)
+
+    async def _timed(self, stage: str, func: Callable):
+        start = time.perf_counter()
+        try:
+            await func()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.errors[stage] = f"{type(e).__name__}: {e}"
+        finally:
+            self.timings[stage] = time.perf_counter() - start
+
+    async def _warm_llm(self):
+        # Module imports are CPU-bound; keep them off the loop so input stays responsive
+        provider = await asyncio.to_thread(self.provider_factory)
+        await provider.warm_up()
+        self.provider = provider
+
+    async def _warm_browser(self):
+        from notebooklm_tool import _get_notebook_url
+
+        self.notebook_url = _get_notebook_url()
+        await self._warm_notebook(self.notebook_url)
+
+    async def _warm_notebook(self, notebook_url: str):
+        from notebooklm_tool import get_worker
+
+        await get_worker().request("warm", {"notebook_url": notebook_url})
+
+    def _expire(self):
+        self._drop_task = asyncio.create_task(self.drop())
+
+    async def claim(self, topic: Optional[str] = None) -> Optional[Any]:
+        """Keep the warm resources for the workflow that is about to run.
+
+        Waits for the provider (the workflow needs it next anyway) but not
+        for the browser: a question sent to the worker queues behind the
+        warm-up and lands on the page it opened.
+
+        Args:
+            topic: The topic about to be written. If it routes to another
+                notebook than the default one, that notebook is warmed too.
+
+        Returns:
+            The warm provider, or None if it expired or failed to build.
+        """
+        if self._expiry is not None:
+            self._expiry.cancel()
+        if self.expired:
+            return None
+        if topic and self._browser_task is not None:
+            from notebooklm_tool import _get_notebook_url
+
+            routed = _get_notebook_url(topic)
+            if routed != self.notebook_url:
+                self._routed_task = asyncio.create_task(
+                    self._timed("browser_routed", lambda: self._warm_notebook(routed))
+                )
+        if self._llm_task is not None:
+            await self._llm_task
+        return self.provider
+
+    async def drop(self):
+        """Release everything warmed so far."""
+        self.expired = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        provider, self.provider = self.provider, None
+        if provider is not None:
+            try:
+                await provider.close()
+            except Exception:
+                pass
+
+        if self.warm_browser:
+            from notebooklm_tool import shutdown_workers
+            await shutdown_workers()
+
+    async def wait(self):
+        """Let background warming finish (or the drop complete) before exit."""
+        if self._drop_task is not None:
+            await self._drop_task
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,200 @@
+"""Atomic report files and compressed archiving.
+
+Reports are composed in memory (one timestamp for the filename and the
+header), written to a temp file in the target directory and renamed into
+place with os.replace, so a crash never leaves a truncated article behind.
+How hard the data is pushed to disk is set by OUTPUT_FSYNC:
+
+    always   fsync the file and its directory (survives power loss)
+    file     fsync the file only (default)
+    never    leave it to the OS page cache (fastest)
+
+Older reports can be moved into OUTPUT_DIR/archive compressed with gzip or
+zstd (the `zstandard` package); the output index follows the move.
+
+CLI:
+    python report_writer.py archive --older-than 30 [--codec gzip|zstd]
+"""
+
+import argparse
+import asyncio
+import gzip
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+FSYNC_POLICIES = ("always", "file", "never")
+ARCHIVE_CODECS = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def _umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Read once: os.umask can only be read by setting it, which is not thread-safe
+_UMASK = _umask()
+
+
+def fsync_policy() -> str:
+    policy = os.getenv("OUTPUT_FSYNC", "file").lower()
+    return policy if policy in FSYNC_POLICIES else "file"
+
+
+def report_filename(topic: str, trace_id: str, generated: datetime) -> str:
+    safe_topic = "".join(c if c.isalnum() else "_" for c in topic[:30])
+    return f"{generated.strftime('%Y%m%d_%H%M%S')}_{safe_topic}_{trace_id}.md"
+
+
+def compose_report(topic: str, content: str, trace_id: str, generated: datetime) -> str:
+    """The full report document (header + article) as one string."""
+    return (
+        f"# {topic}\n\n"
+        f"**Trace ID:** {trace_id}\n\n"
+        f"**Generated:** {generated.isoformat()}\n\n"
+        "---\n\n"
+        f"{content}"
+    )
+
+
+def write_atomic(path: Path, data: bytes, fsync: Optional[str] = None) -> Path:
+    """Write `data` to `path` via a temp file and rename.
+
+    Args:
+        path: Destination file.
+        data: File contents.
+        fsync: One of FSYNC_POLICIES (default: OUTPUT_FSYNC).
+
+    Returns:
+        The destination path.
+    """
+    path = Path(path)
+    fsync = fsync or fsync_policy()
+    try:
+        # Keep a replaced file's mode; a new one gets what open() would give
+        mode = path.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        os.chmod(tmp_name, mode)  # mkstemp creates 0600
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            if fsync != "never":
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+    if fsync == "always" and hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(path.parent, os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    return path
+
+
+async def write_atomic_async(path: Path, data: bytes, fsync: Optional[str] = None) -> Path:
+    """write_atomic on a worker thread, keeping the event loop free."""
+    return await asyncio.to_thread(write_atomic, path, data, fsync)
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        return gzip.compress(data, mtime=0)
+    if codec == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstd archiving needs the zstandard package (pip install zstandard)")
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    raise ValueError(f"Unknown codec: {codec} (expected one of {tuple(ARCHIVE_CODECS)})")
+
+
+def read_report(path: Path) -> str:
+    """Read a report file, plain or archived."""
+    path = Path(path)
+    data = path.read_bytes()
+    if path.suffix == ".gz":
+        data = gzip.decompress(data)
+    elif path.suffix == ".zst":
+        import zstandard
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data.decode("utf-8")
+
+
+def archive_reports(
+    output_dir: Path,
+    older_than_days: float = 30,
+    codec: str = "gzip",
+    archive_dir: Optional[Path] = None,
+) -> List[Tuple[Path, Path]]:
+    """Compress reports older than `older_than_days` into the archive directory.
+
+    Each archived file is written atomically before the original is removed,
+    and its entry in the output index (if any) is repointed.
+
+    Returns:
+        (original, archived) path pairs.
+    """
+    from output_store import INDEX_FILE_NAME, OutputStore
+
+    output_dir = Path(output_dir)
+    archive_dir = Path(archive_dir or output_dir / "archive")
+    suffix = ARCHIVE_CODECS.get(codec)
+    if suffix is None:
+        raise ValueError(f"Unknown codec: {codec} (expected one of {tuple(ARCHIVE_CODECS)})")
+
+    cutoff = time.time() - older_than_days * 86400
+    candidates = [p for p in sorted(output_dir.glob("*.md")) if p.stat().st_mtime < cutoff]
+    if not candidates:
+        return []
+    archive_dir.mkdir(parents=True, exist_ok=True)
+
+    store = OutputStore(output_dir) if (output_dir / INDEX_FILE_NAME).exists() else None
+    moved = []
+    try:
+        for path in candidates:
+            target = archive_dir / (path.name + suffix)
+            write_atomic(target, compress(path.read_bytes(), codec))
+            if store is not None:
+                store.move(path, target)
+            path.unlink()
+            moved.append((path, target))
+    finally:
+        if store is not None:
+            store.close()
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive generated reports")
+    parser.add_argument("--output-dir", default=os.getenv("OUTPUT_DIR", "output"))
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    archive_parser = subparsers.add_parser("archive", help="Compress old reports into output/archive")
+    archive_parser.add_argument("--older-than", type=float, default=30, help="Age in days")
+    archive_parser.add_argument("--codec", choices=tuple(ARCHIVE_CODECS),
+                                default=os.getenv("OUTPUT_ARCHIVE_CODEC", "gzip"))
+    archive_parser.add_argument("--archive-dir", default=None)
+    args = parser.parse_args()
+
+    moved = archive_reports(Path(args.output_dir), args.older_than, args.codec,
+                            Path(args.archive_dir) if args.archive_dir else None)
+    size = sum(archived.stat().st_size for _, archived in moved)
+    print(f"Archived {len(moved)} report(s) ({size} B compressed, {args.codec})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
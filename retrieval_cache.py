@@ -0,0 +1,127 @@
+"""Reuse of earlier retrievals for similar topics.
+
+Each run_workflow records the NotebookLM retrievals its agent made (query
+and answer). Before a new article is written, the output index is searched
+for earlier reports on similar topics (normalized text plus character-bigram
+similarity), and their recorded retrievals are handed to the agent as
+material it already has, so fresh NotebookLM calls are only needed for the
+angles those do not cover.
+"""
+
+import contextvars
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from output_store import INDEX_FILE_NAME, OutputStore, dedup_mode
+
+# Tool results that are errors, not material worth keeping
+_FAILED_PREFIXES = ("Error", "Search failed", "Search timeout", "No results found")
+
+
+def reuse_enabled() -> bool:
+    return os.getenv("RETRIEVAL_REUSE", "true").lower() not in ("0", "false", "no")
+
+
+class RetrievalLog:
+    """Retrievals made during one workflow, in call order."""
+
+    def __init__(self):
+        self.entries: List[Dict[str, Any]] = []
+
+    def add(self, query: str, result: str, duration_ms: Optional[int] = None):
+        if not result or result.startswith(_FAILED_PREFIXES):
+            return
+        self.entries.append({"query": query, "result": result, "duration_ms": duration_ms})
+
+
+# Set per workflow; tool calls run in tasks that inherit the workflow's context
+_current: contextvars.ContextVar[Optional[RetrievalLog]] = contextvars.ContextVar(
+    "retrieval_log", default=None
+)
+
+
+def set_retrieval_log(log: Optional[RetrievalLog]) -> contextvars.Token:
+    return _current.set(log)
+
+
+def reset_retrieval_log(token: contextvars.Token):
+    _current.reset(token)
+
+
+def record_retrieval(query: str, result: str, duration_ms: Optional[int] = None):
+    """Add a tool result to the current workflow's log (no-op outside one)."""
+    log = _current.get()
+    if log is not None:
+        log.add(query, result, duration_ms)
+
+
+@dataclass
+class PriorMaterial:
+    """Retrievals from earlier reports on similar topics."""
+
+    reports: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def retrieval_count(self) -> int:
+        return sum(len(report["retrievals"]) for report in self.reports)
+
+    def covers_topic(self, min_similarity: float = 0.8) -> bool:
+        """Whether a near-identical topic already has recorded retrievals."""
+        return any(
+            report["similarity"] >= min_similarity and report["retrievals"]
+            for report in self.reports
+        )
+
+    def to_prompt(self, max_chars: int = 6000) -> str:
+        """Material block for the agent prompt, trimmed to `max_chars`."""
+        parts = []
+        budget = max_chars
+        for report in self.reports:
+            header = f"### 「{report['topic']}」(相似度 {report['similarity']:.2f})"
+            parts.append(header)
+            budget -= len(header)
+            for retrieval in report["retrievals"]:
+                if budget <= 0:
+                    break
+                text = f"检索: {retrieval['query']}\n{retrieval['result']}"[:budget]
+                parts.append(text)
+                budget -= len(text)
+            if budget <= 0:
+                break
+        return "\n\n".join(parts)
+
+
+def find_prior_material(
+    topic: str,
+    output_dir: Optional[Path] = None,
+    limit: int = 3,
+    min_similarity: Optional[float] = None,
+) -> Optional[PriorMaterial]:
+    """Look up recorded retrievals of earlier reports on similar topics.
+
+    Args:
+        topic: The new article's topic.
+        output_dir: Output directory with the index (default: OUTPUT_DIR).
+        limit: Maximum number of earlier reports to draw from.
+        min_similarity: Topic similarity threshold (default:
+            RETRIEVAL_REUSE_MIN_SIMILARITY or 0.6).
+
+    Returns:
+        PriorMaterial, or None if nothing similar has recorded retrievals.
+    """
+    if dedup_mode() == "off":
+        return None  # no output index
+    if min_similarity is None:
+        min_similarity = float(os.getenv("RETRIEVAL_REUSE_MIN_SIMILARITY", "0.6"))
+    output_dir = Path(output_dir or os.getenv("OUTPUT_DIR", "output"))
+    if not (output_dir / INDEX_FILE_NAME).exists():
+        return None
+
+    with OutputStore(output_dir) as store:
+        reports = store.similar(topic, limit=limit, min_score=min_similarity, with_retrievals=True)
+        for record in reports:
+            record["retrievals"] = store.retrievals(record["trace_id"])
+
+    return PriorMaterial(reports) if reports else None
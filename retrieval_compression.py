@@ -0,0 +1,268 @@
+"""Compression of NotebookLM answers before the writer sees them.
+
+Every retrieval round appends a full NotebookLM answer to the agent context,
+so the final generation runs over two or three long, overlapping answers.
+With RETRIEVAL_COMPRESSION enabled, search_materials shrinks each answer to
+about RETRIEVAL_COMPRESSION_BUDGET tokens before returning it:
+
+    extractive   keep the sentences carrying facts (numbers, quotes, steps,
+                 query terms), in their original order; no model call
+    llm          ask the "compressor" stage model (LLM_COMPRESSOR_PROVIDER /
+                 LLM_COMPRESSOR_MODEL, see agent.create_stage_provider) for
+                 the key facts, quotes and case steps; falls back to
+                 extractive on any error
+    off          pass answers through unchanged (default)
+
+The raw answer is kept under OUTPUT_DIR/raw_retrievals/ for audit. Like
+every other model call, llm-mode calls hold an "llm:<provider>" scheduler
+slot and are recorded in the workflow's usage ledger; the model is built
+once per workflow (CompressionModel) and closed with it.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from output_store import topic_ngrams
+from report_writer import write_atomic
+
+COMPRESSION_MODES = ("off", "extractive", "llm")
+
+# Sentence ends (Chinese and Western, not inside a quote) and line breaks
+_SENTENCE_END = re.compile(r"(?<=[。！？!?；;])(?![”」』\"])|(?<=[。！？!?][”」』])|(?<=[^\d\s]\.)\s+|\n+")
+_NUMBER = re.compile(r"\d")
+_QUOTE = re.compile(r"[“”\"「」『』]")
+_STEP = re.compile(r"^\s*(?:\d+[.、)）]|[-*•]|第[一二三四五六七八九十\d]+[步点条])|首先|其次|然后|最后")
+_HEADER = re.compile(r"^Search results for '.*?'.*?:\n")
+# Per-notebook attribution in scatter-gather results (notebooklm_tool.merge_answers)
+_SOURCE_LINE = re.compile(r"^### Source: .*$", re.M)
+
+COMPRESSION_INSTRUCTIONS = """You condense research answers for a writer.
+Keep only what an article can use: key facts and numbers, direct quotes with
+their speaker, and the steps of any case or method, in the source's order.
+Drop repetition, hedging and filler. Do not add anything that is not in the
+answer. Answer in the answer's language, as a compact list, within about
+{budget} tokens."""
+
+
+def compression_mode() -> str:
+    mode = os.getenv("RETRIEVAL_COMPRESSION", "off").lower()
+    return mode if mode in COMPRESSION_MODES else "off"
+
+
+def token_budget() -> int:
+    return int(os.getenv("RETRIEVAL_COMPRESSION_BUDGET", "600"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: one per CJK character, one per ~4 other characters."""
+    cjk = sum(1 for char in text if ord(char) > 0x2E7F)
+    return cjk + -(-(len(text) - cjk) // 4)
+
+
+def truncate_to_budget(text: str, budget: int) -> str:
+    """The longest prefix of `text` within `budget` estimated tokens."""
+    used = 0.0
+    for i, char in enumerate(text):
+        used += 1 if ord(char) > 0x2E7F else 0.25
+        if used > budget:
+            return text[:i]
+    return text
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_END.split(text) if s and s.strip()]
+
+
+def split_sources(answer: str) -> List[Tuple[str, str]]:
+    """(attribution line, text) per notebook of a merged answer.
+
+    An answer without "### Source:" lines is one section with no attribution.
+    """
+    matches = list(_SOURCE_LINE.finditer(answer))
+    if not matches:
+        return [("", answer)]
+    sections = []
+    if answer[:matches[0].start()].strip():
+        sections.append(("", answer[:matches[0].start()]))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(answer)
+        sections.append((match.group(0), answer[match.end():end]))
+    return sections
+
+
+def _score(sentence: str, position: int, query_terms: set) -> float:
+    score = 0.0
+    if _NUMBER.search(sentence):
+        score += 2
+    if _QUOTE.search(sentence):
+        score += 2
+    if _STEP.search(sentence):
+        score += 1.5
+    terms = topic_ngrams(sentence)
+    if terms and query_terms:
+        score += 3 * len(terms & query_terms) / len(query_terms)
+    if position < 2:
+        score += 1  # answers usually lead with the gist
+    return score
+
+
+def extractive_compress(query: str, answer: str, budget: int) -> str:
+    """Keep the highest-scoring sentences that fit `budget`, in source order.
+
+    Near-duplicate sentences (most bigrams already kept) are dropped first.
+    If not even one sentence fits (e.g. an answer without sentence breaks),
+    the top-ranked one is cut to the budget instead.
+    """
+    sentences = split_sentences(answer)
+    query_terms = topic_ngrams(query)
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda i: _score(sentences[i], i, query_terms),
+        reverse=True,
+    )
+
+    kept, kept_terms, used = [], [], 0
+    for i in ranked:
+        sentence = sentences[i]
+        cost = estimate_tokens(sentence)
+        if used + cost > budget:
+            continue
+        terms = topic_ngrams(sentence)
+        if not terms:
+            continue  # stray punctuation
+        if any(len(terms & seen) / len(terms) >= 0.8 for seen in kept_terms):
+            continue
+        kept.append(i)
+        kept_terms.append(terms)
+        used += cost
+    if not kept and ranked:
+        return truncate_to_budget(sentences[ranked[0]], budget)
+    return "\n".join(sentences[i] for i in sorted(kept))
+
+
+class CompressionModel:
+    """The llm-mode model of one workflow: built on first use, closed with it.
+
+    A ready-built `warm` provider is used when it already serves the
+    compressor stage; it belongs to the caller and is not closed here.
+    """
+
+    def __init__(self, warm=None):
+        self.warm = warm
+        self.provider = None
+        self._model = None
+        self._lock = asyncio.Lock()
+
+    async def get(self):
+        """The scheduled model (holds an llm slot per call)."""
+        async with self._lock:
+            if self._model is None:
+                from agent import create_stage_provider, _scheduled_model
+
+                self.provider = await asyncio.to_thread(create_stage_provider, "compressor", self.warm)
+                self._model = _scheduled_model(self.provider)
+        return self._model
+
+    async def close(self):
+        provider, self.provider, self._model = self.provider, None, None
+        if provider is not None and provider is not self.warm:
+            await provider.close()
+
+
+# Set per workflow; tool calls run in tasks that inherit the workflow's context
+_current: contextvars.ContextVar[Optional[CompressionModel]] = contextvars.ContextVar(
+    "compression_model", default=None
+)
+
+
+def set_compression_model(model: Optional[CompressionModel]) -> contextvars.Token:
+    return _current.set(model)
+
+
+def reset_compression_model(token: contextvars.Token):
+    _current.reset(token)
+
+
+async def llm_compress(query: str, answer: str, budget: int) -> str:
+    """Condense an answer with the compressor stage model.
+
+    Uses the current workflow's CompressionModel; outside a workflow a
+    model is built for this call and closed after it.
+
+    Raises:
+        ValueError: If the compressor stage's provider is not configured.
+    """
+    from agents import Agent, ModelSettings
+    from agent import run_agent
+
+    compression_model = _current.get()
+    owned = compression_model is None
+    if owned:
+        compression_model = CompressionModel()
+    try:
+        agent = Agent(
+            name="Retrieval-Compressor",
+            instructions=COMPRESSION_INSTRUCTIONS.format(budget=budget),
+            model=await compression_model.get(),
+            model_settings=ModelSettings(max_tokens=int(budget * 1.5), temperature=0),
+        )
+        result = await run_agent(agent, f"Question: {query}\n\nAnswer:\n{answer}")
+    finally:
+        if owned:
+            await compression_model.close()
+    return str(result.final_output).strip()
+
+
+def save_raw(query: str, result: str, output_dir: Optional[Path] = None) -> Path:
+    """Keep the uncompressed tool result for audit; returns its path."""
+    output_dir = Path(output_dir or os.getenv("OUTPUT_DIR", "output"))
+    now = datetime.now()
+    digest = hashlib.sha1(result.encode("utf-8")).hexdigest()[:12]
+    path = output_dir / "raw_retrievals" / now.strftime("%Y%m%d") / f"{now.strftime('%H%M%S')}_{digest}.md"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(path, f"# {query}\n\n{result}".encode("utf-8"), fsync="never")
+    return path
+
+
+async def compress_retrieval(query: str, result: str, mode: Optional[str] = None,
+                             budget: Optional[int] = None) -> str:
+    """Shrink a search_materials result to the token budget.
+
+    Error messages and results already within budget pass through. The
+    "Search results for ..." header and the "### Source:" line of every
+    notebook are kept so the model still sees which query the material
+    answers and where it came from; each notebook's text gets a share of
+    the budget proportional to its length.
+    """
+    mode = mode or compression_mode()
+    budget = budget or token_budget()
+    header = _HEADER.match(result)
+    if mode == "off" or header is None or estimate_tokens(result) <= budget:
+        return result
+
+    answer = result[header.end():]
+    await asyncio.to_thread(save_raw, query, result)
+
+    sections = split_sources(answer)
+    remaining = max(1, budget - sum(estimate_tokens(line) for line, _ in sections))
+    total = sum(estimate_tokens(text) for _, text in sections) or 1
+
+    async def compress(text: str) -> str:
+        share = max(1, remaining * estimate_tokens(text) // total)
+        compressed = ""
+        if mode == "llm":
+            try:
+                compressed = await llm_compress(query, text, share)
+            except Exception:
+                compressed = ""
+        return compressed or extractive_compress(query, text, share)
+
+    compressed = await asyncio.gather(*(compress(text) for _, text in sections))
+    parts = [f"{line}\n{text}" if line else text for (line, _), text in zip(sections, compressed)]
+    return header.group(0) + "\n\n".join(part.strip() for part in parts)
@@ -0,0 +1,254 @@
+"""Priority- and resource-aware scheduling of NotebookLM and LLM calls.
+
+NotebookLM answers one to three questions at a time per account, while the
+LLM endpoint takes dozens of calls; a single worker count wastes one or the
+other. Instead every NotebookLM question and every model call takes a slot
+from its own pool:
+
+    browser         NotebookLM questions (SCHED_BROWSER_SLOTS, default 2;
+                    always 1 for one-shot questions on the persistent
+                    profile, which only one Chrome can open at a time)
+    llm:<provider>  model calls per provider (SCHED_LLM_<PROVIDER>_SLOTS,
+                    else SCHED_LLM_SLOTS, default 16)
+
+When a pool is full, waiting calls are served by lane first (interactive
+CLI runs before batch jobs), then fairly between tenants: the tenant
+holding the fewest slots of the pool goes next, ties going to the one
+served least recently. The lane and tenant come from the context of the
+workflow (set_schedule_context), so calls made by its tools and agents
+inherit them.
+
+Pools are per process; queue waits per resource and lane are available from
+get_scheduler().metrics() (GET /metrics on the API server).
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+# Served in this order
+LANES = ("interactive", "batch")
+
+DEFAULT_CAPACITIES = {"browser": 2, "llm": 16}
+FALLBACK_CAPACITY = 4
+
+
+def _single_browser() -> bool:
+    """Whether NotebookLM questions each launch Chrome on the one persistent profile.
+
+    The long-lived worker (NOTEBOOKLM_WORKER) keeps its profile open and
+    serves several pages from it, and isolated contexts lock nothing.
+    """
+    persistent = os.getenv("NOTEBOOKLM_CONTEXT_MODE", "persistent").lower() != "isolated"
+    worker = os.getenv("NOTEBOOKLM_WORKER", "").lower() in ("1", "true", "yes")
+    return persistent and not worker
+
+
+def resource_capacity(resource: str) -> int:
+    """Slots for a resource from env: SCHED_<RESOURCE>_SLOTS, then its family's."""
+    family = resource.split(":", 1)[0]
+    if family == "browser" and _single_browser():
+        return 1
+    specific = os.getenv(f"SCHED_{resource.upper().replace(':', '_').replace('-', '_')}_SLOTS")
+    if specific:
+        return max(1, int(specific))
+    default = DEFAULT_CAPACITIES.get(family, FALLBACK_CAPACITY)
+    return max(1, int(os.getenv(f"SCHED_{family.upper()}_SLOTS", str(default))))
+
+
+class WaitStats:
+    """Queue waits of one lane of a pool, in milliseconds."""
+
+    def __init__(self, samples: int = 1024):
+        self.count = 0
+        self.waited = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._samples: Deque[float] = deque(maxlen=samples)
+
+    def add(self, wait_ms: float):
+        self.count += 1
+        if wait_ms >= 1:
+            self.waited += 1
+        self.total_ms += wait_ms
+        self.max_ms = max(self.max_ms, wait_ms)
+        self._samples.append(wait_ms)
+
+    def summary(self) -> Dict[str, Any]:
+        samples = sorted(self._samples)
+
+        def percentile(p: float) -> float:
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))], 1) if samples else 0.0
+
+        return {
+            "acquired": self.count,
+            "waited": self.waited,
+            "mean_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(self.max_ms, 1),
+        }
+
+
+@dataclass
+class _Waiter:
+    lane: str
+    tenant: str
+    future: asyncio.Future
+    enqueued: float
+    seq: int
+
+
+class ResourcePool:
+    """Slots of one resource, handed out by lane and fair share."""
+
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.capacity = capacity
+        self.in_use = 0
+        self.stats = {lane: WaitStats() for lane in LANES}
+        self._held: Dict[str, int] = defaultdict(int)
+        self._last_grant: Dict[str, int] = {}
+        self._grants = 0
+        self._seq = 0
+        self._waiters: List[_Waiter] = []
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.future.done())
+
+    def _grant(self, lane: str, tenant: str, enqueued: float):
+        self.in_use += 1
+        self._held[tenant] += 1
+        self._grants += 1
+        self._last_grant[tenant] = self._grants
+        self.stats[lane].add((time.perf_counter() - enqueued) * 1000)
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        self._waiters = [waiter for waiter in self._waiters if not waiter.future.done()]
+        if not self._waiters:
+            return None
+        lane = min((waiter.lane for waiter in self._waiters), key=LANES.index)
+        return min(
+            (waiter for waiter in self._waiters if waiter.lane == lane),
+            key=lambda w: (self._held[w.tenant], self._last_grant.get(w.tenant, 0), w.seq),
+        )
+
+    def _dispatch(self):
+        while self.in_use < self.capacity:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            self._waiters.remove(waiter)
+            self._grant(waiter.lane, waiter.tenant, waiter.enqueued)
+            waiter.future.set_result(None)
+
+    async def acquire(self, lane: str, tenant: str):
+        """Wait for a slot; pair every acquire with release(tenant)."""
+        enqueued = time.perf_counter()
+        if self.in_use < self.capacity and not self.waiting:
+            self._grant(lane, tenant, enqueued)
+            return
+
+        self._seq += 1
+        waiter = _Waiter(lane, tenant, asyncio.get_running_loop().create_future(), enqueued, self._seq)
+        self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled():
+                self.release(tenant)  # granted just as we were cancelled
+            raise
+
+    def release(self, tenant: str):
+        self.in_use -= 1
+        self._held[tenant] -= 1
+        if self._held[tenant] <= 0:
+            del self._held[tenant]
+        self._dispatch()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "lanes": {lane: stats.summary() for lane, stats in self.stats.items()},
+        }
+
+
+class Scheduler:
+    """Resource pools of one process, created on first use.
+
+    Usage:
+        async with get_scheduler().slot("browser"):
+            answer = await ask(...)
+    """
+
+    def __init__(self, capacities: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            capacities: Slots per resource; others come from resource_capacity().
+        """
+        self.capacities = dict(capacities or {})
+        self.pools: Dict[str, ResourcePool] = {}
+
+    def pool(self, resource: str) -> ResourcePool:
+        if resource not in self.pools:
+            capacity = self.capacities.get(resource) or resource_capacity(resource)
+            self.pools[resource] = ResourcePool(resource, capacity)
+        return self.pools[resource]
+
+    @asynccontextmanager
+    async def slot(self, resource: str, lane: Optional[str] = None,
+                   tenant: Optional[str] = None) -> AsyncIterator[None]:
+        """Hold a slot of `resource` (lane and tenant default to the current context)."""
+        context_lane, context_tenant = _context.get()
+        lane, tenant = lane or context_lane, tenant or context_tenant
+        pool = self.pool(resource)
+        await pool.acquire(lane, tenant)
+        try:
+            yield
+        finally:
+            pool.release(tenant)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {name: pool.metrics() for name, pool in sorted(self.pools.items())}
+
+
+_scheduler: Optional[Scheduler] = None
+
+
+def get_scheduler() -> Scheduler:
+    """The process-wide scheduler."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = Scheduler()
+    return _scheduler
+
+
+# Lane and tenant of the current workflow; tasks it starts inherit them
+_context: contextvars.ContextVar[Tuple[str, str]] = contextvars.ContextVar(
+    "schedule_context", default=("interactive", "default")
+)
+
+
+def set_schedule_context(lane: str = "interactive", tenant: Optional[str] = None) -> contextvars.Token:
+    """Set the lane and tenant for the calls made from this context.
+
+    Raises:
+        ValueError: If the lane is unknown.
+    """
+    if lane not in LANES:
+        raise ValueError(f"Unknown lane: {lane} (expected one of {LANES})")
+    return _context.set((lane, tenant or "default"))
+
+
+def reset_schedule_context(token: contextvars.Token):
+    _context.reset(token)
@@ -0,0 +1,141 @@
+"""Speculative first-round retrieval.
+
+The writer prompt's round-1 question is a fixed template around the topic,
+so run_workflow can send it to NotebookLM before the agent has even been
+built. The agent's first search_materials call asking that question (the
+same text, or a light rewording) then joins the in-flight query (or takes
+its finished result) instead of starting a new browser query after a full
+model turn. Other calls wait for the speculative query to finish before
+starting their own, so it never has a second browser running beside it.
+"""
+
+import asyncio
+import contextvars
+import os
+import re
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from output_store import topic_similarity
+
+PROMPTS_DIR = Path(__file__).parent / "prompts"
+
+# Round-1 section of the writer prompt and its first fenced example
+_ROUND1_SECTION = re.compile(r"###\s*第一轮检索.*?(?=\n###|\Z)", re.S)
+_CODE_BLOCK = re.compile(r"```[^\n]*\n(.*?)```", re.S)
+_TOPIC_PLACEHOLDER = "{选题}"
+
+# Bigram similarity from which a query counts as the round-1 query reworded
+MATCH_SIMILARITY = 0.8
+
+
+def speculation_enabled() -> bool:
+    return os.getenv("SPECULATIVE_SEARCH", "true").lower() not in ("0", "false", "no")
+
+
+def render_round1_query(topic: str, prompt_name: str = "writer_v1.txt") -> str:
+    """Render the round-1 retrieval question from the writer prompt.
+
+    Args:
+        topic: The article topic.
+        prompt_name: Prompt file in prompts/.
+
+    Returns:
+        The prompt's round-1 example with the topic filled in, or the bare
+        topic if the prompt has no such template.
+    """
+    try:
+        text = (PROMPTS_DIR / prompt_name).read_text(encoding="utf-8")
+    except OSError:
+        return topic
+
+    section = _ROUND1_SECTION.search(text)
+    block = _CODE_BLOCK.search(section.group(0)) if section else None
+    if not block or _TOPIC_PLACEHOLDER not in block.group(1):
+        return topic
+    return block.group(1).strip().replace(_TOPIC_PLACEHOLDER, topic)
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", "", text).lower()
+
+
+class SpeculativeSearch:
+    """One speculative query, claimable by the first matching tool call."""
+
+    def __init__(self, topic: str, query: str, search: Callable[[str], Awaitable[str]]):
+        self.topic = topic
+        self.query = query
+        self.search = search
+        self.task: Optional[asyncio.Task] = None
+        self.claimed = False
+
+    def start(self) -> "SpeculativeSearch":
+        self.task = asyncio.create_task(self.search(self.query))
+        return self
+
+    def matches(self, query: str) -> bool:
+        """The round-1 query itself: equal up to whitespace and case, or nearly so.
+
+        A rewording must still name the topic, since the template text alone
+        makes any two round-1 queries look alike.
+        """
+        normalized = _normalize(query)
+        if normalized == _normalize(self.query):
+            return True
+        return (
+            _normalize(self.topic) in normalized
+            and topic_similarity(query, self.query) >= MATCH_SIMILARITY
+        )
+
+    def claim(self, query: str) -> Optional[asyncio.Task]:
+        """Hand the speculative task to the first matching tool call."""
+        if self.claimed or self.task is None or not self.matches(query):
+            return None
+        self.claimed = True
+        return self.task
+
+    async def wait(self):
+        """Let the in-flight query finish; its result stays claimable."""
+        if self.task is not None and not self.task.done():
+            await asyncio.wait({self.task})  # a cancelled waiter leaves the task running
+
+    async def cancel(self):
+        """Stop an unclaimed query (the agent never asked for it).
+
+        Returns once the query has stopped: cancelling run_search stops its
+        ask process and browser, then releases the scheduler slot.
+        """
+        if self.task is None or self.claimed:
+            return
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+
+
+# Set per workflow; tool calls run in tasks that inherit the workflow's context
+_current: contextvars.ContextVar[Optional[SpeculativeSearch]] = contextvars.ContextVar(
+    "speculative_search", default=None
+)
+
+
+def set_speculation(speculation: Optional[SpeculativeSearch]) -> contextvars.Token:
+    return _current.set(speculation)
+
+
+def reset_speculation(token: contextvars.Token):
+    _current.reset(token)
+
+
+def claim_speculation(query: str) -> Optional[asyncio.Task]:
+    """The current workflow's speculative task if this query may use it."""
+    speculation = _current.get()
+    if speculation is None:
+        return None
+    return speculation.claim(query)
+
+
+async def wait_for_speculation():
+    """Wait for the current workflow's speculative query, if one is running."""
+    speculation = _current.get()
+    if speculation is not None:
+        await speculation.wait()
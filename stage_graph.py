@@ -0,0 +1,237 @@
+"""Declarative stage graph for workflows.
+
+A workflow is a set of Stages, each naming the stages it runs after. The
+graph starts every stage as soon as its dependencies are done, so
+independent stages (building the agent while NotebookLM is searched,
+writing the report file while the index is updated) overlap. Each stage can
+have:
+
+    timeout     seconds per attempt (asyncio.wait_for)
+    retries     extra attempts after a failure or timeout
+    resources   tags such as "browser", "llm", "disk"; a tag with a limit
+                runs at most that many stages at once
+    optional    a failure is recorded and its dependents get None instead
+                of failing the whole run
+
+Every run records per-stage timings and the critical path: the chain of
+stages that determined when the run finished. A listener, if given, is
+called with the StageRecord whenever a stage starts, finishes or fails.
+
+Usage:
+    graph = StageGraph([
+        Stage("search", search),
+        Stage("agent", build_agent, resources=("llm",)),
+        Stage("generate", generate, after=("search", "agent"), timeout=900),
+    ])
+    run = await graph.run()
+    run.results["generate"], run.critical_path
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# A stage receives its dependencies' results, keyed by stage name
+StageFn = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class Stage:
+    name: str
+    run: StageFn
+    after: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+    retries: int = 0
+    retry_delay: float = 0.5
+    resources: Tuple[str, ...] = ()
+    optional: bool = False
+
+
+@dataclass
+class StageRecord:
+    name: str
+    status: str = "pending"  # pending, running, ok, failed, skipped
+    attempts: int = 0
+    start_ms: Optional[int] = None
+    end_ms: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> Optional[int]:
+        if self.start_ms is None or self.end_ms is None:
+            return None
+        return self.end_ms - self.start_ms
+
+
+@dataclass
+class GraphRun:
+    """Outcome of one StageGraph.run."""
+
+    results: Dict[str, Any] = field(default_factory=dict)
+    records: Dict[str, StageRecord] = field(default_factory=dict)
+    critical_path: List[str] = field(default_factory=list)
+    duration_ms: int = 0
+
+    def timings(self) -> Dict[str, int]:
+        """Duration of every stage that ran, in milliseconds."""
+        return {name: record.duration_ms for name, record in self.records.items()
+                if record.duration_ms is not None}
+
+
+class StageGraph:
+    """Runs stages in dependency order, concurrently where possible."""
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        limits: Optional[Dict[str, int]] = None,
+        listener: Optional[Callable[[StageRecord], None]] = None,
+    ):
+        """
+        Args:
+            stages: The stages; names must be unique.
+            limits: Maximum concurrent stages per resource tag (unlimited if absent).
+            listener: Called with a stage's record on every status change.
+
+        Raises:
+            ValueError: On duplicate names, unknown dependencies or cycles.
+        """
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage: {stage.name}")
+            self.stages[stage.name] = stage
+        for stage in stages:
+            for dep in stage.after:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage {stage.name} depends on unknown stage {dep}")
+        self.order = self._topological_order()
+        self.limits = dict(limits or {})
+        self.listener = listener
+        self.records: Dict[str, StageRecord] = {}
+        self._started = 0.0
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        state: Dict[str, int] = {}  # 1 = visiting, 2 = done
+
+        def visit(name: str, path: Tuple[str, ...]):
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError("Stage cycle: " + " -> ".join(path + (name,)))
+            state[name] = 1
+            for dep in self.stages[name].after:
+                visit(dep, path + (name,))
+            state[name] = 2
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, ())
+        return order
+
+    def _set_status(self, record: StageRecord, status: str):
+        record.status = status
+        if self.listener is not None:
+            self.listener(record)
+
+    def _now_ms(self) -> int:
+        return int((time.perf_counter() - self._started) * 1000)
+
+    def critical_path(self, end: Optional[str] = None) -> List[str]:
+        """Chain of stages that determined when `end` (default: the last stage to finish) finished.
+
+        Walks back from `end` through the dependency that finished last.
+        """
+        finished = {name: r for name, r in self.records.items() if r.end_ms is not None}
+        if not finished:
+            return []
+        if end is None:
+            end = max(finished, key=lambda name: finished[name].end_ms)
+        path = []
+        while end is not None and end in finished:
+            path.append(end)
+            deps = [dep for dep in self.stages[end].after if dep in finished]
+            end = max(deps, key=lambda dep: finished[dep].end_ms) if deps else None
+        return list(reversed(path))
+
+    async def _attempt(self, stage: Stage, inputs: Dict[str, Any], semaphores) -> Any:
+        record = self.records[stage.name]
+        tags = sorted(tag for tag in set(stage.resources) if tag in semaphores)  # fixed order: no deadlock
+        for attempt in range(stage.retries + 1):
+            record.attempts = attempt + 1
+            acquired = []
+            try:
+                try:
+                    for tag in tags:
+                        await semaphores[tag].acquire()
+                        acquired.append(tag)
+                    if record.start_ms is None:
+                        record.start_ms = self._now_ms()
+                        self._set_status(record, "running")
+                    if stage.timeout is not None:
+                        return await asyncio.wait_for(stage.run(inputs), timeout=stage.timeout)
+                    return await stage.run(inputs)
+                finally:
+                    for tag in acquired:
+                        semaphores[tag].release()
+            except Exception as e:
+                record.error = f"{type(e).__name__}: {e}"
+                if attempt >= stage.retries:
+                    raise
+                await asyncio.sleep(stage.retry_delay * (2 ** attempt))
+
+    async def _run_stage(self, stage: Stage, tasks: Dict[str, asyncio.Task], semaphores) -> Any:
+        inputs = {}
+        for dep in stage.after:
+            inputs[dep] = await tasks[dep]
+        record = self.records[stage.name]
+        try:
+            result = await self._attempt(stage, inputs, semaphores)
+        except asyncio.CancelledError:
+            record.status = "skipped"
+            raise
+        except Exception:
+            record.end_ms = self._now_ms()
+            self._set_status(record, "failed")
+            if stage.optional:
+                return None
+            raise
+        record.end_ms = self._now_ms()
+        record.error = None
+        self._set_status(record, "ok")
+        return result
+
+    async def run(self) -> GraphRun:
+        """Run every stage once.
+
+        Returns:
+            GraphRun with results, records and the critical path.
+
+        Raises:
+            Exception: The error of the first required stage that failed
+                (after its retries); the stages still running are cancelled.
+        """
+        self._started = time.perf_counter()
+        self.records = {name: StageRecord(name) for name in self.order}
+        semaphores = {tag: asyncio.Semaphore(limit) for tag, limit in self.limits.items()}
+
+        tasks: Dict[str, asyncio.Task] = {}
+        for name in self.order:  # dependencies first, so their tasks exist
+            tasks[name] = asyncio.create_task(self._run_stage(self.stages[name], tasks, semaphores))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        return GraphRun(
+            results={name: task.result() for name, task in tasks.items()},
+            records=self.records,
+            critical_path=self.critical_path(),
+            duration_ms=self._now_ms(),
+        )
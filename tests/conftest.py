@@ -8,3 +8,32 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 # Load environment variables from .env file
 from dotenv import load_dotenv
 load_dotenv()
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _output_dir(tmp_path, monkeypatch):
+    """Keep reports and indexes written by tests out of the repo's output/."""
+    monkeypatch.setenv("OUTPUT_DIR", str(tmp_path / "output"))
+
+
+@pytest.fixture
+def fake_notebooklm():
+    """A running offline NotebookLM stand-in (see fake_notebooklm.py)."""
+    from fake_notebooklm import FakeNotebookLM
+
+    with FakeNotebookLM(thinking_seconds=0.2, chunk_interval=0.05) as server:
+        yield server
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """A running mock OpenAI-compatible server, wired up as the MiniMax provider."""
+    from fake_llm import FakeLLM
+
+    with FakeLLM(first_token_seconds=0.01, tokens_per_second=0) as server:
+        monkeypatch.setenv("MINIMAX_BASE_URL", server.base_url)
+        monkeypatch.setenv("MINIMAX_API_KEY", "fake-key")
+        monkeypatch.setenv("MINIMAX_MODEL", "fake-model")
+        yield server
@@ -0,0 +1,132 @@
+"""Test the local HTTP API."""
+
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from api_server import ApiServer, ArticleService
+
+
+async def _request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+        + body
+    )
+    await writer.drain()
+    raw = await asyncio.wait_for(reader.read(), timeout=5)
+    writer.close()
+    head, _, content = raw.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    return status, head.decode("latin-1"), content.decode("utf-8")
+
+
+def _events(stream):
+    return [json.loads(line[len("data: "):]) for line in stream.splitlines() if line.startswith("data: ")]
+
+
+@asynccontextmanager
+async def _serving(run, **kwargs):
+    api = ApiServer(ArticleService(run=run, warm=False, **kwargs))
+    port = await api.start("127.0.0.1", 0)
+    try:
+        yield port
+    finally:
+        await api.close()
+
+
+@pytest.mark.asyncio
+async def test_submit_stream_and_fetch_article():
+    """Verify a job streams its progress and serves the article when done."""
+    async def run(topic, on_event):
+        on_event({"event": "stage", "stage": "generate", "status": "running"})
+        await asyncio.sleep(0.05)
+        on_event({"event": "tokens", "turn": 1, "input_tokens": 120, "output_tokens": 30})
+        return {"content": f"# {topic}\n\n正文", "trace_id": "trace_1", "output_path": "output/a.md"}
+
+    async with _serving(run) as port:
+        status, head, body = await _request(port, "POST", "/jobs", {"topic": "AI 产品经理"})
+        assert status == 202
+        job = json.loads(body)
+        assert f"Location: /jobs/{job['job_id']}" in head
+
+        status, head, stream = await _request(port, "GET", job["events"])
+        assert status == 200 and "text/event-stream" in head
+        events = _events(stream)
+        assert [e["event"] for e in events] == ["queued", "started", "stage", "tokens", "done"]
+        assert events[-1]["trace_id"] == "trace_1"
+
+        status, _, article = await _request(port, "GET", job["article"])
+        assert status == 200 and article == "# AI 产品经理\n\n正文"
+        status, _, body = await _request(port, "GET", f"/jobs/{job['job_id']}")
+        assert json.loads(body)["status"] == "done"
+
+
+@pytest.mark.asyncio
+async def test_admission_control():
+    """Verify submissions past the running and pending limits get 429."""
+    release = asyncio.Event()
+
+    async def run(topic, on_event):
+        await release.wait()
+        return {"content": topic}
+
+    async with _serving(run, max_concurrent=1, max_pending=1) as port:
+        first = json.loads((await _request(port, "POST", "/jobs", {"topic": "one"}))[2])
+        assert (await _request(port, "POST", "/jobs", {"topic": "two"}))[0] == 202
+
+        status, head, _ = await _request(port, "POST", "/jobs", {"topic": "three"})
+        assert status == 429 and "Retry-After" in head
+        assert (await _request(port, "GET", first["article"]))[0] == 409
+
+        health = json.loads((await _request(port, "GET", "/health"))[2])
+        assert (health["running"], health["pending"]) == (1, 1)
+
+        release.set()
+        await _request(port, "GET", first["events"])
+        assert (await _request(port, "POST", "/jobs", {"topic": "four"}))[0] == 202
+
+
+@pytest.mark.asyncio
+async def test_errors():
+    """Verify bad input and failed jobs are reported."""
+    async def run(topic, on_event):
+        raise RuntimeError("LLM down")
+
+    async with _serving(run) as port:
+        assert (await _request(port, "POST", "/jobs", {"topic": "  "}))[0] == 400
+        assert (await _request(port, "POST", "/jobs", ["not", "an", "object"]))[0] == 400
+        assert (await _request(port, "GET", "/jobs/missing"))[0] == 404
+        assert (await _request(port, "DELETE", "/jobs"))[0] == 405
+
+        job = json.loads((await _request(port, "POST", "/jobs", {"topic": "t"}))[2])
+        events = _events((await _request(port, "GET", job["events"]))[2])
+        assert events[-1] == {"id": 3, "event": "failed", "error": "RuntimeError: LLM down"}
+
+
+@pytest.mark.asyncio
+@patch('main.create_agent_with_tools')
+async def test_workflow_emits_stage_events(mock_create_agent, tmp_path):
+    """Verify run_workflow reports stage progress through on_event."""
+    from main import run_workflow
+
+    mock_create_agent.return_value = MagicMock()
+    result_mock = MagicMock()
+    result_mock.final_output = "Article"
+
+    async def fake_run_agent(agent, prompt):
+        return result_mock
+
+    events = []
+    with patch.dict(os.environ, {"OUTPUT_DIR": str(tmp_path), "SPECULATIVE_SEARCH": "false"}):
+        with patch('main.run_agent', fake_run_agent):
+            await run_workflow("Event Topic", on_event=events.append)
+
+    finished = [e["stage"] for e in events if e["event"] == "stage" and e["status"] == "ok"]
+    assert {"agent", "generate", "prepare", "write", "index"} <= set(finished)
+    assert finished.index("generate") < finished.index("write")
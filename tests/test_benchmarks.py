@@ -0,0 +1,60 @@
+"""Test the benchmark runner's baseline comparison and a quick smoke run."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+from run_benchmarks import compare, run_all
+
+
+def test_compare_flags_slowdowns_beyond_tolerance():
+    """Verify durations regress only past both relative and absolute limits."""
+    baseline = {"workflow_seconds": 1.0, "create_agent_seconds": 0.001, "cli_startup_seconds": 0.5}
+    current = {"workflow_seconds": 1.5, "create_agent_seconds": 0.003, "cli_startup_seconds": 0.55}
+
+    rows = {row["metric"]: row for row in compare(current, baseline, tolerance=0.25)}
+
+    assert rows["workflow_seconds"]["regressed"]
+    assert not rows["create_agent_seconds"]["regressed"]  # +2 ms is noise
+    assert not rows["cli_startup_seconds"]["regressed"]   # +10% is within tolerance
+
+
+def test_compare_throughput_regresses_when_lower():
+    """Verify throughput is treated as higher-is-better."""
+    rows = compare({"concurrent_throughput": 5.0}, {"concurrent_throughput": 10.0})
+    assert rows[0]["regressed"]
+    rows = compare({"concurrent_throughput": 20.0}, {"concurrent_throughput": 10.0})
+    assert not rows[0]["regressed"]
+
+
+def test_compare_ignores_metrics_missing_from_baseline():
+    """Verify new metrics do not fail the comparison."""
+    assert compare({"new_metric": 1.0}, {}) == []
+
+
+@pytest.mark.asyncio
+async def test_run_all_smoke(tmp_path, monkeypatch):
+    """Verify the in-process benchmarks run against the stand-ins."""
+    monkeypatch.chdir(tmp_path)
+    metrics = await run_all(repeat=1, concurrency=2, first_token_seconds=0.0, skip=["cli_startup"])
+
+    assert set(metrics) == {
+        "create_agent_seconds", "run_search_overhead_seconds", "workflow_seconds",
+        "concurrent_p95_seconds", "concurrent_throughput",
+    }
+    assert all(value > 0 for value in metrics.values())
+
+
+@pytest.mark.asyncio
+async def test_run_search_overhead_uses_scratch_library(tmp_path, monkeypatch):
+    """Verify the run_search benchmark never opens the skill's real library."""
+    import notebooklm_tool
+    from run_benchmarks import bench_run_search_overhead
+
+    real_library = notebooklm_tool._library
+    assert await bench_run_search_overhead(1, str(tmp_path)) > 0
+    assert (tmp_path / "notebooklm" / "library.db").exists()
+    assert notebooklm_tool._library is real_library
@@ -0,0 +1,241 @@
+"""Test the NotebookLM browser pool with fake contexts and pages."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "notebooklm_skill" / "scripts"))
+
+from browser_pool import BrowserPool, PoolExhaustedError
+
+NOTEBOOK_A = "https://notebooklm.google.com/notebook/a"
+NOTEBOOK_B = "https://notebooklm.google.com/notebook/b"
+
+
+class FakePage:
+    def __init__(self):
+        self.url = "about:blank"
+        self.closed = False
+        self.navigations = 0
+        self.input_visible = True
+
+    def goto(self, url, **kwargs):
+        self.url = url
+        self.navigations += 1
+
+    def wait_for_selector(self, selector, **kwargs):
+        if not self.input_visible:
+            raise TimeoutError(selector)
+        return object()
+
+    def is_visible(self, selector):
+        return self.input_visible
+
+    def is_closed(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self, slot):
+        self.slot = slot
+        self.pages = []
+        self.closed = False
+
+    def new_page(self):
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    contexts = []
+
+    def factory(slot):
+        context = FakeContext(slot)
+        contexts.append(context)
+        return context
+
+    kwargs.setdefault("rss_ceiling_mb", None)
+    pool = BrowserPool(context_factory=factory, asker=lambda page, q: f"answer to {q}", **kwargs)
+    return pool, contexts
+
+
+def test_pool_reuses_warm_page():
+    """Verify a second question on the same notebook reuses the open page."""
+    pool, contexts = make_pool(contexts=1, pages_per_context=2)
+
+    assert pool.ask("q1", NOTEBOOK_A) == "answer to q1"
+    assert pool.ask("q2", NOTEBOOK_A) == "answer to q2"
+
+    assert len(contexts) == 1
+    assert len(contexts[0].pages) == 1
+    stats = pool.stats()
+    assert stats["warm_hits"] == 1
+    assert stats["questions"] == 2
+    assert stats["in_use"] == 0
+    assert stats["idle"] == 1
+
+
+def test_pool_recycles_page_after_max_questions():
+    """Verify pages are closed after K questions and replaced on demand."""
+    pool, contexts = make_pool(contexts=1, pages_per_context=1, max_questions_per_page=2)
+
+    for i in range(3):
+        pool.ask(f"q{i}", NOTEBOOK_A)
+
+    first = contexts[0].pages[0]
+    assert first.closed
+    assert len(contexts[0].pages) == 2
+    assert pool.stats()["recycled_pages"] == 1
+
+
+def test_pool_recycles_page_failing_probe():
+    """Verify a page that lost its input (e.g. signed out) is not reused."""
+    pool, contexts = make_pool(contexts=1, pages_per_context=2)
+
+    pool.ask("q1", NOTEBOOK_A)
+    stale = contexts[0].pages[0]
+    stale.url = "https://accounts.google.com/signin"
+
+    pool.ask("q2", NOTEBOOK_A)
+
+    assert stale.closed
+    stats = pool.stats()
+    assert stats["probe_failures"] == 1
+    assert stats["warm_hits"] == 0
+
+
+def test_pool_renavigates_idle_page_when_full():
+    """Verify a full pool moves an idle page to another notebook."""
+    pool, contexts = make_pool(contexts=1, pages_per_context=1)
+
+    pool.ask("q1", NOTEBOOK_A)
+    pool.ask("q2", NOTEBOOK_B)
+
+    assert len(contexts[0].pages) == 1
+    assert contexts[0].pages[0].url == NOTEBOOK_B
+    assert contexts[0].pages[0].navigations == 2
+
+
+def test_pool_exhausted_and_release():
+    """Verify acquiring beyond capacity raises, and release frees a slot."""
+    pool, contexts = make_pool(contexts=2, pages_per_context=1)
+
+    first = pool.acquire(NOTEBOOK_A)
+    second = pool.acquire(NOTEBOOK_A)
+    assert {first.slot, second.slot} == {0, 1}
+    assert pool.stats()["in_use"] == 2
+
+    with pytest.raises(PoolExhaustedError):
+        pool.acquire(NOTEBOOK_A)
+
+    pool.release(first)
+    assert pool.acquire(NOTEBOOK_A) is first
+    assert pool.stats()["acquired"] == 3
+
+
+def test_pool_failed_answer_recycles_page():
+    """Verify a page that produced no answer is closed."""
+    pool, contexts = make_pool(contexts=1, pages_per_context=1)
+    pool.asker = lambda page, q: None
+
+    assert pool.ask("q", NOTEBOOK_A) is None
+    assert contexts[0].pages[0].closed
+    assert pool.stats()["pages"] == 0
+
+
+def test_pool_maintain_warms_spares():
+    """Verify maintain() pre-navigates spare pages to the warm notebook."""
+    pool, contexts = make_pool(contexts=1, pages_per_context=3, warm_spares=2, warm_url=NOTEBOOK_A)
+
+    pool.maintain()
+    assert pool.stats()["idle"] == 2
+    assert all(p.url == NOTEBOOK_A for p in contexts[0].pages)
+
+    pool.ask("q", NOTEBOOK_A)
+    assert pool.stats()["warm_hits"] == 1
+
+    pool.close()
+    assert contexts[0].closed
+    assert pool.stats()["pages"] == 0
+
+
+def test_pool_warm_prepares_page_once():
+    """Verify warm() opens a notebook page and reuses it when already ready."""
+    pool, contexts = make_pool(contexts=1, pages_per_context=2)
+
+    first = pool.warm(NOTEBOOK_A)
+    assert pool.warm(NOTEBOOK_A) is first
+    assert len(contexts[0].pages) == 1
+
+    pool.ask("q", NOTEBOOK_A)
+    assert pool.stats()["warm_hits"] == 1
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+        self.closed = False
+
+    def new_context(self, storage_state=None, **kwargs):
+        context = FakeContext(len(self.contexts))
+        context.storage_state = storage_state
+        self.contexts.append(context)
+        return context
+
+    def is_connected(self):
+        return not self.closed
+
+    def close(self):
+        self.closed = True
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.browsers = []
+        self.chromium = self
+
+    def launch(self, **kwargs):
+        browser = FakeBrowser()
+        self.browsers.append(browser)
+        return browser
+
+
+def test_isolated_mode_shares_one_browser(tmp_path, monkeypatch):
+    """Verify isolated contexts come from one Chrome, seeded from state.json."""
+    pytest.importorskip("patchright")
+    import json
+    import browser_utils
+
+    state = tmp_path / "state.json"
+    state.write_text(json.dumps({
+        "cookies": [{"name": "SID", "domain": ".google.com", "expires": -1},
+                    {"name": "YSC", "domain": ".youtube.com", "expires": -1}],
+        "origins": [{"origin": "https://notebooklm.google.com", "localStorage": []}],
+    }))
+    monkeypatch.setattr(browser_utils, "STATE_FILE", state)
+
+    playwright = FakePlaywright()
+    pool = BrowserPool(playwright, contexts=3, pages_per_context=1, rss_ceiling_mb=None,
+                       context_mode="isolated", asker=lambda page, q: "answer")
+    pages = [pool.acquire(url) for url in (NOTEBOOK_A, NOTEBOOK_B, NOTEBOOK_A)]
+
+    assert len(playwright.browsers) == 1
+    browser = playwright.browsers[0]
+    assert len(browser.contexts) == 3
+    seeded = browser.contexts[0].storage_state
+    assert [c["name"] for c in seeded["cookies"]] == ["SID"]
+    assert seeded["origins"][0]["origin"] == "https://notebooklm.google.com"
+
+    for pooled in pages:
+        pool.release(pooled)
+    pool.close()
+    assert browser.closed
+    assert all(context.closed for context in browser.contexts)
@@ -0,0 +1,72 @@
+"""Test browser resource helpers (RSS measurement, lean-mode request filter)."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "notebooklm_skill" / "scripts"))
+
+
+@pytest.mark.skipif(not Path("/proc").exists(), reason="Requires /proc")
+def test_process_tree_rss_counts_children():
+    """Verify descendants' RSS is measured and the sampler keeps a peak."""
+    from resource_monitor import process_tree_rss, PeakRSSSampler
+
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+    try:
+        with PeakRSSSampler(interval=0.05) as sampler:
+            rss = process_tree_rss()
+        assert rss > 0
+        assert sampler.peak_bytes >= rss * 0.5
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_lean_mode_blocks_non_essential_requests():
+    """Verify lean mode keeps NotebookLM traffic and drops the rest."""
+    pytest.importorskip("patchright")
+    from browser_utils import BrowserFactory
+
+    assert not BrowserFactory.is_lean_blocked("https://notebooklm.google.com/notebook/x", "document")
+    assert not BrowserFactory.is_lean_blocked("https://www.gstatic.com/app.js", "script")
+    assert BrowserFactory.is_lean_blocked("https://lh3.googleusercontent.com/a.png", "image")
+    assert BrowserFactory.is_lean_blocked("https://fonts.gstatic.com/s/roboto.woff2", "font")
+    assert BrowserFactory.is_lean_blocked("https://play.google.com/log?format=json", "xhr")
+    assert BrowserFactory.is_lean_blocked("https://cdn.example.com/lib.js", "script")
+
+
+def test_lean_mode_allows_notebooklm_base_url_host():
+    """Verify lean mode keeps requests to a NOTEBOOKLM_BASE_URL off Google (e.g. the fake server)."""
+    import os
+
+    scripts = Path(__file__).parent.parent / "notebooklm_skill" / "scripts"
+    env = {**os.environ, "NOTEBOOKLM_BASE_URL": "http://127.0.0.1:8765"}
+    hosts = subprocess.run(
+        [sys.executable, "-c", "import config; print(' '.join(config.LEAN_ALLOWED_HOSTS))"],
+        cwd=scripts, env=env, capture_output=True, text=True, check=True,
+    ).stdout.split()
+
+    assert "127.0.0.1" in hosts and "google.com" in hosts
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Requires fcntl")
+def test_profile_lock_waits_for_holder(tmp_path):
+    """Verify a second launch on a held profile waits and then times out."""
+    import threading
+    from profile_lock import ProfileLock
+
+    profile = tmp_path / "browser_profile"
+    holder = ProfileLock(profile).acquire()
+
+    with pytest.raises(TimeoutError, match="NOTEBOOKLM_CONTEXT_MODE=isolated"):
+        ProfileLock(profile, timeout=0.3).acquire()
+    with ProfileLock(tmp_path / "browser_profile_1", timeout=0.3) as other:
+        assert other.held  # other profiles are not blocked
+
+    threading.Timer(0.3, holder.release).start()
+    with ProfileLock(profile, timeout=5) as waiter:
+        assert waiter.held
+    assert not holder.held
@@ -0,0 +1,120 @@
+"""Test the planner/writer model cascade."""
+
+import os
+from unittest.mock import patch, AsyncMock
+
+import pytest
+
+from llm.config import LLMConfig
+
+
+def test_stage_config_overrides_model():
+    """Verify a stage can pick a different model from the same provider."""
+    env = {"MINIMAX_API_KEY": "key", "MINIMAX_MODEL": "MiniMax-Text-01", "LLM_PLANNER_MODEL": "fast-model"}
+    with patch.dict(os.environ, env, clear=True):
+        assert LLMConfig.load_stage("planner").model == "fast-model"
+        assert LLMConfig.load_stage("writer").model == "MiniMax-Text-01"
+        with pytest.raises(ValueError):
+            LLMConfig.load_stage("reviewer")
+
+    with patch.dict(os.environ, {}, clear=True):
+        assert LLMConfig.load_stage("writer") is None  # default provider not configured
+    with patch.dict(os.environ, {"LLM_WRITER_PROVIDER": "openai"}, clear=True):
+        with pytest.raises(ValueError, match="OPENAI_API_KEY"):
+            LLMConfig.load_stage("writer")  # named explicitly, so no silent fallback
+
+
+def test_stage_provider_reuses_warm_provider():
+    """Verify a warm provider serving the stage's model is reused and others are not."""
+    from agent import create_stage_provider
+    from llm import MiniMaxProvider
+
+    env = {"MINIMAX_API_KEY": "key", "MINIMAX_MODEL": "MiniMax-Text-01", "LLM_PLANNER_MODEL": "fast-model"}
+    with patch.dict(os.environ, env, clear=True):
+        warm = MiniMaxProvider.from_config(LLMConfig.load_provider("minimax"))
+        assert create_stage_provider("writer", warm=warm) is warm
+        planner = create_stage_provider("planner", warm=warm)
+
+    assert planner is not warm
+    assert planner.config.model_id == "fast-model"
+
+
+def test_stage_agents():
+    """Verify the planner has the search tool and the writer has none."""
+    from agent import create_planner_agent, create_writer_agent
+
+    env = {"MINIMAX_API_KEY": "key", "LLM_PLANNER_MODEL": "fast-model", "LLM_WRITER_MODEL": "strong-model"}
+    with patch.dict(os.environ, env, clear=True):
+        planner = create_planner_agent(trace_id="t")
+        writer = create_writer_agent(trace_id="t")
+
+    assert planner.model.model == "fast-model"
+    assert [tool.name for tool in planner.tools] == ["search_materials"]
+    assert "【素材简报】" in planner.instructions
+    assert writer.model.model == "strong-model"
+    assert writer.tools == []
+    assert "【正文】" in writer.instructions
+
+
+@pytest.mark.asyncio
+async def test_cascade_workflow_against_mock_llm(fake_llm, tmp_path):
+    """Verify the planner searches, then the writer writes from the brief."""
+    from agents import set_tracing_disabled
+    from fake_llm import DEFAULT_ARTICLE
+    from main import run_workflow
+
+    set_tracing_disabled(True)
+    brief = "【素材简报】\n选题：AI Agent\n素材：\n[1] 张和的经历 小米项目复盘"
+
+    def first_turn(messages):
+        if any("【素材简报】" in str(m.get("content")) for m in messages if m.get("role") == "user"):
+            return {"content": DEFAULT_ARTICLE}  # writer stage
+        return {"tool_calls": [{"name": "search_materials", "arguments": {"query": "AI Agent"}}]}
+
+    fake_llm.script = [first_turn, {"content": brief}]
+    search = AsyncMock(return_value="Search results for 'AI Agent':\nMaterial")
+    env = {"OUTPUT_DIR": str(tmp_path), "MODEL_CASCADE": "true", "SPECULATIVE_SEARCH": "false",
+           "RETRIEVAL_REUSE": "false", "LLM_PLANNER_MODEL": "fast-model"}
+    with patch.dict(os.environ, env):
+        with patch('tools.run_search', search):
+            result = await run_workflow("AI Agent")
+
+    search.assert_called_once_with("AI Agent")
+    assert result["content"] == DEFAULT_ARTICLE
+    assert result["usage"]["turns"] == 3  # tool call, brief, article
+    assert fake_llm.stats()["requests"] == 3
+
+
+@pytest.mark.asyncio
+async def test_cascade_closes_stage_providers_it_builds(fake_llm, tmp_path):
+    """Verify the planner provider built for a run is closed and the warm one kept open."""
+    from agents import set_tracing_disabled
+    from fake_llm import DEFAULT_ARTICLE
+    from llm import MiniMaxProvider
+    from main import run_workflow
+
+    set_tracing_disabled(True)
+
+    def turn(messages):
+        if any("【素材简报】" in str(m.get("content")) for m in messages if m.get("role") == "user"):
+            return {"content": DEFAULT_ARTICLE}  # writer stage
+        return {"content": "【素材简报】\n素材：无"}
+
+    fake_llm.script = [turn, turn]
+    env = {"OUTPUT_DIR": str(tmp_path), "MODEL_CASCADE": "true", "SPECULATIVE_SEARCH": "false",
+           "RETRIEVAL_REUSE": "false", "LLM_PLANNER_MODEL": "fast-model"}
+    with patch.dict(os.environ, env):
+        warm = MiniMaxProvider.from_config(LLMConfig.load_provider("minimax"))
+        closed = []
+        original_close = MiniMaxProvider.close
+
+        async def close(self):
+            closed.append(self.config.model_id)
+            await original_close(self)
+
+        with patch.object(MiniMaxProvider, "close", close):
+            result = await run_workflow("AI Agent", provider=warm)
+        await warm.close()
+
+    assert result["content"] == DEFAULT_ARTICLE
+    assert closed == ["fast-model"]
@@ -0,0 +1,90 @@
+"""Test CleanupManager size scanning and browser profile pruning."""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "notebooklm_skill" / "scripts"))
+
+from cleanup_manager import CleanupManager
+
+
+def _write(path: Path, size: int):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+
+
+def _profile(data_dir: Path) -> Path:
+    profile = data_dir / "browser_state" / "browser_profile"
+    _write(profile / "Default" / "Cookies", 100)
+    _write(profile / "Default" / "Local Storage" / "leveldb" / "000003.log", 200)
+    _write(profile / "Default" / "Cache" / "Cache_Data" / "f_000001", 1000)
+    _write(profile / "Default" / "Code Cache" / "js" / "index", 300)
+    _write(profile / "Default" / "GPUCache" / "data_0", 400)
+    _write(profile / "GrShaderCache" / "data_1", 50)
+    _write(data_dir / "browser_state" / "state.json", 10)
+    return profile
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_sizes_match_sequential_walk(tmp_path, workers):
+    """Verify scandir sizes (sequential and parallel) equal a plain walk."""
+    _profile(tmp_path)
+    _write(tmp_path / "sessions.json", 7)
+    _write(tmp_path / "library.db", 20)
+
+    manager = CleanupManager(data_dir=tmp_path, workers=workers)
+    data = manager.get_cleanup_paths()
+    expected = sum(p.stat().st_size for p in tmp_path.rglob("*") if p.is_file())
+
+    assert data["total_size"] == expected == 2087
+    sizes = {Path(i["path"]).name: i["size"] for i in data["categories"]["browser_state"]}
+    assert sizes == {"browser_profile": 2050, "state.json": 10}
+    assert manager._get_size(tmp_path / "missing") == 0
+    assert manager.get_cleanup_paths(preserve_library=True)["categories"]["library"] == []
+
+
+def test_category_sizes_are_cached_until_invalidated(tmp_path):
+    """Verify a second scan reuses cached sizes until the cache is cleared."""
+    profile = _profile(tmp_path)
+    manager = CleanupManager(data_dir=tmp_path, workers=2, cache_ttl=60)
+    first = manager.get_cleanup_paths()["total_size"]
+
+    _write(profile / "Default" / "new_file", 5000)
+    assert manager.get_cleanup_paths()["total_size"] == first
+
+    manager.invalidate_cache()
+    assert manager.get_cleanup_paths()["total_size"] == first + 5000
+
+
+def test_prune_deletes_only_caches(tmp_path):
+    """Verify prune removes Cache, Code Cache and GPUCache and keeps the rest."""
+    profile = _profile(tmp_path)
+    manager = CleanupManager(data_dir=tmp_path, workers=2)
+
+    preview = manager.prune_profile(dry_run=True)
+    assert preview == {"dry_run": True, "would_delete": 3, "would_free": 1700}
+
+    result = manager.prune_profile()
+    assert result["deleted_count"] == 3 and result["deleted_size"] == 1700
+    remaining = sorted(str(p.relative_to(profile)) for p in profile.rglob("*") if p.is_file())
+    assert remaining == [
+        "Default/Cookies",
+        "Default/Local Storage/leveldb/000003.log",
+        "GrShaderCache/data_1",
+    ]
+    assert manager.get_prune_paths()["total_items"] == 0
+
+
+def test_prune_refuses_while_browser_runs(tmp_path):
+    """Verify prune does not touch a profile Chrome holds unless forced."""
+    profile = _profile(tmp_path)
+    os.symlink("host-1234", profile / "SingletonLock")
+    manager = CleanupManager(data_dir=tmp_path)
+
+    with pytest.raises(RuntimeError, match="SingletonLock"):
+        manager.prune_profile()
+    assert (profile / "Default" / "Cache").exists()
+    assert manager.prune_profile(force=True)["deleted_count"] == 3
@@ -0,0 +1,97 @@
+"""Test the mock OpenAI-compatible LLM server and the workflow load harness."""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from openai import AsyncOpenAI, RateLimitError, InternalServerError
+
+from fake_llm import FakeLLM, tokenize
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+
+def _client(server):
+    return AsyncOpenAI(api_key="fake-key", base_url=server.base_url, max_retries=0)
+
+
+@pytest.mark.asyncio
+async def test_scripted_tool_call_then_text(fake_llm):
+    """Verify turns follow the script: tool calls first, then the article."""
+    fake_llm.script = [
+        {"tool_calls": [{"name": "search_materials", "arguments": {"query": "q1"}}]},
+        {"content": "【标题】\nT\n\n【正文】\nBody"},
+    ]
+    client = _client(fake_llm)
+    messages = [{"role": "user", "content": "topic"}]
+
+    first = await client.chat.completions.create(model="fake-model", messages=messages)
+    call = first.choices[0].message.tool_calls[0]
+    assert first.choices[0].finish_reason == "tool_calls"
+    assert call.function.name == "search_materials"
+    assert json.loads(call.function.arguments) == {"query": "q1"}
+
+    messages += [
+        {"role": "assistant", "content": None, "tool_calls": [call.model_dump()]},
+        {"role": "tool", "tool_call_id": call.id, "content": "results"},
+    ]
+    second = await client.chat.completions.create(model="fake-model", messages=messages)
+    assert second.choices[0].message.content.startswith("【标题】")
+    assert second.usage.completion_tokens > 0
+
+
+@pytest.mark.asyncio
+async def test_streaming_reassembles_content(fake_llm):
+    """Verify SSE chunks add up to the scripted text and report usage."""
+    fake_llm.script = [{"content": "Hello streaming world, 你好"}]
+    stream = await _client(fake_llm).chat.completions.create(
+        model="fake-model", messages=[{"role": "user", "content": "hi"}],
+        stream=True, stream_options={"include_usage": True},
+    )
+    text, usage = "", None
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            text += chunk.choices[0].delta.content
+        usage = chunk.usage or usage
+
+    assert text == "Hello streaming world, 你好"
+    assert usage.completion_tokens == len(tokenize(text))
+
+
+@pytest.mark.asyncio
+async def test_error_injection(fake_llm):
+    """Verify queued 429/5xx responses surface as SDK errors."""
+    client = _client(fake_llm)
+    messages = [{"role": "user", "content": "hi"}]
+
+    fake_llm.fail_next(429)
+    with pytest.raises(RateLimitError):
+        await client.chat.completions.create(model="fake-model", messages=messages)
+
+    fake_llm.fail_next(500)
+    with pytest.raises(InternalServerError):
+        await client.chat.completions.create(model="fake-model", messages=messages)
+
+    await client.chat.completions.create(model="fake-model", messages=messages)
+    assert fake_llm.stats()["errors"] == 2
+
+
+@pytest.mark.asyncio
+async def test_workflow_load_harness():
+    """Verify the harness runs workflows end-to-end and reports percentiles."""
+    from workflow_load import run_load, percentile
+
+    assert percentile([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 95) == 10
+    assert percentile([], 95) is None
+
+    base_url = os.environ.get("MINIMAX_BASE_URL")
+    report = await run_load([1, 2], 2, search_latency=0.01,
+                            first_token_seconds=0.01, tokens_per_second=0)
+
+    assert [level["completed"] for level in report["levels"]] == [2, 2]
+    assert all(level["latency_p95_seconds"] > 0 for level in report["levels"])
+    # writer script: two retrieval turns plus the article per workflow
+    assert report["llm"]["requests"] == 12
+    assert os.environ.get("MINIMAX_BASE_URL") == base_url
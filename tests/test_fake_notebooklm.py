@@ -0,0 +1,175 @@
+"""Test the offline NotebookLM stand-in and drive the skill against it."""
+
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from fake_notebooklm import FakeNotebookLM, split_chunks
+
+SCRIPTS = Path(__file__).parent.parent / "notebooklm_skill" / "scripts"
+
+
+def _post(server, question, notebook="nb"):
+    request = urllib.request.Request(
+        server.base_url + "/api/query",
+        data=json.dumps({"question": question, "notebook": notebook}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    return urllib.request.urlopen(request, timeout=5)
+
+
+def test_split_chunks_roundtrip():
+    """Verify chunking keeps the full text."""
+    text = "abcdefghij"
+    assert "".join(split_chunks(text, 3)) == text
+    assert len(split_chunks(text, 3)) == 3
+    assert split_chunks("", 4) == [""]
+
+
+def test_notebook_page_serves_dom_contract(fake_notebooklm):
+    """Verify the page carries the selectors the skill automates."""
+    sys.path.insert(0, str(SCRIPTS))
+    from config import QUERY_INPUT_SELECTORS
+
+    body = urllib.request.urlopen(fake_notebooklm.notebook_url("demo"), timeout=5).read().decode()
+
+    assert 'class="query-box-input"' in body
+    assert 'aria-label="Input for queries"' in body
+    assert 'class="thinking-message"' in body
+    assert "to-user-container" in body and "message-text-content" in body
+    assert any("query-box-input" in s for s in QUERY_INPUT_SELECTORS)
+
+
+def test_query_streams_answer_after_thinking(fake_notebooklm):
+    """Verify answers arrive after the thinking delay, in order."""
+    start = time.perf_counter()
+    body = _post(fake_notebooklm, "What is RAG?").read().decode()
+
+    assert time.perf_counter() - start >= fake_notebooklm.thinking_seconds
+    assert body.startswith("Notebook nb answer to: What is RAG?")
+    assert fake_notebooklm.questions == [{"question": "What is RAG?", "notebook": "nb"}]
+
+
+def test_failure_injection(fake_notebooklm):
+    """Verify queued failures apply to the next matching requests only."""
+    fake_notebooklm.fail_next("error")
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        _post(fake_notebooklm, "q1")
+    assert exc.value.code == 500
+
+    fake_notebooklm.fail_next("drop")
+    partial = _post(fake_notebooklm, "q2").read().decode()
+    assert partial == split_chunks(fake_notebooklm.answer("q2", "nb"), fake_notebooklm.chunks)[0]
+
+    fake_notebooklm.fail_next("signin")
+    body = urllib.request.urlopen(fake_notebooklm.notebook_url(), timeout=5).read().decode()
+    assert "query-box-input" not in body
+
+    assert _post(fake_notebooklm, "q3").read().decode().startswith("Notebook nb")
+
+    with pytest.raises(ValueError):
+        fake_notebooklm.fail_next("explode")
+
+
+def test_hang_is_released_on_stop():
+    """Verify a hanging request does not block shutdown."""
+    server = FakeNotebookLM().start()
+    server.fail_next("hang")
+    request = urllib.request.Request(server.base_url + "/api/query", data=b'{"question": "q"}')
+    with pytest.raises(OSError):
+        urllib.request.urlopen(request, timeout=0.3)
+    server.stop()
+    assert server.questions == [{"question": "q", "notebook": ""}]
+
+
+@pytest.fixture
+def browser_page():
+    """A plain Chromium page (skipped where patchright or its browser is missing)."""
+    sync_api = pytest.importorskip("patchright.sync_api")
+    playwright = sync_api.sync_playwright().start()
+    try:
+        browser = playwright.chromium.launch(headless=True)
+    except Exception as e:
+        playwright.stop()
+        pytest.skip(f"Chromium not available: {e}")
+    context = browser.new_context()
+    try:
+        yield context
+    finally:
+        context.close()
+        browser.close()
+        playwright.stop()
+
+
+def test_ask_on_page_end_to_end(fake_notebooklm, browser_page):
+    """Verify ask_on_page types, waits out thinking and reads the answer."""
+    sys.path.insert(0, str(SCRIPTS))
+    from ask_question import ask_on_page
+
+    page = browser_page.new_page()
+    page.goto(fake_notebooklm.notebook_url("demo"))
+
+    first = ask_on_page(page, "first question", timeout=30)
+    second = ask_on_page(page, "second question", timeout=30)
+
+    assert first.startswith("Notebook demo answer to: first question")
+    assert second.startswith("Notebook demo answer to: second question")
+
+
+def test_browser_pool_end_to_end(fake_notebooklm, browser_page):
+    """Verify the pool reuses a warm page against the stand-in."""
+    sys.path.insert(0, str(SCRIPTS))
+    from browser_pool import BrowserPool
+    from ask_question import ask_on_page
+
+    host = fake_notebooklm.base_url.split("://", 1)[1]
+    pool = BrowserPool(
+        context_factory=lambda slot: browser_page, rss_ceiling_mb=None, host=host,
+        asker=lambda page, question: ask_on_page(page, question, timeout=30),
+    )
+    url = fake_notebooklm.notebook_url("pool")
+    try:
+        assert "q1" in pool.ask("q1", url)
+        assert "q2" in pool.ask("q2", url)
+        assert pool.stats()["warm_hits"] == 1
+    finally:
+        for pooled in list(pool.pages):
+            pooled.page.close()
+
+
+def test_concurrent_asks_on_default_config(fake_notebooklm, tmp_path):
+    """Verify two simultaneous one-shot questions on the persistent profile both answer."""
+    pytest.importorskip("patchright")
+    from notebooklm_tool import parse_answer_json
+
+    state_dir = tmp_path / "notebooklm" / "browser_state"
+    state_dir.mkdir(parents=True)
+    (state_dir / "state.json").write_text('{"cookies": [], "origins": []}')
+    env = {**os.environ, "NOTEBOOKLM_DATA_DIR": str(state_dir.parent),
+           "NOTEBOOKLM_BASE_URL": fake_notebooklm.base_url}
+    env.pop("NOTEBOOKLM_CONTEXT_MODE", None)
+
+    processes = [
+        subprocess.Popen(
+            [sys.executable, str(SCRIPTS / "ask_question.py"), "--question", question,
+             "--notebook-url", fake_notebooklm.notebook_url("demo"), "--json"],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env, cwd=SCRIPTS.parent,
+        )
+        for question in ("first question", "second question")
+    ]
+    payloads = [parse_answer_json(process.communicate(timeout=300)[0]) or {} for process in processes]
+
+    for payload in payloads:
+        message = (payload.get("error") or {}).get("message", "")
+        if "is not found" in message or "Executable doesn't exist" in message:
+            pytest.skip(f"Chrome not available: {message}")
+    answers = [payload.get("answer") or "" for payload in payloads]
+    assert answers[0].startswith("Notebook demo answer to: first question")
+    assert answers[1].startswith("Notebook demo answer to: second question")
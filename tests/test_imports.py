@@ -32,3 +32,15 @@ def test_agents_module_has_function_tool():
     """Verify agents module has function_tool decorator."""
     import agents
     assert hasattr(agents, 'function_tool')
+
+
+def test_main_import_leaves_agents_sdk_unloaded():
+    """Verify importing main does not pull in the Agents SDK (loaded lazily, see prewarm.py)."""
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    check = "import sys, main; print(sorted({'agents', 'openai', 'httpx'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", check], cwd=Path(__file__).parent.parent,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,135 @@
+"""Test the persistent job queue and worker."""
+
+import asyncio
+import threading
+
+import pytest
+
+from job_queue import JobQueue, JobWorker
+
+
+def test_lease_order_and_completion(tmp_path):
+    """Verify jobs are leased by priority then submit order, and only once."""
+    with JobQueue(tmp_path / "jobs.db") as queue:
+        first = queue.submit("AI Technology")
+        urgent = queue.submit("Urgent topic", priority=5)
+        queue.submit("Later topic")
+
+        job = queue.lease("w1", seconds=60)
+        assert job["id"] == urgent and job["status"] == "running" and job["attempts"] == 1
+        assert queue.lease("w2", seconds=60)["id"] == first
+
+        assert queue.complete(urgent, "w1", "trace_1", "output/a.md")
+        assert not queue.complete(first, "w1")  # leased to w2
+        done = queue.get(urgent)
+        assert (done["status"], done["trace_id"], done["output_path"]) == ("done", "trace_1", "output/a.md")
+        assert queue.counts() == {"queued": 1, "running": 1, "done": 1, "failed": 0}
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    """Verify a crashed worker's job is re-leased and its heartbeat then fails."""
+    with JobQueue(tmp_path / "jobs.db") as queue:
+        job_id = queue.submit("t", attempts=2)
+        queue.lease("crashed", seconds=-1)  # already expired
+        taken = queue.lease("w2", seconds=60)
+        assert taken["id"] == job_id and taken["attempts"] == 2
+        assert not queue.heartbeat(job_id, "crashed")
+        assert queue.heartbeat(job_id, "w2")
+
+        # Out of attempts: an expired lease fails the job instead
+        queue.heartbeat(job_id, "w2", seconds=-1)
+        assert queue.lease("w3") is None
+        assert queue.get(job_id)["status"] == "failed"
+        assert "Lease expired" in queue.get(job_id)["error"]
+
+
+def test_fail_retries_with_backoff(tmp_path):
+    """Verify failed attempts are requeued after a delay until attempts run out."""
+    with JobQueue(tmp_path / "jobs.db") as queue:
+        job_id = queue.submit("t", attempts=2)
+        queue.lease("w1")
+        assert queue.fail(job_id, "w1", "boom", delay=60) == "queued"
+        assert queue.lease("w1") is None  # backing off
+
+        queue._conn.execute("UPDATE jobs SET not_before = 0")  # skip the wait
+        queue.lease("w1")
+        assert queue.fail(job_id, "w1", "boom again", delay=0) == "failed"
+        assert queue.get(job_id)["error"] == "boom again"
+        assert queue.fail(job_id, "w1", "late") is None
+
+
+def test_concurrent_leases_never_share_a_job(tmp_path):
+    """Verify separate connections (as separate processes use) lease disjoint jobs."""
+    db = tmp_path / "jobs.db"
+    with JobQueue(db) as queue:
+        for i in range(40):
+            queue.submit(f"topic {i}")
+
+    leased = []
+
+    def drain(owner):
+        with JobQueue(db) as queue:
+            while (job := queue.lease(owner, seconds=60)) is not None:
+                leased.append(job["id"])
+
+    threads = [threading.Thread(target=drain, args=(f"w{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(leased) == list(range(1, 41))
+
+
+@pytest.mark.asyncio
+async def test_worker_drains_with_bounded_concurrency(tmp_path):
+    """Verify the worker runs at most `concurrency` jobs at once and records results."""
+    running, peak = 0, 0
+
+    async def run(topic):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        if topic == "bad":
+            raise RuntimeError("generation failed")
+        return {"trace_id": f"trace_{topic}", "output_path": f"output/{topic}.md"}
+
+    with JobQueue(tmp_path / "jobs.db") as queue:
+        ids = [queue.submit(f"t{i}") for i in range(5)]
+        bad = queue.submit("bad", attempts=1)
+
+        worker = JobWorker(queue, concurrency=2, run=run, lease=30, owner="w1")
+        assert await worker.run(drain=True) == 5
+
+        assert peak == 2
+        assert all(queue.get(i)["status"] == "done" for i in ids)
+        assert queue.get(ids[0])["output_path"] == "output/t0.md"
+        assert queue.get(bad)["status"] == "failed"
+        assert queue.get(bad)["error"] == "RuntimeError: generation failed"
+
+
+@pytest.mark.asyncio
+async def test_worker_stops_when_lease_is_lost(tmp_path):
+    """Verify a job whose lease was taken over is cancelled, not completed."""
+    started = asyncio.Event()
+
+    async def run(topic):
+        started.set()
+        await asyncio.sleep(5)
+        return {}
+
+    with JobQueue(tmp_path / "jobs.db") as queue:
+        job_id = queue.submit("t")
+        worker = JobWorker(queue, concurrency=1, run=run, lease=0.15, owner="w1")
+        job = queue.lease("w1", seconds=0.15)
+
+        async def steal():
+            await started.wait()
+            queue._conn.execute("UPDATE jobs SET lease_owner = 'w2' WHERE id = ?", (job_id,))
+
+        await asyncio.wait_for(asyncio.gather(worker.run_job(job), steal()), timeout=2)
+        assert queue.get(job_id)["status"] == "running"
+        assert queue.get(job_id)["lease_owner"] == "w2"
+        assert worker.processed == 0
@@ -0,0 +1,176 @@
+"""Test the SQLite-backed NotebookLM notebook library."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "notebooklm_skill" / "scripts"))
+
+
+@pytest.fixture
+def library(tmp_path):
+    from notebook_manager import NotebookLibrary
+    return NotebookLibrary(data_dir=tmp_path)
+
+
+def _add(library, name, topics, tags=None):
+    return library.add_notebook(
+        url=f"https://notebooklm.google.com/notebook/{name}",
+        name=name,
+        description=f"{name} notes",
+        topics=topics,
+        tags=tags,
+    )
+
+
+def test_first_notebook_becomes_active(library):
+    """Verify the first notebook added is activated."""
+    _add(library, "Course", ["AI"])
+    _add(library, "Talks", ["PM"])
+
+    assert library.get_active_notebook()["id"] == "course"
+    assert [n["id"] for n in library.list_notebooks()] == ["course", "talks"]
+
+
+def test_duplicate_notebook_rejected(library):
+    """Verify adding the same ID twice raises ValueError."""
+    _add(library, "Course", ["AI"])
+    with pytest.raises(ValueError):
+        _add(library, "Course", ["AI"])
+
+
+def test_changes_visible_to_other_instances(tmp_path):
+    """Verify writes from one instance (process) are seen by another."""
+    from notebook_manager import NotebookLibrary
+
+    first = NotebookLibrary(data_dir=tmp_path)
+    second = NotebookLibrary(data_dir=tmp_path)
+
+    _add(first, "Course", ["AI"])
+    second.increment_use_count("course")
+    second.increment_use_count("course")
+
+    assert first.get_notebook("course")["use_count"] == 2
+    assert second.get_notebook("course")["use_count"] == 2
+
+
+def test_library_usable_from_another_thread(library):
+    """Verify a library opened on one thread can be read and written from another."""
+    import threading
+
+    _add(library, "Course", ["AI"])
+    errors = []
+
+    def use():
+        try:
+            library.list_notebooks()
+            library.increment_use_count("course")
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=use)
+    thread.start()
+    thread.join()
+
+    assert errors == []
+    assert library.get_notebook("course")["use_count"] == 1
+
+
+def test_update_and_remove(library):
+    """Verify updates persist and removal moves the active marker."""
+    _add(library, "Course", ["AI"])
+    _add(library, "Talks", ["PM"])
+
+    library.update_notebook("talks", topics=["PM", "技术选型"], tags=["camp"])
+    assert library.find_by_topic("技术选型")[0]["id"] == "talks"
+    assert library.find_by_tag("CAMP")[0]["id"] == "talks"
+
+    library.remove_notebook("course")
+    assert library.get_notebook("course") is None
+    assert library.active_notebook_id == "talks"
+
+
+def test_legacy_json_imported_once(tmp_path):
+    """Verify an existing library.json is migrated on first load."""
+    from notebook_manager import NotebookLibrary
+
+    legacy = {
+        "notebooks": {
+            "course": {
+                "id": "course", "url": "https://nb/course", "name": "Course",
+                "description": "d", "topics": ["AI"], "content_types": [],
+                "use_cases": [], "tags": ["x"], "created_at": "2026-01-01T00:00:00",
+                "updated_at": "2026-01-01T00:00:00", "use_count": 3, "last_used": None,
+            }
+        },
+        "active_notebook_id": "course",
+    }
+    (tmp_path / "library.json").write_text(json.dumps(legacy))
+
+    library = NotebookLibrary(data_dir=tmp_path)
+    assert library.get_notebook("course")["use_count"] == 3
+    assert library.active_notebook_id == "course"
+
+    library.remove_notebook("course")
+    assert NotebookLibrary(data_dir=tmp_path).list_notebooks() == []
+
+
+def test_export_round_trip(library, tmp_path):
+    """Verify export writes the legacy format and import restores it."""
+    from notebook_manager import NotebookLibrary
+
+    _add(library, "Course", ["AI"], tags=["camp"])
+    path = library.export_json(tmp_path / "export.json")
+
+    data = json.loads(path.read_text())
+    assert data["active_notebook_id"] == "course"
+    assert data["notebooks"]["course"]["topics"] == ["AI"]
+
+    other = NotebookLibrary(data_dir=tmp_path / "other")
+    assert other.import_json(path) == 1
+    assert other.get_notebook("course") == library.get_notebook("course")
+
+
+def test_tokenize_cjk_bigrams():
+    """Verify Chinese runs become character bigrams and Latin text words."""
+    from notebook_index import tokenize
+
+    assert tokenize("技术选型 for PMs") == ["技术", "术选", "选型", "for", "pms"]
+    assert tokenize("AI的") == ["ai", "的"]
+
+
+def test_rank_notebooks_bm25(library):
+    """Verify BM25 ranks the most specific notebook first."""
+    _add(library, "Camp QA", ["训练营答疑", "产品经理"], tags=["camp"])
+    _add(library, "Tech Talks", ["技术选型", "模型评测"])
+    _add(library, "Course", ["AI产品", "产品经理"])
+
+    ranked = library.rank_notebooks("产品经理需要参与技术选型")
+    assert ranked[0][0]["id"] == "tech-talks"
+    assert [score for _, score in ranked] == sorted((s for _, s in ranked), reverse=True)
+
+    assert library.search_notebooks("答疑")[0]["id"] == "camp-qa"
+    assert library.search_notebooks("unrelated") == []
+
+
+def test_notebook_url_routed_from_library(library):
+    """Verify _get_notebook_url routes a query and falls back to the active notebook."""
+    from unittest.mock import patch
+    from notebooklm_tool import _get_notebook_url
+
+    _add(library, "Course", ["AI产品"])
+    _add(library, "Tech Talks", ["技术选型"])
+
+    with patch('notebooklm_tool._library', library), patch.dict('os.environ', {}, clear=True):
+        assert _get_notebook_url("技术选型怎么做").endswith("/Tech Talks")
+        assert _get_notebook_url("something else").endswith("/Course")
+
+    with patch('notebooklm_tool._library', library), \
+         patch.dict('os.environ', {'NOTEBOOK_ROUTING': 'false', 'NOTEBOOK_URL': 'https://env'}, clear=True):
+        assert _get_notebook_url("技术选型") == "https://env"
+
+    with patch('notebooklm_tool._library', library), \
+         patch.dict('os.environ', {'NOTEBOOK_ID': 'pinned'}, clear=True):
+        assert _get_notebook_url("技术选型怎么做").endswith("/notebook/pinned")
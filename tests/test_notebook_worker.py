@@ -0,0 +1,143 @@
+"""Test the long-lived NotebookLM worker client."""
+
+import sys
+import textwrap
+
+import pytest
+from unittest.mock import patch
+
+
+FAKE_WORKER = textwrap.dedent('''
+    import json, os, sys
+
+    max_questions = int(sys.argv[sys.argv.index("--max-questions") + 1])
+    served = 0
+    print(json.dumps({"event": "ready", "pid": os.getpid()}), flush=True)
+    for line in sys.stdin:
+        request = json.loads(line)
+        method, params = request["method"], request["params"]
+        if method == "crash":
+            sys.exit(3)
+        if method == "ask":
+            served += 1
+            result = {"answer": "answer to " + params["question"], "pid": os.getpid()}
+        elif method == "fail":
+            print(json.dumps({"id": request["id"], "error": {"type": "PermissionError", "message": "no auth"}}), flush=True)
+            continue
+        else:
+            result = {"pid": os.getpid(), "questions_served": served}
+        print(json.dumps({"id": request["id"], "result": result}), flush=True)
+        if max_questions and served >= max_questions:
+            sys.exit(0)
+''')
+
+
+@pytest.fixture
+def fake_worker(tmp_path):
+    """Point the worker client at a stand-in worker script."""
+    (tmp_path / "scripts").mkdir()
+    (tmp_path / "scripts" / "notebook_worker.py").write_text(FAKE_WORKER)
+
+    with patch('notebooklm_tool.NOTEBOOKLM_PYTHON', sys.executable), \
+         patch('notebooklm_tool.NOTEBOOKLM_SKILL_PATH', tmp_path / "scripts"), \
+         patch('notebooklm_tool.WORKER_LOG_FILE', tmp_path / "worker.log"):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_worker_answers_requests(fake_worker):
+    """Verify requests round-trip through the worker process."""
+    from notebooklm_tool import NotebookWorker
+
+    worker = NotebookWorker("https://notebooklm.google.com/notebook/x")
+    try:
+        result = await worker.request("ask", {"question": "q1"})
+        assert result["answer"] == "answer to q1"
+
+        status = await worker.request("status")
+        assert status["questions_served"] == 1
+        assert status["pid"] == result["pid"]
+    finally:
+        await worker.close()
+
+
+@pytest.mark.asyncio
+async def test_worker_restarts_after_max_questions(fake_worker):
+    """Verify a retired worker is replaced on the next request."""
+    from notebooklm_tool import NotebookWorker
+
+    worker = NotebookWorker(max_questions=1)
+    try:
+        first = await worker.request("ask", {"question": "q1"})
+        second = await worker.request("ask", {"question": "q2"})
+        assert second["answer"] == "answer to q2"
+        assert first["pid"] != second["pid"]
+        assert worker.restarts == 1
+    finally:
+        await worker.close()
+
+
+@pytest.mark.asyncio
+async def test_worker_restarts_after_crash(fake_worker):
+    """Verify a crashed worker surfaces an error and is restarted."""
+    from notebooklm_tool import NotebookWorker, WorkerError
+
+    worker = NotebookWorker()
+    try:
+        with pytest.raises(WorkerError):
+            await worker.request("crash")
+        result = await worker.request("ask", {"question": "again"})
+        assert result["answer"] == "answer to again"
+    finally:
+        await worker.close()
+
+
+@pytest.mark.asyncio
+async def test_run_search_uses_worker(fake_worker):
+    """Verify run_search goes through the worker when enabled."""
+    from notebooklm_tool import run_search, shutdown_workers
+
+    with patch.dict('os.environ', {'NOTEBOOKLM_WORKER': '1', 'NOTEBOOK_URL': 'https://nb'}):
+        try:
+            result = await run_search("test query")
+        finally:
+            await shutdown_workers()
+
+    assert "answer to test query" in result
+
+
+@pytest.mark.asyncio
+async def test_one_worker_serves_every_notebook(fake_worker):
+    """Verify questions for different notebooks share the process's one worker."""
+    from notebooklm_tool import _ask_notebook, get_worker, shutdown_workers
+
+    with patch.dict('os.environ', {'NOTEBOOKLM_WORKER': '1'}):
+        try:
+            worker = get_worker()
+            await _ask_notebook("first", "https://nb/a")
+            await _ask_notebook("second", "https://nb/b")
+            assert get_worker() is worker
+            assert worker.restarts == 0
+        finally:
+            await shutdown_workers()
+
+
+@pytest.mark.asyncio
+async def test_worker_exit_fails_only_its_own_requests(fake_worker):
+    """Verify a dying worker leaves requests sent to its replacement alone."""
+    import asyncio
+    from notebooklm_tool import NotebookWorker, WorkerError
+
+    worker = NotebookWorker()
+    try:
+        await worker.start()
+        retried = asyncio.get_running_loop().create_future()
+        worker._pending[99] = (object(), retried)  # already re-sent to a fresh worker
+
+        with pytest.raises(WorkerError):
+            await worker.request("crash")
+        assert not retried.done()
+        assert 99 in worker._pending
+    finally:
+        worker._pending.pop(99, None)
+        await worker.close()
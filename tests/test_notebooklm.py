@@ -1,8 +1,10 @@
 """Test NotebookLM search tool using PleasePrompto/notebooklm-skill."""
 
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 import subprocess
+import sys
+from pathlib import Path
 
 
 def test_run_search_exists():
@@ -29,7 +31,7 @@ async def test_run_search_returns_string(mock_path, mock_auth):
     mock_result.stdout = "Test answer from NotebookLM"
     mock_result.stderr = ""
 
-    with patch('subprocess.run', return_value=mock_result):
+    with patch('notebooklm_tool._run_skill', AsyncMock(return_value=mock_result)):
         result = await run_search("test query")
         assert isinstance(result, str)
         assert "test query" in result
@@ -96,7 +98,7 @@ async def test_run_search_command_fails(mock_path, mock_auth):
     mock_result.stdout = ""
     mock_result.stderr = "Error: something went wrong"
 
-    with patch('subprocess.run', return_value=mock_result):
+    with patch('notebooklm_tool._run_skill', AsyncMock(return_value=mock_result)):
         result = await run_search("test query")
         assert isinstance(result, str)
         assert "failed" in result.lower()
@@ -131,3 +133,153 @@ def test_list_notebooks_exists():
     """Verify list_notebooks function exists."""
     from notebooklm_tool import list_notebooks
     assert callable(list_notebooks)
+
+
+def test_merge_answers_attributes_and_dedupes():
+    """Verify merged answers keep attribution and drop repeated passages."""
+    from notebooklm_tool import merge_answers
+
+    shared = "技术选型要先看评测集，再看成本"
+    result = merge_answers(
+        "技术选型",
+        [("Course", f"{shared}\n课程里的案例"), ("Talks", f"{shared}。\n分享里的观点")],
+        dropped=["Camp (timeout)"],
+    )
+
+    assert "### Source: Course" in result
+    assert "### Source: Talks" in result
+    assert result.count("评测集") == 1
+    assert "分享里的观点" in result
+    assert "Camp (timeout)" in result
+
+
+@pytest.mark.asyncio
+async def test_scatter_gather_drops_late_notebooks():
+    """Verify notebooks missing the deadline are dropped, not awaited."""
+    import asyncio
+    from notebooklm_tool import scatter_gather_search
+
+    async def fake_ask(query, url, timeout=300):
+        if url == "slow":
+            await asyncio.sleep(5)
+        return f"answer from {url}"
+
+    notebooks = [
+        {"name": "Fast", "url": "fast"},
+        {"name": "Slow", "url": "slow"},
+    ]
+    with patch('notebooklm_tool._ask_notebook', fake_ask):
+        result = await asyncio.wait_for(
+            scatter_gather_search("q", notebooks, deadline=0.1), timeout=2
+        )
+
+    assert "answer from fast" in result
+    assert "answer from slow" not in result
+    assert "Slow (timeout)" in result
+
+
+@pytest.mark.asyncio
+@patch('notebooklm_tool._check_authenticated', return_value=True)
+async def test_scatter_needs_isolated_contexts(mock_auth):
+    """Verify the default persistent profile queries one notebook, isolated mode fans out."""
+    from notebooklm_tool import run_search
+
+    notebooks = [{"name": "Course", "url": "course"}, {"name": "Talks", "url": "talks"}]
+    asked = []
+
+    async def fake_ask(query, url, timeout=300):
+        asked.append(url)
+        return f"answer from {url}"
+
+    with patch('notebooklm_tool._ask_notebook', fake_ask), \
+         patch('notebooklm_tool.route_notebook', lambda query, limit=1: notebooks[:limit]), \
+         patch.dict('os.environ', {'NOTEBOOK_SCATTER_TOP_K': '2'}, clear=True):
+        assert await run_search("q") == "Search results for 'q':\nanswer from course"
+        assert asked == ["course"]
+
+        asked.clear()
+        with patch.dict('os.environ', {'NOTEBOOKLM_CONTEXT_MODE': 'isolated'}):
+            result = await run_search("q")
+        assert sorted(asked) == ["course", "talks"]
+        assert "### Source: Talks" in result
+
+
+def _json_run(payload, returncode=0):
+    import json
+    result = MagicMock()
+    result.returncode = returncode
+    result.stdout = json.dumps(payload, ensure_ascii=False) + "\n"
+    result.stderr = "💬 Asking: test query\n  ✅ Got answer!\n"
+    return result
+
+
+@pytest.mark.asyncio
+@patch('notebooklm_tool._check_authenticated', return_value=True)
+async def test_run_search_uses_json_answer_only(mock_auth):
+    """Verify only the answer text of ask_question.py --json reaches the model."""
+    from notebooklm_tool import run_search
+
+    run = _json_run({"question": "test query", "notebook_url": "https://nb", "answer": "The answer",
+                     "timings": {"total_ms": 1200}, "error": None})
+    with patch('notebooklm_tool._run_skill', AsyncMock(return_value=run)) as mock_run:
+        result = await run_search("test query")
+
+    assert "--json" in mock_run.call_args[0][0]
+    assert result == "Search results for 'test query':\nThe answer"
+
+
+@pytest.mark.asyncio
+@patch('notebooklm_tool._check_authenticated', return_value=True)
+async def test_run_search_reports_json_error(mock_auth):
+    """Verify the JSON error object becomes the tool's error message."""
+    from notebooklm_tool import run_search
+
+    no_answer = _json_run({"answer": None, "timings": {},
+                           "error": {"type": "NoAnswer", "message": "No answer from NotebookLM"}}, 1)
+    signed_out = _json_run({"answer": None, "timings": {},
+                            "error": {"type": "PermissionError", "message": "not authenticated"}}, 1)
+
+    with patch('notebooklm_tool._run_skill', AsyncMock(return_value=no_answer)):
+        assert await run_search("test query") == "Search failed for 'test query': No answer from NotebookLM"
+    with patch('notebooklm_tool._run_skill', AsyncMock(return_value=signed_out)):
+        assert "not authenticated" in (await run_search("test query")).lower()
+
+
+def _alive(pid):
+    """Whether a process exists and is not a zombie."""
+    import os
+    stat = Path(f"/proc/{pid}/stat")
+    if stat.exists():
+        return stat.read_text().rsplit(")", 1)[1].split()[0] != "Z"
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(sys.platform == "win32", reason="Requires process groups")
+async def test_cancelled_scatter_stops_its_processes(tmp_path):
+    """Verify notebooks dropped at the deadline leave no live ask process or child behind."""
+    import asyncio
+    from notebooklm_tool import scatter_gather_search
+
+    pids = tmp_path / "pids"
+    (tmp_path / "run.py").write_text(
+        "import os, subprocess, sys, time\n"
+        "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])\n"
+        f"open({str(pids)!r}, 'a').write(f'{{os.getpid()}} {{child.pid}}\\n')\n"
+        "time.sleep(60)\n"
+    )
+    notebooks = [{"name": "Course", "url": "course"}, {"name": "Talks", "url": "talks"}]
+
+    with patch('notebooklm_tool.NOTEBOOKLM_PYTHON', sys.executable), \
+         patch('notebooklm_tool.NOTEBOOKLM_SKILL_PATH', tmp_path), \
+         patch.dict('os.environ', {'NOTEBOOKLM_CONTEXT_MODE': 'isolated'}):
+        result = await asyncio.wait_for(scatter_gather_search("q", notebooks, deadline=1.5), timeout=20)
+
+    assert "Course (timeout)" in result and "Talks (timeout)" in result
+    started = [int(pid) for line in pids.read_text().splitlines() for pid in line.split()]
+    assert started
+    assert not [pid for pid in started if _alive(pid)]
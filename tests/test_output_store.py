@@ -0,0 +1,105 @@
+"""Test the output index and deduplicating report store."""
+
+import os
+from unittest.mock import patch
+
+from output_store import OutputStore, normalize_topic, parse_report
+
+
+def test_normalize_topic_ignores_punctuation_width_and_case():
+    """Verify cosmetic differences map to the same key."""
+    assert normalize_topic("  产品经理，需要参与技术选型？") == normalize_topic("产品经理需要参与技术选型")
+    assert normalize_topic("ＡＩ Technology") == normalize_topic("ai_technology") == "aitechnology"
+
+
+def test_record_and_lookup(tmp_path):
+    """Verify reports are found by topic and trace."""
+    with OutputStore(tmp_path) as store:
+        path = tmp_path / "a.md"
+        path.write_text("x", encoding="utf-8")
+        store.record(path, "AI Technology", "content", trace_id="trace_1",
+                     provider="MiniMax-Text-01", prompt_version="writer_v1", timings={"total_ms": 1200})
+
+        assert store.by_trace("trace_1")["provider"] == "MiniMax-Text-01"
+        by_topic = store.by_topic("ai technology!")
+        assert [r["trace_id"] for r in by_topic] == ["trace_1"]
+        assert by_topic[0]["timings"] == {"total_ms": 1200}
+        assert store.by_trace("missing") is None
+
+
+def test_identical_content_is_flagged(tmp_path):
+    """Verify byte-identical articles are marked as duplicates."""
+    with OutputStore(tmp_path) as store:
+        first = store.record(tmp_path / "a.md", "t", "Generated content", trace_id="t1")
+        second = store.record(tmp_path / "b.md", "t", "Generated content", trace_id="t2")
+        third = store.record(tmp_path / "c.md", "t", "Different content", trace_id="t3")
+
+        assert first["duplicate_of"] is None
+        assert second["duplicate_of"] == first["id"]
+        assert third["duplicate_of"] is None
+        assert [r["trace_id"] for r in store.duplicates()] == ["t2"]
+
+
+def test_save_report_indexes_and_refuses_duplicates(tmp_path):
+    """Verify save_report records reports and honours OUTPUT_DEDUP=refuse."""
+    from main import save_report
+
+    with patch.dict(os.environ, {"OUTPUT_DIR": str(tmp_path), "OUTPUT_DEDUP": "refuse"}):
+        first = save_report("Topic", "Same article", "trace_a", prompt_version="writer_v1")
+        second = save_report("Topic", "Same article", "trace_b")
+
+    assert second == first
+    assert len(list(tmp_path.glob("*.md"))) == 1
+    with OutputStore(tmp_path) as store:
+        assert store.by_trace("trace_a")["prompt_version"] == "writer_v1"
+        assert store.by_trace("trace_b") is None
+
+
+def test_reindex_existing_files(tmp_path):
+    """Verify report files written before the index existed get indexed."""
+    text = ("# 产品经理需要参与技术选型\n\n**Trace ID:** trace_x\n\n"
+            "**Generated:** 2026-01-30T12:01:06\n\n---\n\nBody")
+    (tmp_path / "old.md").write_text(text, encoding="utf-8")
+    assert parse_report(text)["content"] == "Body"
+
+    with OutputStore(tmp_path) as store:
+        assert store.reindex() == 1
+        assert store.reindex() == 0
+        record = store.by_trace("trace_x")
+        assert record["created_at"] == "2026-01-30T12:01:06"
+        assert record["topic"] == "产品经理需要参与技术选型"
+
+        (tmp_path / "old.md").unlink()
+        assert store.forget_missing() == 1
+        assert store.count() == 0
+
+
+def test_index_independent_of_working_directory(tmp_path, monkeypatch):
+    """Verify entries recorded via a relative path survive another cwd or spelling."""
+    (tmp_path / "output").mkdir()
+    report = tmp_path / "output" / "a.md"
+    report.write_text("x", encoding="utf-8")
+
+    monkeypatch.chdir(tmp_path)
+    with OutputStore("output") as store:
+        store.record("output/a.md", "t", "content", trace_id="t1")
+
+    monkeypatch.chdir(tmp_path.parent)
+    with OutputStore(tmp_path / "output") as store:
+        assert store.forget_missing() == 0
+        assert store.reindex() == 0
+        assert store.move(report, tmp_path / "output" / "archive" / "a.md.gz")
+        assert store.by_trace("t1")["path"] == str((tmp_path / "output" / "archive" / "a.md.gz").resolve())
+
+
+def test_relative_paths_from_older_index_are_resolved(tmp_path):
+    """Verify cwd-relative entries of an existing index are repointed, not dropped."""
+    report = tmp_path / "a.md"
+    report.write_text("x", encoding="utf-8")
+    with OutputStore(tmp_path) as store:
+        store.record(report, "t", "content", trace_id="t1")
+        store._conn.execute("UPDATE reports SET path = 'output/a.md'")
+
+    with OutputStore(tmp_path) as store:
+        assert store.by_trace("t1")["path"] == str(report.resolve())
+        assert store.forget_missing() == 0
@@ -0,0 +1,113 @@
+"""Test background pre-warming for the interactive CLI."""
+
+import asyncio
+
+import pytest
+
+from prewarm import Prewarmer
+
+
+class FakeProvider:
+    def __init__(self):
+        self.warmed = False
+        self.closed = False
+
+    async def warm_up(self):
+        await asyncio.sleep(0.01)
+        self.warmed = True
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeWorker:
+    def __init__(self):
+        self.requests = []
+
+    async def request(self, method, params=None, timeout=None):
+        self.requests.append((method, params))
+        return {"warmed": True}
+
+
+@pytest.mark.asyncio
+async def test_claim_returns_warm_provider():
+    """Verify the topic arriving in time gets the pre-built provider."""
+    provider = FakeProvider()
+    prewarmer = Prewarmer(timeout=10, warm_browser=False, provider_factory=lambda: provider)
+    prewarmer.start()
+
+    claimed = await prewarmer.claim()
+    await prewarmer.wait()
+
+    assert claimed is provider
+    assert provider.warmed
+    assert not provider.closed
+    assert "llm" in prewarmer.timings
+
+
+@pytest.mark.asyncio
+async def test_unclaimed_resources_expire():
+    """Verify warm resources are dropped after the timeout."""
+    provider = FakeProvider()
+    prewarmer = Prewarmer(timeout=0.05, warm_browser=False, provider_factory=lambda: provider)
+    prewarmer.start()
+
+    await asyncio.sleep(0.2)
+    await prewarmer.wait()
+
+    assert prewarmer.expired
+    assert provider.closed
+    assert await prewarmer.claim() is None
+
+
+@pytest.mark.asyncio
+async def test_provider_failure_is_recorded():
+    """Verify a failing provider build leaves the workflow to build its own."""
+    def broken():
+        raise ValueError("MiniMax not configured")
+
+    prewarmer = Prewarmer(timeout=10, warm_browser=False, provider_factory=broken)
+    prewarmer.start()
+
+    assert await prewarmer.claim() is None
+    assert "ValueError" in prewarmer.errors["llm"]
+
+
+@pytest.mark.asyncio
+async def test_browser_warm_opens_active_notebook(monkeypatch):
+    """Verify the worker for the default notebook is asked to warm a page."""
+    import notebooklm_tool
+
+    worker = FakeWorker()
+    monkeypatch.setattr(notebooklm_tool, "_get_notebook_url", lambda query=None: "https://nb/active")
+    monkeypatch.setattr(notebooklm_tool, "get_worker", lambda: worker)
+
+    prewarmer = Prewarmer(timeout=10, warm_browser=True, provider_factory=FakeProvider)
+    prewarmer.start()
+    await prewarmer.claim()
+    await prewarmer.wait()
+
+    assert worker.requests == [("warm", {"notebook_url": "https://nb/active"})]
+    assert prewarmer.notebook_url == "https://nb/active"
+
+
+@pytest.mark.asyncio
+async def test_claim_warms_routed_notebook(monkeypatch):
+    """Verify the notebook the topic routes to is warmed on the same worker."""
+    import notebooklm_tool
+
+    worker = FakeWorker()
+    monkeypatch.setattr(notebooklm_tool, "_get_notebook_url",
+                        lambda query=None: "https://nb/tech" if query else "https://nb/active")
+    monkeypatch.setattr(notebooklm_tool, "get_worker", lambda: worker)
+
+    prewarmer = Prewarmer(timeout=10, warm_browser=True, provider_factory=FakeProvider)
+    prewarmer.start()
+    await asyncio.sleep(0.05)
+    await prewarmer.claim("技术选型")
+    await prewarmer.wait()
+
+    assert worker.requests == [
+        ("warm", {"notebook_url": "https://nb/active"}),
+        ("warm", {"notebook_url": "https://nb/tech"}),
+    ]
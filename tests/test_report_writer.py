@@ -0,0 +1,84 @@
+"""Test atomic report writing and archiving."""
+
+import os
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from output_store import OutputStore, parse_report
+from report_writer import (
+    archive_reports, compose_report, read_report, report_filename, write_atomic,
+)
+
+
+def test_compose_uses_one_timestamp():
+    """Verify filename and header carry the same timestamp."""
+    generated = datetime(2026, 10, 19, 8, 30, 5, 123456)
+    text = compose_report("AI Agent", "Body", "trace_1", generated)
+
+    assert report_filename("AI Agent", "trace_1", generated) == "20261019_083005_AI_Agent_trace_1.md"
+    parsed = parse_report(text)
+    assert parsed["created_at"] == generated.isoformat()
+    assert parsed["content"] == "Body"
+
+
+@pytest.mark.parametrize("policy", ["always", "file", "never"])
+def test_write_atomic_leaves_no_temp_files(tmp_path, policy):
+    """Verify the file is replaced in one step under every fsync policy."""
+    path = tmp_path / "report.md"
+    path.write_text("old", encoding="utf-8")
+
+    write_atomic(path, "new".encode("utf-8"), fsync=policy)
+
+    assert path.read_text(encoding="utf-8") == "new"
+    assert [p.name for p in tmp_path.iterdir()] == ["report.md"]
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX file modes")
+def test_write_atomic_keeps_regular_file_mode(tmp_path):
+    """Verify reports get the umask mode (not mkstemp's 0600) and keep a replaced file's."""
+    with patch("report_writer._UMASK", 0o022):
+        created = write_atomic(tmp_path / "new.md", b"new")
+    assert created.stat().st_mode & 0o777 == 0o644
+
+    existing = tmp_path / "shared.md"
+    existing.write_text("old", encoding="utf-8")
+    existing.chmod(0o664)
+    write_atomic(existing, b"new")
+    assert existing.stat().st_mode & 0o777 == 0o664
+
+
+def test_failed_write_keeps_previous_file(tmp_path):
+    """Verify a crash mid-write leaves the old report intact."""
+    path = tmp_path / "report.md"
+    path.write_text("old", encoding="utf-8")
+
+    with patch("report_writer.os.replace", side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            write_atomic(path, b"new")
+
+    assert path.read_text(encoding="utf-8") == "old"
+    assert [p.name for p in tmp_path.iterdir()] == ["report.md"]
+
+
+def test_archive_compresses_old_reports_and_updates_index(tmp_path):
+    """Verify old reports are gzipped into archive/ and the index follows."""
+    from main import save_report
+
+    with patch.dict(os.environ, {"OUTPUT_DIR": str(tmp_path), "OUTPUT_DEDUP": "flag"}):
+        old = save_report("Old topic", "Old article " * 50, "trace_old")
+        new = save_report("New topic", "New article", "trace_new")
+    week_ago = time.time() - 7 * 86400
+    os.utime(old, (week_ago, week_ago))
+
+    moved = archive_reports(tmp_path, older_than_days=3, codec="gzip")
+
+    assert [(str(src), dst.name) for src, dst in moved] == [(old, os.path.basename(old) + ".gz")]
+    archived = moved[0][1]
+    assert parse_report(read_report(archived))["content"] == "Old article " * 50
+    assert os.path.exists(new) and not os.path.exists(old)
+    with OutputStore(tmp_path) as store:
+        assert store.by_trace("trace_old")["path"] == str(archived)
+        assert store.forget_missing() == 0
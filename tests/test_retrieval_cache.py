@@ -0,0 +1,130 @@
+"""Test reuse of recorded retrievals for similar topics."""
+
+import os
+
+import pytest
+from unittest.mock import patch, MagicMock
+
+from output_store import OutputStore, topic_similarity
+from retrieval_cache import (
+    RetrievalLog, PriorMaterial, find_prior_material, record_retrieval,
+    set_retrieval_log, reset_retrieval_log,
+)
+
+
+def _seed(output_dir, topic, trace_id, retrievals, content=None):
+    with OutputStore(output_dir) as store:
+        store.record(output_dir / f"{trace_id}.md", topic, content or f"Article {trace_id}",
+                     trace_id=trace_id)
+        store.record_retrievals(trace_id, retrievals)
+
+
+def test_topic_similarity():
+    """Verify near-identical topics score high and unrelated ones low."""
+    assert topic_similarity("产品经理需要参与技术选型吗", "产品经理需要参与技术选型吗？") == 1.0
+    assert topic_similarity("产品经理需要参与技术选型", "产品经理如何参与技术选型") > 0.6
+    assert topic_similarity("产品经理需要参与技术选型", "春季养生食谱") < 0.2
+
+
+def test_log_skips_failed_results():
+    """Verify errors and timeouts are not kept as material."""
+    log = RetrievalLog()
+    token = set_retrieval_log(log)
+    try:
+        record_retrieval("q1", "Useful answer", 120)
+        record_retrieval("q2", "Search timeout after 300s")
+        record_retrieval("q3", "")
+    finally:
+        reset_retrieval_log(token)
+    record_retrieval("q4", "Outside any workflow")
+
+    assert [entry["query"] for entry in log.entries] == ["q1"]
+
+
+def test_find_prior_material(tmp_path):
+    """Verify retrievals of similar topics are found and unrelated ones are not."""
+    _seed(tmp_path, "产品经理需要参与技术选型", "t1", [{"query": "技术选型的角色", "result": "Answer A"}])
+    _seed(tmp_path, "春季养生食谱", "t2", [{"query": "养生", "result": "Answer B"}])
+
+    prior = find_prior_material("产品经理如何参与技术选型", output_dir=tmp_path)
+
+    assert [report["trace_id"] for report in prior.reports] == ["t1"]
+    assert prior.retrieval_count == 1
+    assert not prior.covers_topic()
+    assert "Answer A" in prior.to_prompt()
+    assert find_prior_material("量子计算入门", output_dir=tmp_path) is None
+
+
+def test_rerun_without_searches_keeps_prior_material(tmp_path):
+    """Verify a later report with no retrievals of its own does not shadow an earlier one."""
+    _seed(tmp_path, "产品经理需要参与技术选型", "t1", [{"query": "技术选型的角色", "result": "Answer A"}])
+    _seed(tmp_path, "产品经理需要参与技术选型", "t2", [])
+
+    prior = find_prior_material("产品经理需要参与技术选型", output_dir=tmp_path)
+
+    assert [report["trace_id"] for report in prior.reports] == ["t1"]
+    assert prior.covers_topic()
+
+
+def test_prompt_block_respects_budget():
+    """Verify the prompt block is trimmed to its character budget."""
+    prior = PriorMaterial([{
+        "topic": "t", "similarity": 1.0,
+        "retrievals": [{"query": "q", "result": "x" * 500}] * 5,
+    }])
+    assert len(prior.to_prompt(max_chars=300)) < 400
+    assert prior.covers_topic()
+
+
+@pytest.mark.asyncio
+@patch('main.create_agent_with_tools')
+async def test_workflow_reuses_and_records_retrievals(mock_create_agent, tmp_path):
+    """Verify prior material reaches the prompt and new retrievals are recorded."""
+    from main import run_workflow
+
+    _seed(tmp_path, "AI Agent 的未来", "old", [{"query": "AI Agent 趋势", "result": "Old answer"}])
+    mock_create_agent.return_value = MagicMock()
+    seen = {}
+
+    async def fake_run_agent(agent, prompt):
+        seen["prompt"] = prompt
+        record_retrieval("AI Agent 落地案例", "New answer", 50)
+        result = MagicMock()
+        result.final_output = "Article"
+        return result
+
+    env = {"OUTPUT_DIR": str(tmp_path), "SPECULATIVE_SEARCH": "false", "RETRIEVAL_REUSE": "true"}
+    with patch.dict(os.environ, env):
+        with patch('main.run_agent', fake_run_agent):
+            result = await run_workflow("AI Agent 的未来发展")
+
+    assert "Old answer" in seen["prompt"]
+    with OutputStore(tmp_path) as store:
+        recorded = store.retrievals(result["trace_id"])
+    assert [(r["query"], r["result"]) for r in recorded] == [("AI Agent 落地案例", "New answer")]
+
+
+@pytest.mark.asyncio
+@patch('main.create_agent_with_tools')
+async def test_covered_topic_prompt_skips_first_round(mock_create_agent, tmp_path):
+    """Verify a near-identical earlier topic drops the round-1 search instruction."""
+    from main import run_workflow
+
+    _seed(tmp_path, "AI Agent 的未来", "old", [{"query": "AI Agent 趋势", "result": "Old answer"}])
+    mock_create_agent.return_value = MagicMock()
+    prompts = []
+
+    async def fake_run_agent(agent, prompt):
+        prompts.append(prompt)
+        result = MagicMock()
+        result.final_output = "Article"
+        return result
+
+    env = {"OUTPUT_DIR": str(tmp_path), "SPECULATIVE_SEARCH": "true", "RETRIEVAL_REUSE": "true"}
+    with patch.dict(os.environ, env), patch('main.run_agent', fake_run_agent):
+        await run_workflow("AI Agent 的未来")
+        await run_workflow("春季养生食谱")
+
+    assert "Old answer" in prompts[0]
+    assert "first-round retrieval" not in prompts[0]
+    assert "first-round retrieval" in prompts[1]
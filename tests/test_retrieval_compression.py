@@ -0,0 +1,147 @@
+"""Test compression of retrieval results."""
+
+import os
+from unittest.mock import patch, AsyncMock
+
+import pytest
+
+from retrieval_compression import (
+    compress_retrieval, estimate_tokens, extractive_compress, split_sentences,
+)
+
+ANSWER = (
+    "产品经理参与技术选型的核心价值在于平衡业务需求与技术成本。这是一个非常重要的问题。\n"
+    "根据2023年的调查，68%的团队让产品经理参与选型。\n"
+    "张三说：“技术选型不是技术团队一个人的事。”\n"
+    "1. 首先明确业务目标\n2. 然后评估候选方案\n3. 最后做小规模验证\n"
+    "总的来说，这个话题有很多值得讨论的地方，我们可以从多个角度来看待它，每个角度都有其道理。\n"
+) * 3
+RESULT = "Search results for '产品经理 技术选型':\n" + ANSWER
+
+
+def test_split_keeps_quotes_together():
+    """Verify a sentence ending inside a quote is not split from its close."""
+    assert split_sentences("他说：“好。”然后离开了。") == ["他说：“好。”", "然后离开了。"]
+
+
+def test_extractive_keeps_facts_within_budget():
+    """Verify numbers, quotes and steps survive and repeats are dropped."""
+    compressed = extractive_compress("产品经理 技术选型", ANSWER, budget=120)
+
+    assert estimate_tokens(compressed) <= 120
+    assert "68%" in compressed
+    assert "“技术选型不是技术团队一个人的事。”" in compressed
+    assert compressed.count("68%") == 1
+    # Source order is preserved
+    assert compressed.index("68%") < compressed.index("首先明确业务目标")
+
+
+def test_extractive_cuts_unbroken_answer_to_budget():
+    """Verify an answer with no sentence breaks is truncated, not emptied."""
+    compressed = extractive_compress("回答", "这是一个很长的回答" * 200, budget=600)
+
+    assert compressed.startswith("这是一个很长的回答")
+    assert 0 < estimate_tokens(compressed) <= 600
+
+
+@pytest.mark.asyncio
+async def test_compress_retrieval_keeps_header_and_raw_copy(tmp_path):
+    """Verify the header survives and the raw answer is saved for audit."""
+    with patch.dict(os.environ, {"OUTPUT_DIR": str(tmp_path)}):
+        result = await compress_retrieval("产品经理 技术选型", RESULT, mode="extractive", budget=120)
+
+    assert result.startswith("Search results for '产品经理 技术选型':\n")
+    assert len(result) < len(RESULT)
+    raw = list((tmp_path / "raw_retrievals").rglob("*.md"))
+    assert len(raw) == 1 and ANSWER in raw[0].read_text(encoding="utf-8")
+
+
+@pytest.mark.asyncio
+async def test_passthrough_cases(tmp_path):
+    """Verify errors, short results and mode=off are returned unchanged."""
+    with patch.dict(os.environ, {"OUTPUT_DIR": str(tmp_path)}):
+        assert await compress_retrieval("q", RESULT, mode="off") == RESULT
+        assert await compress_retrieval("q", "Search failed for 'q': boom", mode="extractive", budget=1) \
+            == "Search failed for 'q': boom"
+        short = "Search results for 'q':\nShort answer."
+        assert await compress_retrieval("q", short, mode="extractive", budget=600) == short
+    assert not (tmp_path / "raw_retrievals").exists()
+
+
+@pytest.mark.asyncio
+async def test_llm_mode_falls_back_to_extractive(tmp_path):
+    """Verify a failing compression provider does not lose the material."""
+    with patch.dict(os.environ, {"OUTPUT_DIR": str(tmp_path)}):
+        with patch("retrieval_compression.llm_compress", AsyncMock(side_effect=RuntimeError("down"))):
+            result = await compress_retrieval("产品经理 技术选型", RESULT, mode="llm", budget=120)
+
+    assert "68%" in result
+
+
+@pytest.mark.asyncio
+async def test_llm_mode_uses_mock_provider(fake_llm, tmp_path):
+    """Verify llm mode sends the answer to the configured provider."""
+    from agents import set_tracing_disabled
+
+    set_tracing_disabled(True)
+    fake_llm.script = [{"content": "- 68%的团队让产品经理参与选型"}]
+    with patch.dict(os.environ, {"OUTPUT_DIR": str(tmp_path)}):
+        result = await compress_retrieval("产品经理 技术选型", RESULT, mode="llm", budget=120)
+
+    assert result == "Search results for '产品经理 技术选型':\n- 68%的团队让产品经理参与选型"
+
+
+@pytest.mark.asyncio
+async def test_llm_mode_shares_one_scheduled_model_per_workflow(fake_llm, tmp_path):
+    """Verify a workflow's compressions use one provider, hold llm slots, reach the ledger and are closed."""
+    from agents import set_tracing_disabled
+    from retrieval_compression import CompressionModel, set_compression_model, reset_compression_model
+    from scheduler import get_scheduler
+    from usage_ledger import UsageLedger, set_usage_ledger, reset_usage_ledger
+
+    set_tracing_disabled(True)
+    fake_llm.script = [{"content": "- 要点"}]
+    merged = (
+        "Search results for '产品经理 技术选型' (2 notebooks):\n\n"
+        "### Source: Tech Talks\n" + ANSWER + "\n"
+        "### Source: Camp QA\n" + ANSWER
+    )
+    llm_slots = get_scheduler().pool("llm:minimax").stats["interactive"]
+    slots_before = llm_slots.count
+    compression_model = CompressionModel()
+    ledger = UsageLedger()
+    ledger_token = set_usage_ledger(ledger)
+    model_token = set_compression_model(compression_model)
+    try:
+        with patch.dict(os.environ, {"OUTPUT_DIR": str(tmp_path)}):
+            await compress_retrieval("产品经理 技术选型", merged, mode="llm", budget=240)
+            provider = compression_model.provider
+            await compress_retrieval("产品经理 技术选型", merged, mode="llm", budget=240)
+            assert compression_model.provider is provider
+    finally:
+        reset_compression_model(model_token)
+        reset_usage_ledger(ledger_token)
+
+    assert len(ledger.turns) == 4
+    assert llm_slots.count - slots_before == 4
+    closed = AsyncMock()
+    with patch.object(provider, "close", closed):
+        await compression_model.close()
+    closed.assert_awaited_once()
+    assert compression_model.provider is None
+
+
+@pytest.mark.asyncio
+async def test_scatter_gather_sources_survive(tmp_path):
+    """Verify every notebook's "### Source:" line is kept after compression."""
+    merged = (
+        "Search results for '产品经理 技术选型' (2 notebooks):\n\n"
+        "### Source: Tech Talks\n" + ANSWER + "\n"
+        "### Source: Camp QA\n" + ANSWER.replace("68%", "72%")
+    )
+    with patch.dict(os.environ, {"OUTPUT_DIR": str(tmp_path)}):
+        result = await compress_retrieval("产品经理 技术选型", merged, mode="extractive", budget=240)
+
+    assert "### Source: Tech Talks\n" in result and "### Source: Camp QA\n" in result
+    assert result.index("68%") < result.index("### Source: Camp QA") < result.index("72%")
+    assert estimate_tokens(result) < estimate_tokens(merged)
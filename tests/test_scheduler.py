@@ -0,0 +1,155 @@
+"""Test the resource scheduler."""
+
+import asyncio
+import os
+from unittest.mock import patch
+
+import pytest
+
+from scheduler import (
+    Scheduler, resource_capacity, set_schedule_context, reset_schedule_context,
+)
+
+
+async def _hold(scheduler, resource, order, name, lane="interactive", tenant="t", seconds=0.01):
+    async with scheduler.slot(resource, lane=lane, tenant=tenant):
+        order.append(name)
+        await asyncio.sleep(seconds)
+
+
+def test_capacity_from_env():
+    """Verify per-resource, per-family and default capacities."""
+    env = {"SCHED_LLM_SLOTS": "20", "SCHED_LLM_MINIMAX_SLOTS": "5", "NOTEBOOKLM_CONTEXT_MODE": "isolated"}
+    with patch.dict(os.environ, env, clear=False):
+        os.environ.pop("SCHED_BROWSER_SLOTS", None)
+        assert resource_capacity("llm:minimax") == 5
+        assert resource_capacity("llm:openai") == 20
+        assert resource_capacity("browser") == 2
+
+
+def test_persistent_profile_serializes_browser():
+    """Verify one-shot questions on the persistent profile get a single browser slot."""
+    with patch.dict(os.environ, {"SCHED_BROWSER_SLOTS": "3"}, clear=False):
+        os.environ.pop("NOTEBOOKLM_CONTEXT_MODE", None)
+        os.environ.pop("NOTEBOOKLM_WORKER", None)
+        assert resource_capacity("browser") == 1
+        os.environ["NOTEBOOKLM_WORKER"] = "true"
+        assert resource_capacity("browser") == 3
+        os.environ.pop("NOTEBOOKLM_WORKER")
+        os.environ["NOTEBOOKLM_CONTEXT_MODE"] = "isolated"
+        assert resource_capacity("browser") == 3
+
+
+@pytest.mark.asyncio
+async def test_capacity_is_respected():
+    """Verify no more than `capacity` holders run at once."""
+    scheduler = Scheduler({"browser": 2})
+    running, peak = 0, 0
+
+    async def call():
+        nonlocal running, peak
+        async with scheduler.slot("browser"):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(call() for _ in range(6)))
+    assert peak == 2
+    metrics = scheduler.metrics()["browser"]
+    assert (metrics["in_use"], metrics["waiting"]) == (0, 0)
+    assert metrics["lanes"]["interactive"]["acquired"] == 6
+    assert metrics["lanes"]["interactive"]["waited"] == 4
+    assert metrics["lanes"]["interactive"]["max_ms"] > 0
+
+
+@pytest.mark.asyncio
+async def test_interactive_lane_jumps_ahead():
+    """Verify a waiting interactive call is served before earlier batch calls."""
+    scheduler = Scheduler({"browser": 1})
+    order = []
+    first = asyncio.create_task(_hold(scheduler, "browser", order, "running", lane="batch", seconds=0.03))
+    await asyncio.sleep(0)
+    batch = [asyncio.create_task(_hold(scheduler, "browser", order, f"batch{i}", lane="batch"))
+             for i in range(2)]
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(_hold(scheduler, "browser", order, "cli"))
+    await asyncio.gather(first, interactive, *batch)
+
+    assert order == ["running", "cli", "batch0", "batch1"]
+
+
+@pytest.mark.asyncio
+async def test_fair_share_between_tenants():
+    """Verify a tenant with one call is not stuck behind another's backlog."""
+    scheduler = Scheduler({"llm:x": 1})
+    order = []
+    tasks = [asyncio.create_task(_hold(scheduler, "llm:x", order, f"a{i}", tenant="a")) for i in range(4)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(_hold(scheduler, "llm:x", order, "b0", tenant="b")))
+    await asyncio.gather(*tasks)
+
+    assert order == ["a0", "b0", "a1", "a2", "a3"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_frees_nothing():
+    """Verify cancelling a waiting call neither leaks nor double-frees a slot."""
+    scheduler = Scheduler({"browser": 1})
+    order = []
+    holder = asyncio.create_task(_hold(scheduler, "browser", order, "holder", seconds=0.02))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(_hold(scheduler, "browser", order, "cancelled"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.gather(holder, waiter, return_exceptions=True)
+
+    await _hold(scheduler, "browser", order, "after")
+    assert order == ["holder", "after"]
+    assert scheduler.pool("browser").in_use == 0
+
+
+@pytest.mark.asyncio
+async def test_context_sets_lane_and_tenant():
+    """Verify calls inherit the lane and tenant of their workflow context."""
+    scheduler = Scheduler({"browser": 1})
+    token = set_schedule_context("batch", "topic-a")
+    try:
+        await asyncio.create_task(_hold(scheduler, "browser", [], "x", lane=None, tenant=None))
+    finally:
+        reset_schedule_context(token)
+    assert scheduler.metrics()["browser"]["lanes"]["batch"]["acquired"] == 1
+    with pytest.raises(ValueError):
+        set_schedule_context("urgent")
+
+
+@pytest.mark.asyncio
+async def test_notebook_questions_and_model_calls_hold_slots():
+    """Verify NotebookLM questions and model calls go through their pools."""
+    import notebooklm_tool
+    from agent import ScheduledModel
+
+    scheduler = Scheduler({"browser": 1, "llm:minimax": 3})
+    seen = {}
+
+    async def fake_ask(query, notebook_url, timeout):
+        seen["browser"] = scheduler.pool("browser").in_use
+        return "answer"
+
+    class FakeModel:
+        model = "MiniMax-Text-01"
+
+        async def get_response(self, *args, **kwargs):
+            seen["llm"] = scheduler.pool("llm:minimax").in_use
+            return "response"
+
+    with patch("notebooklm_tool.get_scheduler", return_value=scheduler), \
+            patch("agent.get_scheduler", return_value=scheduler), \
+            patch("notebooklm_tool._ask_notebook_now", fake_ask):
+        assert await notebooklm_tool._ask_notebook("q", "https://notebooklm.google.com/notebook/x") == "answer"
+        model = ScheduledModel(FakeModel(), "llm:minimax")
+        assert await model.get_response() == "response"
+
+    assert seen == {"browser": 1, "llm": 1}
+    assert model.model == "MiniMax-Text-01"
+    assert scheduler.pool("browser").in_use == scheduler.pool("llm:minimax").in_use == 0
@@ -0,0 +1,163 @@
+"""Test speculative first-round retrieval."""
+
+import asyncio
+import os
+import sys
+
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from speculation import (
+    SpeculativeSearch, render_round1_query, claim_speculation,
+    set_speculation, reset_speculation,
+)
+
+
+def test_render_round1_query_from_writer_prompt():
+    """Verify the round-1 template is rendered with the topic."""
+    query = render_round1_query("技术选型")
+    assert query.startswith("我要写一篇关于「技术选型」的公众号文章")
+    assert "{选题}" not in query
+
+
+def test_render_round1_query_falls_back_to_topic():
+    """Verify a missing prompt file falls back to the bare topic."""
+    assert render_round1_query("技术选型", prompt_name="missing.txt") == "技术选型"
+
+
+@pytest.mark.asyncio
+async def test_first_matching_call_claims_speculation():
+    """Verify only the first call asking the round-1 question gets the task."""
+    search = AsyncMock(return_value="round-1 results")
+    round1 = render_round1_query("技术选型")
+    speculation = SpeculativeSearch("技术选型", round1, search).start()
+    token = set_speculation(speculation)
+    try:
+        assert claim_speculation("京东导购案例的细节") is None
+        assert claim_speculation("关于「技术选型」有哪些素材？") is None  # mentions the topic only
+        task = claim_speculation(round1.replace("\n", " "))
+        assert task is speculation.task
+        assert await task == "round-1 results"
+        assert claim_speculation(round1) is None
+    finally:
+        reset_speculation(token)
+
+    search.assert_called_once()
+
+
+def test_light_rewording_matches():
+    """Verify a near-identical rewording of the round-1 query still matches."""
+    round1 = render_round1_query("技术选型")
+    speculation = SpeculativeSearch("技术选型", round1, AsyncMock())
+
+    assert speculation.matches(round1.replace("目标读者是AI产品经理", "目标读者是 AI 产品经理们"))
+    assert not speculation.matches(render_round1_query("春季养生食谱"))
+
+
+@pytest.mark.asyncio
+async def test_other_queries_wait_for_speculation():
+    """Verify a non-matching search starts only after the speculative one finishes."""
+    from tools import _search
+
+    events = []
+    release = asyncio.Event()
+
+    async def speculative_search(query):
+        events.append("speculative started")
+        await release.wait()
+        events.append("speculative done")
+        return "round-1 results"
+
+    async def fresh_search(query):
+        events.append(f"search {query}")
+        return "results"
+
+    round1 = render_round1_query("技术选型")
+    speculation = SpeculativeSearch("技术选型", round1, speculative_search).start()
+    token = set_speculation(speculation)
+    try:
+        with patch('tools.run_search', fresh_search):
+            other = asyncio.create_task(_search("京东导购案例的细节"))
+            await asyncio.sleep(0.05)
+            assert events == ["speculative started"]
+            release.set()
+            assert await other == "results"
+            assert await _search(round1) == "round-1 results"
+    finally:
+        reset_speculation(token)
+
+    assert events == ["speculative started", "speculative done", "search 京东导购案例的细节"]
+
+
+@pytest.mark.asyncio
+async def test_unclaimed_speculation_is_cancelled():
+    """Verify a speculative query nobody asked for is cancelled."""
+    started = asyncio.Event()
+
+    async def slow_search(query):
+        started.set()
+        await asyncio.sleep(10)
+
+    speculation = SpeculativeSearch("topic", "topic", slow_search).start()
+    await started.wait()
+    await speculation.cancel()
+    assert speculation.task.cancelled()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(sys.platform == "win32", reason="Requires process groups")
+async def test_cancelled_speculation_frees_browser_slot(tmp_path):
+    """Verify cancelling a speculative one-shot query stops its process and frees its slot."""
+    from notebooklm_tool import _ask_notebook
+    from scheduler import get_scheduler
+
+    pid_file = tmp_path / "pid"
+    (tmp_path / "run.py").write_text(
+        "import os, time\n"
+        f"open({str(pid_file)!r}, 'w').write(str(os.getpid()))\n"
+        "time.sleep(60)\n"
+    )
+    pool = get_scheduler().pool("browser")
+    in_use = pool.in_use
+
+    with patch('notebooklm_tool.NOTEBOOKLM_PYTHON', sys.executable), \
+         patch('notebooklm_tool.NOTEBOOKLM_SKILL_PATH', tmp_path):
+        speculation = SpeculativeSearch("topic", "topic", lambda q: _ask_notebook(q, "https://nb")).start()
+        for _ in range(100):
+            if pid_file.exists() and pid_file.read_text():
+                break
+            await asyncio.sleep(0.05)
+        assert pool.in_use == in_use + 1
+        await speculation.cancel()
+
+    assert pool.in_use == in_use
+    pid = int(pid_file.read_text())
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)  # stopped and reaped
+
+
+@pytest.mark.asyncio
+@patch('main.create_agent_with_tools')
+async def test_workflow_tool_call_joins_speculative_search(mock_create_agent, tmp_path):
+    """Verify the agent's round-1 call reuses the in-flight search."""
+    from main import run_workflow
+
+    mock_create_agent.return_value = MagicMock()
+    mock_search = AsyncMock(return_value="Search results")
+    seen = {}
+
+    async def fake_run_agent(agent, prompt):
+        task = claim_speculation(render_round1_query("AI Agent"))
+        seen["result"] = await task
+        result = MagicMock()
+        result.final_output = "Article"
+        return result
+
+    with patch.dict(os.environ, {"OUTPUT_DIR": str(tmp_path), "SPECULATIVE_SEARCH": "true"}):
+        with patch('main.run_search', mock_search):
+            with patch('main.run_agent', fake_run_agent):
+                await run_workflow("AI Agent")
+
+    assert seen["result"] == "Search results"
+    mock_search.assert_called_once()
+    assert "「AI Agent」" in mock_search.call_args[0][0]
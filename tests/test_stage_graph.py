@@ -0,0 +1,132 @@
+"""Test the workflow stage graph engine."""
+
+import asyncio
+import os
+import time
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from stage_graph import Stage, StageGraph
+
+
+def _sleep(seconds, value=None, log=None, name=None):
+    async def run(inputs):
+        if log is not None:
+            log.append(("start", name))
+        await asyncio.sleep(seconds)
+        if log is not None:
+            log.append(("end", name))
+        return value if value is not None else inputs
+    return run
+
+
+def test_rejects_cycles_and_unknown_dependencies():
+    """Verify invalid graphs fail at construction."""
+    noop = _sleep(0)
+    with pytest.raises(ValueError, match="cycle"):
+        StageGraph([Stage("a", noop, after=("b",)), Stage("b", noop, after=("a",))])
+    with pytest.raises(ValueError, match="unknown"):
+        StageGraph([Stage("a", noop, after=("missing",))])
+
+
+@pytest.mark.asyncio
+async def test_independent_stages_overlap_and_critical_path():
+    """Verify independent stages run concurrently and the slow chain is critical."""
+    graph = StageGraph([
+        Stage("search", _sleep(0.05, "material")),
+        Stage("agent", _sleep(0.15, "agent")),
+        Stage("generate", _sleep(0.01), after=("search", "agent")),
+    ])
+
+    started = time.perf_counter()
+    run = await graph.run()
+
+    assert time.perf_counter() - started < 0.25  # not 0.21 + overhead in series
+    assert run.results["generate"] == {"search": "material", "agent": "agent"}
+    assert run.critical_path == ["agent", "generate"]
+    assert set(run.timings()) == {"search", "agent", "generate"}
+
+
+@pytest.mark.asyncio
+async def test_retry_timeout_and_optional():
+    """Verify retries, per-attempt timeouts and optional failures."""
+    calls = []
+
+    async def flaky(inputs):
+        calls.append(1)
+        if len(calls) < 2:
+            raise OSError("transient")
+        return "ok"
+
+    async def broken(inputs):
+        raise RuntimeError("down")
+
+    graph = StageGraph([
+        Stage("flaky", flaky, retries=2, retry_delay=0),
+        Stage("slow", _sleep(1), timeout=0.05, optional=True),
+        Stage("broken", broken, optional=True),
+        Stage("last", _sleep(0), after=("flaky", "slow", "broken")),
+    ])
+    run = await graph.run()
+
+    assert run.results["last"] == {"flaky": "ok", "slow": None, "broken": None}
+    assert run.records["flaky"].attempts == 2
+    assert run.records["slow"].status == "failed"
+    assert run.records["broken"].error == "RuntimeError: down"
+
+
+@pytest.mark.asyncio
+async def test_required_failure_cancels_the_rest():
+    """Verify the first required failure is raised and running stages are cancelled."""
+    async def broken(inputs):
+        raise ValueError("bad topic")
+
+    graph = StageGraph([
+        Stage("broken", broken),
+        Stage("long", _sleep(5)),
+        Stage("after", _sleep(0), after=("broken",)),
+    ])
+    with pytest.raises(ValueError, match="bad topic"):
+        await asyncio.wait_for(graph.run(), timeout=2)
+    assert graph.records["long"].status == "skipped"
+
+
+@pytest.mark.asyncio
+async def test_resource_limits():
+    """Verify a resource tag limit serializes stages that share it."""
+    log = []
+    graph = StageGraph([
+        Stage("a", _sleep(0.02, log=log, name="a"), resources=("browser",)),
+        Stage("b", _sleep(0.02, log=log, name="b"), resources=("browser", "llm")),
+    ], limits={"browser": 1})
+    await graph.run()
+
+    assert [event for event, _ in log] == ["start", "end", "start", "end"]
+
+
+@pytest.mark.asyncio
+@patch('main.create_agent_with_tools')
+async def test_workflow_records_stage_timings(mock_create_agent, tmp_path):
+    """Verify run_workflow keeps its return dict and stores the critical path."""
+    from main import run_workflow
+    from output_store import OutputStore
+
+    mock_create_agent.return_value = MagicMock()
+    result_mock = MagicMock()
+    result_mock.final_output = "Article"
+
+    async def fake_run_agent(agent, prompt):
+        return result_mock
+
+    with patch.dict(os.environ, {"OUTPUT_DIR": str(tmp_path), "SPECULATIVE_SEARCH": "false"}):
+        with patch('main.run_agent', fake_run_agent):
+            result = await run_workflow("Stage Topic")
+
+    assert set(result) == {"topic", "content", "trace_id", "output_path", "usage"}
+    assert os.path.exists(result["output_path"])
+    with OutputStore(tmp_path) as store:
+        timings = store.by_trace(result["trace_id"])["timings"]
+    assert timings["critical_path"][-3:-1] == ["generate", "prepare"]
+    assert {"agent", "generate", "write", "index"} <= set(timings["stages"])
+    assert "total_ms" in timings
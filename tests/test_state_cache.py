@@ -0,0 +1,91 @@
+"""Test the shared state.json cache used for cookie injection and auth checks."""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "notebooklm_skill" / "scripts"))
+
+
+def _write_state(path, cookies, mtime=None):
+    path.write_text(json.dumps({"cookies": cookies, "origins": []}))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_cookies_filtered_to_needed_domains(tmp_path):
+    """Verify only NotebookLM-relevant Google cookies are kept."""
+    from state_cache import StateFileCache
+
+    state = tmp_path / "state.json"
+    _write_state(state, [
+        {"name": "SID", "domain": ".google.com", "expires": -1},
+        {"name": "OSID", "domain": "notebooklm.google.com", "expires": -1},
+        {"name": "YSC", "domain": ".youtube.com", "expires": -1},
+        {"name": "X", "domain": "mail.google.com", "expires": -1},
+    ])
+
+    names = [c["name"] for c in StateFileCache(state).cookies()]
+    assert names == ["SID", "OSID"]
+
+
+def test_parsed_once_per_modification(tmp_path):
+    """Verify the file is re-parsed only when mtime/size change."""
+    from state_cache import StateFileCache
+
+    state = tmp_path / "state.json"
+    _write_state(state, [{"name": "SID", "domain": ".google.com", "expires": -1}], mtime=1000)
+    cache = StateFileCache(state)
+
+    first = cache.state()
+    assert cache.state() is first
+
+    _write_state(state, [], mtime=2000)
+    assert cache.state() is not first
+    assert cache.cookies() == []
+
+    state.unlink()
+    assert cache.refresh() is None
+    assert not cache.exists()
+
+
+def test_expiry_from_auth_cookies(tmp_path):
+    """Verify expiry comes from the earliest auth cookie, ignoring session cookies."""
+    from state_cache import StateFileCache
+
+    now = time.time()
+    state = tmp_path / "state.json"
+    _write_state(state, [
+        {"name": "SID", "domain": ".google.com", "expires": now + 7200},
+        {"name": "__Secure-1PSID", "domain": ".google.com", "expires": now + 600},
+        {"name": "NID", "domain": ".google.com", "expires": now + 60},
+        {"name": "HSID", "domain": ".google.com", "expires": -1},
+    ])
+    cache = StateFileCache(state)
+
+    assert 500 < cache.expires_in() <= 600
+    assert cache.is_expiring(margin_seconds=3600)
+    assert not cache.is_expiring(margin_seconds=60)
+
+
+def test_corrupt_state_is_not_authenticated(tmp_path):
+    """Verify a half-written state.json reads as signed out instead of raising."""
+    import pytest
+    pytest.importorskip("patchright")
+    from auth_manager import AuthManager
+
+    state = tmp_path / "state.json"
+    state.write_text('{"cookies": [{"name": "SID"')
+    manager = AuthManager()
+    manager.state_file = state
+
+    assert manager.is_authenticated() is False
+    assert manager.needs_reauth() is True
+
+
+    info = manager.get_auth_info()
+    assert info["authenticated"] is False
+    assert info["needs_reauth"] is True
+    assert info["state_error"]
@@ -0,0 +1,74 @@
+"""Test the per-trace token and latency ledger."""
+
+import os
+from types import SimpleNamespace
+from unittest.mock import patch, AsyncMock
+
+import pytest
+
+from output_store import OutputStore
+from usage_ledger import UsageLedger
+
+
+def _usage(input_tokens, output_tokens, cached=0):
+    return SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens,
+                           total_tokens=input_tokens + output_tokens,
+                           input_tokens_details=SimpleNamespace(cached_tokens=cached))
+
+
+def test_finish_falls_back_to_raw_responses():
+    """Verify turns come from result.raw_responses when no hooks ran."""
+    result = SimpleNamespace(
+        raw_responses=[SimpleNamespace(usage=_usage(100, 20, cached=64), response_id="r1"),
+                       SimpleNamespace(usage=_usage(180, 400), response_id=None)],
+        last_agent=SimpleNamespace(name="Writer"),
+    )
+
+    ledger = UsageLedger().finish(result)
+
+    assert [(t["turn"], t["agent"], t["latency_ms"]) for t in ledger.turns] == [
+        (1, "Writer", None), (2, "Writer", None)]
+    totals = ledger.totals()
+    assert totals["turns"] == 2
+    assert (totals["input_tokens"], totals["output_tokens"], totals["cached_tokens"]) == (280, 420, 64)
+
+
+def test_usage_summary_groups_per_article(tmp_path):
+    """Verify tokens and seconds per article are averaged per prompt version."""
+    with OutputStore(tmp_path) as store:
+        for trace_id, version, tokens, total_ms in [("t1", "writer_v1", 1000, 60000),
+                                                    ("t2", "writer_v1", 3000, 120000),
+                                                    ("t3", "writer_v2", 500, 30000)]:
+            store.record(tmp_path / f"{trace_id}.md", "topic", trace_id, trace_id=trace_id,
+                         prompt_version=version, timings={"total_ms": total_ms})
+            store.record_usage(trace_id, [{"turn": 1, "input_tokens": tokens, "output_tokens": 100,
+                                           "total_tokens": tokens + 100}])
+        store.record(tmp_path / "old.md", "topic", "old", trace_id="old", prompt_version="writer_v1")
+
+        summary = {row["prompt_version"]: row for row in store.usage_summary("prompt_version")}
+
+    assert summary["writer_v1"]["articles"] == 2
+    assert summary["writer_v1"]["input_tokens"] == 2000
+    assert summary["writer_v1"]["seconds"] == 90
+    assert summary["writer_v2"]["total_tokens"] == 600
+
+
+@pytest.mark.asyncio
+async def test_workflow_records_every_model_turn(fake_llm, tmp_path):
+    """Verify a real Runner run against the mock LLM lands in the ledger and index."""
+    from agents import set_tracing_disabled
+    from main import run_workflow
+
+    set_tracing_disabled(True)
+    env = {"OUTPUT_DIR": str(tmp_path), "SPECULATIVE_SEARCH": "false", "RETRIEVAL_REUSE": "false"}
+    with patch.dict(os.environ, env):
+        with patch('tools.run_search', AsyncMock(return_value="Search results")):
+            result = await run_workflow("AI Agent")
+
+    usage = result["usage"]
+    assert usage["turns"] == fake_llm.stats()["requests"]
+    assert usage["input_tokens"] > 0 and usage["output_tokens"] > 0
+    with OutputStore(tmp_path) as store:
+        turns = store.usage(result["trace_id"])
+    assert len(turns) == usage["turns"]
+    assert all(turn["latency_ms"] is not None for turn in turns)
@@ -6,6 +6,9 @@ from typing import List, Dict, Any, Callable
 
 from agents import function_tool
 from notebooklm_tool import run_search
+from speculation import claim_speculation, wait_for_speculation
+from retrieval_cache import record_retrieval
+from retrieval_compression import compress_retrieval
 
 
 def wrap_tool_with_latency(
@@ -60,6 +63,26 @@ async def search_materials(query: str) -> str:
     Returns:
         Search results as a string containing relevant information.
     """
+    start_time = time.time()
+    # Optionally condensed to a token budget (RETRIEVAL_COMPRESSION)
+    result = await compress_retrieval(query, await _search(query))
+    # Kept with the report so later articles on similar topics can reuse it
+    record_retrieval(query, result, int((time.time() - start_time) * 1000))
+    return result
+
+
+async def _search(query: str) -> str:
+    # The round-1 query joins the workflow's speculative search if one is
+    # running; any other query waits for it instead of opening a second browser
+    speculative = claim_speculation(query)
+    if speculative is not None:
+        try:
+            return await speculative
+        except Exception:
+            pass  # fall through to a fresh query
+    else:
+        await wait_for_speculation()
+
     # Async tool - directly call the async run_search function
     return await run_search(query)
 
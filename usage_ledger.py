@@ -0,0 +1,99 @@
+"""Per-trace token and latency ledger.
+
+Runner.run reports usage per model response (result.raw_responses) but not
+how long each turn took. A UsageLedger set for the workflow collects both:
+agent.LedgerHooks time every model call (on_llm_start/on_llm_end) and read
+its usage, and `finish(result)` falls back to the raw responses when the hooks
+saw nothing. The ledger is stored with the report in the output index
+(usage_turns) and aggregated there per prompt version or provider:
+
+    python output_store.py usage --by prompt_version
+
+A listener, if given, sees every turn as it is recorded (live progress).
+This module does not import the Agents SDK, so main can import it without
+paying for the SDK before the interactive prompt.
+"""
+
+import contextvars
+from typing import Any, Callable, Dict, List, Optional
+
+TOKEN_FIELDS = ("input_tokens", "output_tokens", "cached_tokens", "reasoning_tokens", "total_tokens")
+
+
+def _int(value: Any) -> int:
+    return value if isinstance(value, int) else 0
+
+
+def usage_fields(usage: Any) -> Dict[str, int]:
+    """Token counts of an Agents SDK Usage (zeros for anything missing)."""
+    input_details = getattr(usage, "input_tokens_details", None)
+    output_details = getattr(usage, "output_tokens_details", None)
+    return {
+        "input_tokens": _int(getattr(usage, "input_tokens", 0)),
+        "output_tokens": _int(getattr(usage, "output_tokens", 0)),
+        "cached_tokens": _int(getattr(input_details, "cached_tokens", 0)),
+        "reasoning_tokens": _int(getattr(output_details, "reasoning_tokens", 0)),
+        "total_tokens": _int(getattr(usage, "total_tokens", 0)),
+    }
+
+
+class UsageLedger:
+    """Model turns of one workflow, in call order."""
+
+    def __init__(self, listener: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.turns: List[Dict[str, Any]] = []
+        self.listener = listener
+
+    def add_turn(self, agent: Optional[str], usage: Any, latency_ms: Optional[int] = None,
+                 response_id: Optional[str] = None):
+        turn = {
+            "turn": len(self.turns) + 1,
+            "agent": agent,
+            "latency_ms": latency_ms,
+            "response_id": response_id if isinstance(response_id, str) else None,
+            **usage_fields(usage),
+        }
+        self.turns.append(turn)
+        if self.listener is not None:
+            self.listener(turn)
+
+    def finish(self, *results: Any) -> "UsageLedger":
+        """Fill turns from the results' raw_responses if the hooks recorded none."""
+        if self.turns:
+            return self
+        for result in results:
+            raw_responses = getattr(result, "raw_responses", None)
+            if not isinstance(raw_responses, list):
+                continue
+            agent = getattr(getattr(result, "last_agent", None), "name", None)
+            for response in raw_responses:
+                self.add_turn(agent if isinstance(agent, str) else None,
+                              getattr(response, "usage", None),
+                              response_id=getattr(response, "response_id", None))
+        return self
+
+    def totals(self) -> Dict[str, int]:
+        totals = {"turns": len(self.turns)}
+        for name in TOKEN_FIELDS:
+            totals[name] = sum(turn[name] for turn in self.turns)
+        totals["llm_ms"] = sum(turn["latency_ms"] or 0 for turn in self.turns)
+        return totals
+
+
+# Set per workflow; agent.run_agent picks it up for Runner.run
+_current: contextvars.ContextVar[Optional[UsageLedger]] = contextvars.ContextVar(
+    "usage_ledger", default=None
+)
+
+
+def set_usage_ledger(ledger: Optional[UsageLedger]) -> contextvars.Token:
+    return _current.set(ledger)
+
+
+def reset_usage_ledger(token: contextvars.Token):
+    _current.reset(token)
+
+
+def current_ledger() -> Optional[UsageLedger]:
+    """The current workflow's ledger (None outside one)."""
+    return _current.get()